@@ -132,6 +132,7 @@ class InitBank(object):
         self.period_message = False  # true if period message was displayed (segment.py)
         self.from_date = date.today()
         self.to_date = date.today()
+        self.touchdown_point = None  # continuation of statement downloads (code 3040)
 
 
 class InitBankSync(object):
@@ -226,6 +226,26 @@ MIN_PIN_LENGTH = 3
 MAX_PIN_LENGTH = 20
 MAX_TAN_LENGTH = 20
 MIN_TAN_LENGTH = 1
+"""
+ ------------------Download Scheduler (Download All Banks)------------------------------------------------
+"""
+DOWNLOAD_WORKERS = 4  # banks downloaded concurrently
+DOWNLOAD_TIMEOUT = 300  # seconds per bank, then the bank download is abandoned
+STATEMENTS_CHUNK_SIZE = 1000  # downloaded statements stored per transaction
+"""
+ ------------------FinTS Server Connections------------------------------------------------
+"""
+FINTS_TIMEOUT = (10, 180)  # seconds (connect, read) per FinTS message
+FINTS_RETRIES = 3  # retries of failed connection attempts; sent messages are never repeated
+FINTS_POOL_SIZE = 4  # kept-alive connections per server
+"""
+ ------------------Price Download (Import Prices)------------------------------------------------
+"""
+PRICES_WORKERS = 4  # price requests running concurrently
+PRICES_TIMEOUT = (10, 60)  # seconds (connect, read) per Alpha Vantage request
+YAHOO_BATCH_SIZE = 20  # symbols per Yahoo! multi-ticker request
+ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
+ALPHA_VANTAGE_RATE = (5, 60)  # requests per seconds of the Alpha Vantage API key
 """
  ------------------ACCOUNTS Field Keys in Shelve_Files------------------------------------------------
 """
@@ -67,7 +67,7 @@ SHELVES = 'shelves'
 # additionally with VIEWs: ALTER ALGORITHM changed to CREATE ALGORITHM and IF NOT EXISTS added
 
 CREATE_APPLICATION = "CREATE TABLE IF NOT EXISTS `application` (\
-    `row_id` TINYTEXT NOT NULL DEFAULT '1' COMMENT 'row_id: application values, fields 1-9\r\nrow_id: alpha_vantage values fields 10-11' COLLATE 'utf8mb4_uca1400_ai_ci',\
+    `row_id` TINYTEXT NOT NULL DEFAULT '1' COMMENT 'row_id: application values, fields 1-9\r\nrow_id: alpha_vantage values fields 10-11\r\nrow_id 3: schema_version' COLLATE 'utf8mb4_uca1400_ai_ci',\
     `product_id` VARCHAR(50) NULL DEFAULT NULL COMMENT 'Registration ID of FinTS software products' COLLATE 'utf8mb4_uca1400_ai_ci',\
     `alpha_vantage` VARCHAR(50) NULL DEFAULT NULL COMMENT 'Free key for the Alpha Vantage Stock API  with lifetime access' COLLATE 'utf8mb4_uca1400_ai_ci',\
     `directory` VARCHAR(200) NULL DEFAULT NULL COMMENT 'Export Directory of Excel Files (Pandas Tables)' COLLATE 'utf8mb4_uca1400_ai_ci',\
@@ -78,6 +78,8 @@ CREATE_APPLICATION = "CREATE TABLE IF NOT EXISTS `application` (\
     `alpha_vantage_price_period` VARCHAR(50) NULL DEFAULT NULL COMMENT 'API returns raw (as-traded) time series of the global equity specified' COLLATE 'utf8mb4_uca1400_ai_ci',\
     `alpha_vantage_function` LONGTEXT NULL DEFAULT NULL COMMENT 'generated alpha_vantage function names' COLLATE 'utf8mb4_bin',\
     `alpha_vantage_parameter` LONGTEXT NULL DEFAULT NULL COMMENT 'generated alpha_vantage parameter sets' COLLATE 'utf8mb4_bin',\
+    `schema_version` SMALLINT(5) UNSIGNED NULL DEFAULT NULL COMMENT 'row_id 3: applied version of SCHEMA_MIGRATIONS',\
+    `schema_fingerprint` CHAR(64) NULL DEFAULT NULL COMMENT 'row_id 3: SHA-256 of CREATE_TABLES and SCHEMA_MIGRATIONS last applied' COLLATE 'utf8mb4_uca1400_ai_ci',\
     PRIMARY KEY (`row_id`(100)) USING BTREE,\
     CONSTRAINT `alpha_vantage_function` CHECK (json_valid(`alpha_vantage_function`)),\
     CONSTRAINT `alpha_vantage_parameter` CHECK (json_valid(`alpha_vantage_parameter`))\
@@ -141,7 +143,8 @@ CREATE_HOLDING = "CREATE TABLE IF NOT EXISTS `holding` (\
     `exchange_currency_2` CHAR(3) NULL DEFAULT NULL COMMENT ':92B:: Zweite Whrung' COLLATE 'latin1_swedish_ci',\
     `origin` VARCHAR(50) NULL DEFAULT '_BANKDATA_' COMMENT 'Datensatz Herkunft:  _BANKDATA_  Download Bank' COLLATE 'latin1_swedish_ci',\
     PRIMARY KEY (`iban`, `price_date`, `isin_code`) USING BTREE,\
-    INDEX `ISIN_KEY` (`isin_code`) USING BTREE\
+    INDEX `ISIN_KEY` (`isin_code`) USING BTREE,\
+    INDEX `iban_isin_code_price_date` (`iban`, `isin_code`, `price_date`) USING BTREE\
 )\
 COMMENT='Financial Transaction Services (FinTS) ? Messages (Multibankfaehige Geschaeftsvorfaelle), Version 4.1 final version, 25.07.2016, Die Deutsche Kreditwirtschaft\r\n\r\nC.4 MT 535 \r\nVersion: SRG 1998 \r\n?Statement of Holdings?; basiert auf S.W.I.F.T. Standards Release Guide 1998 \r\n\r\nFinancial Transaction Services (FinTS) \r\nDokument: Messages - Finanzdatenformate \r\nVersion: \r\n4.1 FV \r\nKapitel: \r\nB \r\nKapitel: S.W.I.F.T.-Formate \r\nAbschnitt: MT 535  \r\nStand: \r\n20.01.2014 \r\nSeite: \r\n165'\
 COLLATE='latin1_swedish_ci'\
@@ -189,7 +192,10 @@ CREATE_LEDGER = "CREATE TABLE IF NOT EXISTS `ledger` (\
     `upload_check` TINYINT(1) NOT NULL DEFAULT '0' COMMENT 'Activate if debit-credit account is correct',\
     `bank_statement_checked` TINYINT(1) NOT NULL DEFAULT '0' COMMENT 'Activate if ledger  id_no is noted on bank statement',\
     `origin` VARCHAR(50) NULL DEFAULT '_BANKDATA_' COMMENT 'data source is download bank data  or  _LEDGER_ , then data source is a ledger database' COLLATE 'latin1_swedish_ci',\
-    PRIMARY KEY (`id_no`) USING BTREE\
+    PRIMARY KEY (`id_no`) USING BTREE,\
+    INDEX `debit_account_entry_date` (`debit_account`, `entry_date`) USING BTREE,\
+    INDEX `credit_account_entry_date` (`credit_account`, `entry_date`) USING BTREE,\
+    INDEX `entry_date` (`entry_date`) USING BTREE\
 )\
  COMMENT='Preparation of bank data for the income tax return by means of categorisation for rows referring to table STATEMENT (creditor or debitor). \r\nField Origin : STATEMENT or  ACCESS for a deprecated source (Microsoft ACCES Database)\r\nContains also additional rows entered manually if  iban =NA\r\n'\
  COLLATE='latin1_swedish_ci'\
@@ -214,7 +220,8 @@ CREATE_LEDGER_COA = "CREATE TABLE IF NOT EXISTS  `ledger_coa` (\
     `portfolio` TINYINT(1) NOT NULL DEFAULT '0' COMMENT 'Activated: Account represents Portfolio Assets',\
     `obsolete` TINYINT(1) NOT NULL DEFAULT '0' COMMENT 'Activated:  Account Number not used, may be used in the Past',\
     `download` TINYINT(1) NOT NULL DEFAULT '0' COMMENT 'Activated:  Download Financial Postings/Holdings from this bank account',\
-    PRIMARY KEY (`account`) USING BTREE\
+    PRIMARY KEY (`account`) USING BTREE,\
+    INDEX `iban` (`iban`) USING BTREE\
 )\
  COMMENT='The chart of accounts (COA) is a comprehensive listing, categorized by account type, of every account used in an accounting system.\r\nUnlike a trial balance that only includes active or balanced accounts at the end of a period,\r\nthe COA encompasses all accounts in the system, providing a simple list of account numbers and names'\
  COLLATE='latin1_swedish_ci'\
@@ -386,7 +393,8 @@ CREATE_STATEMENT = "CREATE TABLE IF NOT EXISTS `statement` (\
     `statement_no` INT(5) UNSIGNED NOT NULL DEFAULT '0' COMMENT ':28C: Auszugsnummer ',\
     `camt` CHAR(3) NULL DEFAULT NULL COMMENT 'data source format: 052: Bank to Customer Account Report (camt.052)' COLLATE 'latin1_swedish_ci',\
     `origin` VARCHAR(50) NULL DEFAULT '_BANKDATA_' COMMENT 'data source: _BANKDATA_: download from bank /  _LEDGER_ : generated from ledger database' COLLATE 'latin1_swedish_ci',\
-    PRIMARY KEY (`iban`, `entry_date`, `counter`) USING BTREE\
+    PRIMARY KEY (`iban`, `entry_date`, `counter`) USING BTREE,\
+    INDEX `iban_bank_reference` (`iban`, `bank_reference`) USING BTREE\
 )\
     COMMENT='Financial Transaction Services (FinTS) ? Messages (Multibankfaehige Geschaeftsvorfaelle), Version 4.1 final version, 25.07.2016, Die Deutsche Kreditwirtschaft\r\n\r\nC.8 MT 940 \r\n\r\nC.8.3 Version: SRG 2001/ Anpassung an das SEPA-Datenformat \r\n?Transaction Report?; basiert auf S.W.I.F.T. Standards Release Guide 2001 (keine \r\nnderungen im SRG 2002)\r\n\r\nFinancial Transaction Services (FinTS) \r\nDokument: Messages - Finanzdatenformate \r\nVersion: \r\n4.1 FV \r\nKapitel: \r\nB \r\nKapitel: S.W.I.F.T.-Formate \r\nAbschnitt: MT 940  \r\nStand: \r\n20.01.2014 \r\nSeite: \r\n213'\
     COLLATE='latin1_swedish_ci'\
@@ -418,6 +426,7 @@ CREATE_TRANSACTION_VIEW = "CREATE ALGORITHM = UNDEFINED DEFINER=`root`@`localhos
 CREATE_SHELVES = "CREATE TABLE IF NOT EXISTS `shelves` (\
     `code` CHAR(8) NOT NULL COMMENT 'Bank_Code (BLZ)' COLLATE 'latin1_swedish_ci',\
     `bankdata` LONGTEXT NULL DEFAULT NULL COMMENT 'bank data stored in JSON format' COLLATE 'utf8mb4_bin',\
+    `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6) COMMENT 'Version of bankdata: time of the last change',\
     PRIMARY KEY (`code`) USING BTREE\
 )\
 COMMENT='Contains one row per bank archived with the app.\r\nRow contains the bank basic data from tables bankidentifier and server.\r\nRow contains BPD data and UPD data  from FINTS for this bank.\r\nData is stored in JSON format\r\n'\
@@ -452,6 +461,45 @@ CREATE_TABLES = [CREATE_APPLICATION,
 
                  CREATE_SHELVES,
                  ]
+"""
+-------------------------------- Schema Migrations --------------------------------------------------------
+"""
+# Changes of existing databases; CREATE_... statements above contain the current schema.
+# Applied once in ascending order, the applied version is stored in table APPLICATION row_id 3
+SCHEMA_VERSION_ROW_ID = 3
+ADD_APPLICATION_SCHEMA_VERSION = "ALTER TABLE `application` ADD COLUMN IF NOT EXISTS \
+    `schema_version` SMALLINT(5) UNSIGNED NULL DEFAULT NULL COMMENT 'row_id 3: applied version of SCHEMA_MIGRATIONS';"
+ADD_APPLICATION_SCHEMA_FINGERPRINT = "ALTER TABLE `application` ADD COLUMN IF NOT EXISTS \
+    `schema_fingerprint` CHAR(64) NULL DEFAULT NULL COMMENT 'row_id 3: SHA-256 of CREATE_TABLES and SCHEMA_MIGRATIONS last applied' COLLATE 'utf8mb4_uca1400_ai_ci';"
+SCHEMA_MIGRATIONS = [
+    # version 1: secondary indexes of ledger hot queries (balances, totals, statement transfer)
+    (1, [
+        "ALTER TABLE `ledger` \
+            ADD INDEX IF NOT EXISTS `debit_account_entry_date` (`debit_account`, `entry_date`) USING BTREE, \
+            ADD INDEX IF NOT EXISTS `credit_account_entry_date` (`credit_account`, `entry_date`) USING BTREE, \
+            ADD INDEX IF NOT EXISTS `entry_date` (`entry_date`) USING BTREE;",
+        "ALTER TABLE `ledger_coa` ADD INDEX IF NOT EXISTS `iban` (`iban`) USING BTREE;",
+        "ALTER TABLE `statement` \
+            ADD INDEX IF NOT EXISTS `iban_bank_reference` (`iban`, `bank_reference`) USING BTREE;",
+        "ALTER TABLE `holding` \
+            ADD INDEX IF NOT EXISTS `iban_isin_code_price_date` (`iban`, `isin_code`, `price_date`) USING BTREE;",
+        ]),
+    # version 2: version column of the shelve cache
+    (2, [
+        "ALTER TABLE `shelves` ADD COLUMN IF NOT EXISTS \
+            `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6) \
+            COMMENT 'Version of bankdata: time of the last change';",
+        ]),
+    # version 3: daily ledger balances are stored per posting day of maintained accounts only;
+    # rows of the former layout are dropped, the table is rebuilt from LEDGER after migrating
+    (3, [
+        "TRUNCATE TABLE `ledger_daily_balance`;",
+        ]),
+    ]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+# SCHEMA_MIGRATIONS version after which LEDGER_DAILY_BALANCE is rebuilt from LEDGER
+SCHEMA_VERSION_LEDGER_DAILY_BALANCE = 3
+
 """
 -------------------------------- MariaDB Table Fields --------------------------------------------------------
 """
@@ -564,6 +612,8 @@ DB_return_debit_notes = 'return_debit_notes'
 DB_return_reason = 'return_reason'
 DB_return_reference = 'return_reference'
 DB_row_id = 'row_id'
+DB_schema_fingerprint = 'schema_fingerprint'
+DB_schema_version = 'schema_version'
 DB_sepa_purpose = 'sepa_purpose'
 DB_server = 'server'
 DB_show_messages = 'show_messages'
@@ -578,6 +628,7 @@ DB_total_amount_portfolio = 'total_amount_portfolio'
 DB_transaction_code = 'transaction_code'
 DB_transaction_type = 'transaction_type'
 DB_type = 'type'
+DB_updated_at = 'updated_at'
 DB_ultimate_creditor = 'ultimate_creditor'
 DB_ultimate_debitor = 'ultimate_debitor'
 DB_validity = 'validity'
@@ -10,13 +10,15 @@ import json
 import logging
 import re
 import requests
-import xmltodict
 import xml.dom.minidom as minidom
+import xml.etree.ElementTree as ElementTree
 
 from decimal import Decimal
 from typing import Any, List, Union
 from datetime import date
-from operator import itemgetter
+from functools import lru_cache
+from itertools import islice
+from time import perf_counter
 from fints.message import FinTSInstituteMessage
 from fints.segments.accounts import HISPAS1
 from fints.segments.auth import (
@@ -47,6 +49,7 @@ from banking.declarations import (
     CODE_0030, CODE_3010, CODE_3040, CODE_3955, CREDIT,
     DIALOG_ID_UNASSIGNED,
     ERROR, EURO,
+    FINTS_TIMEOUT,
     INFORMATION, IDENTIFIER,
     PERCENT,
     KEY_IDENTIFIER_DELIMITER, KEY_SYSTEM_ID,
@@ -58,7 +61,7 @@ from banking.declarations import (
     KEY_ACC_BANK_CODE, KEY_ACC_CURRENCY, KEY_ACC_CUSTOMER_ID, KEY_ACC_OWNER_NAME,
     KEY_ACC_PRODUCT_NAME, KEY_ACC_SUBACCOUNT_NUMBER, KEY_ACC_TYPE,
     PNS,
-    START_DIALOG_FAILED,
+    START_DIALOG_FAILED, STATEMENTS_CHUNK_SIZE,
     WARNING,
     # form declaratives
     WM_DELETE_WINDOW, DEBIT)
@@ -71,10 +74,9 @@ from banking.message_handler import (
 from banking.forms import PrintMessageCode, InputPIN
 from banking.message import Messages
 from banking.utils import (
-    Amount, application_store,
+    application_store,
     dict_get_nested_value, dec2, dec6,
-    create_iban,
-    date_yymmdd,
+    create_iban, http_session,
     )
 
 
@@ -99,6 +101,87 @@ logger = logging.getLogger(__name__)
 log_target = logger.info
 
 
+@lru_cache(maxsize=None)
+def identifier_matcher(identifier_delimiter):
+    """
+    Returns one compiled alternation finding all SEPA identifiers of IDENTIFIER in a single scan;
+    group 1 of a match carries the identifier
+    """
+    return re.compile(''.join(['(', '|'.join(IDENTIFIER), ')', re.escape(identifier_delimiter)]))
+
+
+def find_identifiers(purpose, identifier_delimiter):
+    """
+    Returns [(identifier, start, end), ...] of the first occurrence of each SEPA identifier,
+    ordered by position in purpose; end is the position after the delimiter
+    """
+    identifiers = {}
+    for m in identifier_matcher(identifier_delimiter).finditer(purpose):
+        name = m.group(1)
+        if name not in identifiers:
+            identifiers[name] = (name, m.start(), m.end())
+    return list(identifiers.values())
+
+
+def _camt_local_name(tag):
+    """
+    Returns tag or attribute name without namespace
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+def _camt_element_dict(element):
+    """
+    Returns element as nested dict in the layout of xmltodict.parse:
+    attributes as '@name', text beside attributes or children as '#text',
+    repeated children as list, leaf elements as text
+    """
+    node = {'@' + _camt_local_name(key): value for key, value in element.attrib.items()}
+    for child in element:
+        key = _camt_local_name(child.tag)
+        value = _camt_element_dict(child)
+        if key not in node:
+            node[key] = value
+        elif isinstance(node[key], list):
+            node[key].append(value)
+        else:
+            node[key] = [node[key], value]
+    text = element.text.strip() if element.text else ''
+    if not node:
+        return text or None
+    if text:
+        node['#text'] = text
+    return node
+
+
+def _camt052_read_events(parser, path):
+
+    for event, element in parser.read_events():
+        if event == 'start':
+            path.append(element)
+            continue
+        path.pop()
+        name = _camt_local_name(element.tag)
+        if name in ('Bal', 'Ntry') and path and _camt_local_name(path[-1].tag) == 'Rpt':
+            yield name, _camt_element_dict(element)
+            path[-1].remove(element)  # release processed element
+
+
+def camt052_elements(xml_string, chunk_size=65536):
+    """
+    Yields ('Bal', dict) and ('Ntry', dict) for the balances and entries of
+    the camt.052 reports (Document/BkToCstmrAcctRpt/Rpt) in document order.
+    The document is read incrementally; each element is released after it is yielded.
+    """
+    parser = ElementTree.XMLPullParser(events=('start', 'end'))
+    path = []
+    for offset in range(0, len(xml_string), chunk_size):
+        parser.feed(xml_string[offset:offset + chunk_size])
+        yield from _camt052_read_events(parser, path)
+    parser.close()
+    yield from _camt052_read_events(parser, path)
+
+
 class Dialogs(object):
     """
     Dialogues: Customer - Bank
@@ -520,9 +603,21 @@ class Dialogs(object):
                 logger.debug(('Sending ' + 30 * '>' + '\n{}\n' + 40 * '>' + '\n').format
                              (log_out.getvalue()))
                 log_out.truncate(0)
-        r = requests.post(bank.server,
-                          headers={b'Content-Type': 'text/plain;charset=UTF-8'},
-                          data=base64.b64encode(message.render_bytes()))
+        started = perf_counter()
+        try:
+            r = http_session(bank.server).post(
+                bank.server,
+                headers={b'Content-Type': 'text/plain;charset=UTF-8'},
+                data=base64.b64encode(message.render_bytes()),
+                timeout=FINTS_TIMEOUT)
+        except requests.RequestException as error:
+            MessageBoxTermination(
+                info=get_message(MESSAGE_TEXT, 'SEND_ERROR', error), bank=bank)
+            raise  # download threads: reported by the download scheduler
+        latency = get_message(MESSAGE_TEXT, 'FINTS_LATENCY', bank.bank_name, bank.server,
+                              bank.message_number, round((perf_counter() - started) * 1000))
+        bankdata_informations_append(INFORMATION, latency)
+        log_target(latency)
         if r.status_code < 200 or r.status_code > 299:
             MessageBoxTermination(
                 info=get_message(MESSAGE_TEXT, 'SEND_ERROR', r.status_code), bank=bank)
@@ -700,87 +795,68 @@ class Dialogs(object):
             mt535[idx]['total_amount_portfolio'] = _total_amount_portfolio
         return mt535
 
-    def _mt940_listdict(self, data, bank_code):
+    def _mt940_messages(self, data):
+        """
+        Yields the MT940 messages of data one at a time;
+        a message starts with tag :20: (transaction reference)
+        """
+        message = []
+        for clause in io.StringIO(data):
+            if clause.startswith(':20:') and message:
+                yield ''.join(message)
+                message = []
+            message.append(clause)
+        if message:
+            yield ''.join(message)
+
+    def _mt940_statements(self, data, bank_code):
         """
+        Yields the statements of MT940 data as dicts in a single pass.
+        Each MT940 message is parsed once; opening and closing balances
+        are chained from its opening balance (:60F: or :60M:) through its
+        statements and carried over to messages without opening balance.
+
         documentation:
         https://www.hbci-zka.de/dokumente/spezifikation_deutsch/fintsv3/FinTS_3.0_Messages_Finanzdatenformate_2010-08-06_final_version.pdf
         (For more Information Chapter  B.8 page 174)
         """
-
-        transactions = Transactions()
-        mt940 = []
         identifier_delimiter = self.mariadb.shelve_get_key(
             bank_code, KEY_IDENTIFIER_DELIMITER)
-        # bank: CONSORS
-        # transactions.parse returns duplicate customer_reference value separated
-        # by <LF>
-        keys_not_used = []
-        mt940_statements = transactions.parse(data)
-
-        for mt940_statement in mt940_statements:
-            for key_ in mt940_statement.data.keys():
-                if key_ not in TABLE_FIELDS[STATEMENT] or mt940_statement.data[key_] is None:
-                    keys_not_used.append(key_)
-                else:
-                    value = mt940_statement.data[key_]
-                    if value is not None and isinstance(value, str):
-                        mt940_statement.data[key_] = value.replace('\n', ' ')
-                    if isinstance(value, date):
-                        mt940_statement.data[key_] = str(value)
-            for key_ in keys_not_used:
-                del mt940_statement.data[key_]
-            keys_not_used = []
-            mt940.append(mt940_statement.data)
-        idx_mt940 = 0
-        clauses = data.splitlines()
-        tags = Transactions.defaultTags().copy()
-        for clause in clauses:
-            m = tags['60F'].re.match(clause[5:])  # opening balance data
-            if clause[0:5] == ':60F:' and m:
-                _opening_status = m.group('status')
-                _entry_date = date_yymmdd.convert(
-                    m.group('year') + m.group('month') + m.group('day'))
-                _opening_entry_date = _entry_date
-                _opening_currency = m.group('currency')
-                _opening_balance = dec2.convert(abs(Amount(m.group('amount'),
-                                                           m.group('status')).amount))
-                _closing_status = m.group('status')
-                _closing_entry_date = _entry_date
-                _closing_currency = m.group('currency')
-                _closing_balance = dec2.convert(abs(Amount(m.group('amount'),
-                                                           m.group('status')).amount))
-            m = tags['60M'].re.match(clause[5:])  # opening balance data
-            if clause[0:5] == ':60M:' and m:
-                _opening_status = m.group('status')
-                _entry_date = date_yymmdd.convert(
-                    m.group('year') + m.group('month') + m.group('day'))
+        _opening_balance = None
+        for message in self._mt940_messages(data):
+            transactions = Transactions()
+            mt940_statements = transactions.parse(message)
+            balance = (transactions.data.get('final_opening_balance')
+                       or transactions.data.get('intermediate_opening_balance'))
+            if balance is not None:
+                _entry_date = date(balance.date.year, balance.date.month, balance.date.day)
+                _opening_status = balance.status
                 _opening_entry_date = _entry_date
-                _opening_currency = m.group('currency')
-                _opening_balance = dec2.convert(abs(Amount(m.group('amount'),
-                                                           m.group('status')).amount))
-                _closing_status = m.group('status')
+                _opening_currency = balance.amount.currency
+                _opening_balance = dec2.convert(abs(balance.amount.amount))
                 _closing_entry_date = _entry_date
-                _closing_currency = m.group('currency')
-                _closing_balance = dec2.convert(abs(Amount(m.group('amount'),
-                                                           m.group('status')).amount))
-            m = tags[61].re.match(clause[4:])  # transaction data
-            if clause[0:4] == ':61:' and m:
-                _amount = dec2.convert(abs(Amount(m.group('amount'),
-                                                  m.group('status')).amount))
-                _status = m.group('status')
-                try:
-                    _entry_date = date_yymmdd.convert(m.group('entry_date'))
-                except IndexError:
-                    pass
-                mt940[idx_mt940]['entry_date'] = _entry_date
-                mt940[idx_mt940]['amount'] = _amount
-                mt940[idx_mt940]['currency'] = _opening_currency
-                mt940[idx_mt940].update({'opening_status': _opening_status})
-                mt940[idx_mt940].update(
-                    {'opening_entry_date': _opening_entry_date})
-                mt940[idx_mt940].update(
-                    {'opening_currency': _opening_currency})
-                mt940[idx_mt940].update({'opening_balance': _opening_balance})
+                _closing_currency = balance.amount.currency
+            for mt940_statement in mt940_statements:
+                # bank: CONSORS
+                # transactions.parse returns duplicate customer_reference value separated
+                # by <LF>
+                _amount = dec2.convert(abs(mt940_statement.data['amount'].amount))
+                _status = mt940_statement.data['status']
+                statement = {}
+                for key_, value in mt940_statement.data.items():
+                    if key_ in TABLE_FIELDS[STATEMENT] and value is not None:
+                        if isinstance(value, str):
+                            value = value.replace('\n', ' ')
+                        elif isinstance(value, date):
+                            value = str(value)
+                        statement[key_] = value
+                statement['entry_date'] = _entry_date
+                statement['amount'] = _amount
+                statement['currency'] = _opening_currency
+                statement['opening_status'] = _opening_status
+                statement['opening_entry_date'] = _opening_entry_date
+                statement['opening_currency'] = _opening_currency
+                statement['opening_balance'] = _opening_balance
                 x = _opening_balance
                 if _opening_status == 'D':
                     x = -x
@@ -789,39 +865,26 @@ class Dialogs(object):
                     y = -y
                 _closing_balance = dec2.add(x, y)
                 _closing_status = 'C' if (_closing_balance > 0) else 'D'
-                mt940[idx_mt940].update({'closing_status': _closing_status})
-                mt940[idx_mt940].update(
-                    {'closing_entry_date': _closing_entry_date})
-                mt940[idx_mt940].update(
-                    {'closing_currency': _closing_currency})
-                mt940[idx_mt940].update(
-                    {'closing_balance': abs(_closing_balance)})
+                statement['closing_status'] = _closing_status
+                statement['closing_entry_date'] = _closing_entry_date
+                statement['closing_currency'] = _closing_currency
+                statement['closing_balance'] = abs(_closing_balance)
                 _opening_balance = abs(_closing_balance)
                 _opening_status = _closing_status
-                mt940[idx_mt940] = self._create_identifiers(
-                    mt940[idx_mt940], identifier_delimiter)
-                idx_mt940 += 1
-        return mt940
+                yield self._create_identifiers(statement, identifier_delimiter)
 
     def _create_identifiers(self, mt940, identifier_delimiter):
 
         if 'purpose' in mt940:
-            identifiers = []
             if isinstance(mt940['purpose'], list):
                 mt940['purpose'] = " ".join(mt940['purpose'])
             purpose = mt940['purpose'].replace(' ', '')
             # select existing SEPA indentifiers in purpose
-            for identifier in IDENTIFIER.keys():
-                identifier = identifier + identifier_delimiter
-                m = re.compile(identifier).search(purpose)
-                if m is not None:
-                    identifiers.append((m.group(), m.start(), m.end()))
-            identifiers = sorted(identifiers, key=itemgetter(1))
+            identifiers = find_identifiers(purpose, identifier_delimiter)
             purpose_all = purpose
             # insert sepa items in mt940
             for idx, identifier in enumerate(identifiers):
                 name, _, end = identifier
-                name = name[:-1]
                 try:
                     _, next_start, _ = identifiers[idx + 1]
                     value = purpose_all[end:next_start]
@@ -841,7 +904,13 @@ class Dialogs(object):
         return mt940
 
     def _parse_camt052(self, xml_string, bank):
+
+        return list(self._camt052_statements(xml_string, bank))
+
+    def _camt052_statements(self, xml_string, bank):
         """
+        Yields the statements of a camt.052 document one entry at a time.
+
         Document:
             www.ebics.de > Datenformate > Gueltige version
             Die Deutsche Kreditwirtschaft
@@ -877,56 +946,51 @@ class Dialogs(object):
             return None, EURO
 
         identifier_delimiter = self.mariadb.shelve_get_key(bank.bank_code, KEY_IDENTIFIER_DELIMITER)
-        doc = xmltodict.parse(xml_string)
-        doc = doc.get("Document", {})
-        root = doc.get("BkToCstmrAcctRpt", {})
-        rpt = root.get("Rpt", {})
-        # Get opening balance
         opening_balance = None
         closing_balance = None
-        rpt_bal = rpt.get("Bal", [])
-        for bal in ensure_list(rpt_bal):
-            # bal could be dict with keys Tp->{Cd}, Amt, CdtDbtInd, Dt or Bal.Dt
-            tp = bal.get("Tp", {})
-            cd = None
-            # cd might be under Tp.Cd or Tp.Cd.CdOrPrtry
-            if isinstance(tp, dict):
-                cd = tp.get("Cd") or tp.get("CdOrPrtry", None)
-                # sometimes nested: Tp.Cd.Prtry...
-                if isinstance(cd, dict):
-                    # try nested representation
-                    cd = cd.get("#text") or cd.get("Cd")
-            if cd and cd == "OPBD":
-                opening_balance, opening_currency = normalize_amount(bal.get("Amt"))
-                if opening_balance:
-                    cdt_db = bal.get("CdtDbtInd")
-                    if cdt_db == "DBIT":
-                        opening_status = DEBIT
-                    else:
-                        opening_status = CREDIT
-                    opening_balance = convert_amount(opening_balance, opening_status)
-                    # date can be in bal.Dt or bal.Dt.Dt or in SubTp? prefer Dt.Dt
-                    dt = None
-                    dt_node = bal.get("Dt") or bal.get("DtTm")
-                    if isinstance(dt_node, dict):
-                        dt = dt_node.get("Dt") or dt_node.get("#text")
-                    else:
-                        dt = dt_node
-                    opening_date = dt
-            if cd and cd == "CLBD":
-                closing_balance, _ = normalize_amount(bal.get("Amt"))
-                if closing_balance:
-                    cdt_db = bal.get("CdtDbtInd")
-                    if cdt_db == "DBIT":
-                        closing_status = DEBIT
-                    else:
-                        closing_status = CREDIT
-                    closing_balance = convert_amount(closing_balance, closing_status)
-        # Get statements
-        entries_out = []
         entry_obj = {}
-        ntry = rpt.get("Ntry")
-        for entry in ensure_list(ntry):
+        for name, node in camt052_elements(xml_string):
+            if name == "Bal":
+                bal = node
+                # bal could be dict with keys Tp->{Cd}, Amt, CdtDbtInd, Dt or Bal.Dt
+                tp = bal.get("Tp", {})
+                cd = None
+                # cd might be under Tp.Cd or Tp.Cd.CdOrPrtry
+                if isinstance(tp, dict):
+                    cd = tp.get("Cd") or tp.get("CdOrPrtry", None)
+                    # sometimes nested: Tp.Cd.Prtry...
+                    if isinstance(cd, dict):
+                        # try nested representation
+                        cd = cd.get("#text") or cd.get("Cd")
+                if cd and cd == "OPBD":
+                    opening_balance, opening_currency = normalize_amount(bal.get("Amt"))
+                    if opening_balance:
+                        cdt_db = bal.get("CdtDbtInd")
+                        if cdt_db == "DBIT":
+                            opening_status = DEBIT
+                        else:
+                            opening_status = CREDIT
+                        opening_balance = convert_amount(opening_balance, opening_status)
+                        # date can be in bal.Dt or bal.Dt.Dt or in SubTp? prefer Dt.Dt
+                        dt = None
+                        dt_node = bal.get("Dt") or bal.get("DtTm")
+                        if isinstance(dt_node, dict):
+                            dt = dt_node.get("Dt") or dt_node.get("#text")
+                        else:
+                            dt = dt_node
+                        opening_date = dt
+                if cd and cd == "CLBD":
+                    closing_balance, _ = normalize_amount(bal.get("Amt"))
+                    if closing_balance:
+                        cdt_db = bal.get("CdtDbtInd")
+                        if cdt_db == "DBIT":
+                            closing_status = DEBIT
+                        else:
+                            closing_status = CREDIT
+                        closing_balance = convert_amount(closing_balance, closing_status)
+                continue
+            # Get statements
+            entry = node
             if opening_balance:
                 entry_obj = {
                     DB_opening_balance: abs(opening_balance),
@@ -934,6 +998,8 @@ class Dialogs(object):
                     DB_opening_currency: opening_currency,
                     DB_opening_entry_date: opening_date,
                     }
+            else:
+                entry_obj = {}
             entry_obj[DB_amount], entry_obj[DB_currency] = normalize_amount(entry.get("Amt"))
             entry_obj[DB_status] = DEBIT if entry.get("CdtDbtInd") == "DBIT" else CREDIT
             entry_obj[DB_entry_date] = (entry.get("BookgDt") or {}).get("Dt") if isinstance(entry.get("BookgDt"), dict) else entry.get("BookgDt")
@@ -1027,7 +1093,7 @@ class Dialogs(object):
                         entry_obj[DB_applicant_iban] = iban
                     entry_obj = self._create_identifiers(entry_obj, identifier_delimiter)
                 entry_obj[DB_camt] = "052"  # source format camt.052
-                entries_out.append(entry_obj)
+                yield entry_obj
         if entry_obj and closing_balance:  # entries exist and closing_balance reported by bank
             statements_closing_balance = convert_amount(entry_obj[DB_closing_balance], entry_obj[DB_closing_status])  # calculated closing_balance
             if closing_balance != statements_closing_balance:
@@ -1040,7 +1106,6 @@ class Dialogs(object):
                         ),
                     information=WARNING
                     )
-        return entries_out
 
     def anonymous(self, bank):
         ' HITANS >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>'
@@ -1103,12 +1168,58 @@ class Dialogs(object):
         holdings = self._mt535_listdict(holding_str)
         return holdings
 
-    def statements(self, bank):
+    def statements(self, bank, store=None):
+        """
+        Downloads the statements of the period bank.from_date - bank.to_date.
 
+        If the bank reports further turnovers (code 3040) the download continues
+        at the returned touchdown point within the same dialog until no turnovers remain.
+        If store is given, the statements of each page are passed to store(statements)
+        in chunks of STATEMENTS_CHUNK_SIZE as they are parsed and are not kept;
+        otherwise all pages are returned as one list.
+        """
         if self._start_dialog(bank) in START_DIALOG_FAILED:
             return WM_DELETE_WINDOW
 
         statements = []
+        bank.touchdown_point = None
+        while True:
+            page, touchdown_point = self._statements_page(bank)
+            if page is None:
+                bank.touchdown_point = None
+                return statements  # threading continues
+            if store is None:
+                statements.extend(page)
+            else:
+                page = iter(page)
+                while chunk := list(islice(page, STATEMENTS_CHUNK_SIZE)):
+                    store(chunk)
+            if touchdown_point is None:
+                break
+            bank.touchdown_point = touchdown_point
+        bank.touchdown_point = None
+        self._end_dialog(bank)
+        return statements
+
+    def _touchdown_point(self, response):
+        """
+        Returns the touchdown point of code 3040 (further turnovers exist) or None
+        """
+        for seg in response.find_segments(HIRMS2):
+            for response_ in seg.responses:
+                if response_.code == CODE_3040 and response_.parameters:
+                    return response_.parameters[0]
+        return None
+
+    def _statements_page(self, bank):
+        """
+        Requests one page of statements starting at bank.touchdown_point.
+
+        Returns (statements, touchdown point of the next page or None);
+        statements is None if the download stops without ending the dialog
+        """
+        statements = []
+        touchdown_point = None
         bank.tan_process = 4
         response, hirms_codes = self._send_msg(
             bank, self.messages.msg_statements(bank))
@@ -1118,13 +1229,15 @@ class Dialogs(object):
         response, hirms_codes = self._receive_msg(
             bank, response, hirms_codes)
         if not response:
-            return statements  # no statements found or SCA in threading mode
+            return None, None  # no statements found or SCA in threading mode
 
         if CODE_3010 in hirms_codes:
-            return statements
+            return None, None
 
         if CODE_0030 not in hirms_codes:
             if CODE_3040 in hirms_codes:  # further turnovers exist
+                touchdown_point = self._touchdown_point(response)
+            if CODE_3040 in hirms_codes and touchdown_point is None:
                 MessageBoxInfo(
                     message=get_message(
                         MESSAGE_TEXT, CODE_3040, bank.bank_name, bank.account_number,
@@ -1143,7 +1256,7 @@ class Dialogs(object):
                             ),
                         information=ERROR
                         )
-                    return statements  # threading continues
+                    return None, None  # threading continues
 
                 try:
                     statement_booked_str = seg.statement_booked.decode('utf-8')
@@ -1156,7 +1269,8 @@ class Dialogs(object):
                     log_target(statement_booked_str)
                     logging.getLogger(__name__).debug(
                         '\n\n>>>>> START MT940 DATA PARSING ' + 30 * '>' + '\n')
-                statements = self._mt940_listdict(
+                # parsed lazily while the statements are consumed
+                statements = self._mt940_statements(
                     statement_booked_str, bank.bank_code)
             elif bank.statement_camt:
                 seg = response.find_segment_first(HICAZ1)
@@ -1168,7 +1282,7 @@ class Dialogs(object):
                             ),
                         information=ERROR
                         )
-                    return statements  # threading continues
+                    return None, None  # threading continues
 
                 statements = seg.statement_booked.camt_statements._data[0]
                 if self._logging:
@@ -1180,8 +1294,7 @@ class Dialogs(object):
                     logging.getLogger(__name__).debug(
                         '\n\n>>>>> START CAMT_052 DATA PARSING ' + 30 * '>' + '\n')
                 statements = self._parse_camt052(statements, bank)
-        self._end_dialog(bank)
-        return statements
+        return statements, touchdown_point
 
     def transfer(self, bank):
 
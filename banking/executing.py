@@ -9,10 +9,11 @@ import webbrowser
 from PIL import ImageTk
 
 from collections import defaultdict
-from time import sleep
+from time import monotonic
 from typing import List, Dict, Optional
 from datetime import date, timedelta, datetime
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from tkinter import Tk, Menu, TclError, GROOVE, ttk, Canvas, StringVar, font
 from tkinter.ttk import Label
 from fints.types import ValueList
@@ -50,7 +51,7 @@ from banking.declarations import (
     SHELVE_KEYS,
     START_DATE_HOLDING, START_DATE_STATEMENTS,
     TRANSACTION_DELIVERY,
-    WEBSITES, WARNING,
+    WEBSITES, WARNING, ERROR, DOWNLOAD_WORKERS, DOWNLOAD_TIMEOUT,
     BUTTON_APPEND, BUTTON_SAVE,
     BUTTON_PRICES_IMPORT, BUTTON_REPLACE, BUTTON_RESTORE,
     BUTTON_ALPHA_VANTAGE,
@@ -64,10 +65,9 @@ from banking.declarations_mariadb import (
     DB_acquisition_amount, DB_amount_currency, DB_amount, DB_account, DB_applicant_name,
     DB_alpha_vantage,
     DB_alpha_vantage_function, DB_alpha_vantage_parameter,
-    DB_opening_balance, DB_opening_currency, DB_opening_status, DB_opening_entry_date,
+    DB_opening_balance, DB_opening_currency, DB_opening_status,
     DB_closing_balance, DB_closing_currency, DB_closing_status, DB_closing_entry_date,
     DB_counter, DB_date, DB_category, DB_code, DB_currency, DB_credit_account,
-    DB_close,
     DB_debit_account,
     DB_entry_date,
     DB_ISIN, DB_iban, DB_id_no,
@@ -87,7 +87,7 @@ from banking.declarations_mariadb import (
     ISIN, PRICES_ISIN_VIEW, PRICES, SERVER, STATEMENT,
     TRANSACTION, TRANSACTION_VIEW,
     LEDGER_COA, LEDGER_VIEW,
-    SHELVES, DB_asset_accounting, LEDGER_DAILY_BALANCE, DB_balance,
+    DB_asset_accounting, LEDGER_DAILY_BALANCE, DB_balance,
 )
 from banking.formbuilts import (
     BuiltPandasBox,
@@ -97,7 +97,7 @@ from banking.formbuilts import (
 )
 from banking.message_handler import (
     get_message, MESSAGE_TITLE, MESSAGE_TEXT,
-    Informations, holding_informations_append,
+    Informations, holding_informations_append, bankdata_informations_append,
     MessageBoxAsk, MessageBoxInfo,  MessageBoxException,
     )
 from banking.forms import (
@@ -307,22 +307,9 @@ class BankenLedger():
                                     )
                                 )
             bank.opened_bank_code = None  # triggers bank opening messages
-            self.progress.start()
-            for bank_code in banks_download:
-                bank = self._bank_init(bank_code)
-                self.footer.set(
-                    get_message(MESSAGE_TEXT, 'DOWNLOAD_RUNNING', bank.bank_name))
-                download_thread = Thread(
-                    name=bank.bank_name, target=self.mariadb.all_accounts, args=(bank,))
-                download_thread.start()
-                seconds = 0
-                while download_thread.is_alive() and seconds < 60:
-                    sleep(1)
-                    seconds += 1
-                    self.progress.update_progressbar()
-                if bank.scraper:
-                    bank.logoff()
-            self.progress.stop()
+            # PIN input outside of Thread
+            banks = [self._bank_init(bank_code) for bank_code in banks_download]
+            self._download_banks(banks)
             self.footer.set(
                 get_message(MESSAGE_TEXT, 'DOWNLOAD_DONE', CANCELED, 10 * '!'))
         else:
@@ -331,6 +318,69 @@ class BankenLedger():
                     self._all_accounts(bank_code)
         self._show_informations()
 
+    def _download_banks(self, banks, max_workers=DOWNLOAD_WORKERS, timeout=DOWNLOAD_TIMEOUT):
+        """
+        Download bank data of independent banks concurrently.
+
+        Each bank is downloaded in a worker thread with its own database connection.
+        Completed downloads advance the progress bar; a download still running
+        <timeout> seconds after its start is abandoned and reported.
+        The worker of an abandoned download runs on; when it finishes,
+        its bank dialog is ended (scraper: logoff) and reported.
+        """
+        started = {}
+
+        def download(bank):
+            started[bank.bank_code] = monotonic()
+            with self.mariadb.worker_connection():
+                self.mariadb.all_accounts(bank)
+
+        def end_abandoned(bank):
+            try:
+                if bank.scraper:
+                    bank.logoff()
+                elif bank.opened_bank_code == bank.bank_code:
+                    with self.mariadb.worker_connection():
+                        bank.dialogs._end_dialog(bank)
+                bankdata_informations_append(
+                    INFORMATION, get_message(MESSAGE_TEXT, 'DOWNLOAD_ABANDONED_END', bank.bank_name))
+            except Exception as exc:
+                bankdata_informations_append(
+                    ERROR, get_message(MESSAGE_TEXT, 'DOWNLOAD_FAILED', bank.bank_name, exc))
+
+        self.progress.start(maximum=len(banks))
+        self.footer.set(
+            get_message(MESSAGE_TEXT, 'DOWNLOAD_RUNNING', ', '.join(bank.bank_name for bank in banks)))
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='download')
+        pending = {pool.submit(download, bank): bank for bank in banks}
+        while pending:
+            done, _ = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                bank = pending.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    message = get_message(MESSAGE_TEXT, 'DOWNLOAD_DONE', bank.bank_name)
+                else:
+                    message = get_message(MESSAGE_TEXT, 'DOWNLOAD_FAILED', bank.bank_name, exc)
+                    bankdata_informations_append(ERROR, message)
+                self.footer.set(message)
+                if bank.scraper:
+                    bank.logoff()
+                self.progress.step()
+            now = monotonic()
+            for future, bank in list(pending.items()):
+                if bank.bank_code in started and now - started[bank.bank_code] > timeout:
+                    del pending[future]
+                    bankdata_informations_append(
+                        WARNING, get_message(MESSAGE_TEXT, 'DOWNLOAD_TIMEOUT', bank.bank_name, timeout))
+                    # runs in the worker thread when it finishes, at once if finished meanwhile
+                    future.add_done_callback(lambda _, bank=bank: end_abandoned(bank))
+                    self.progress.step()
+            self.progress.update_progressbar()
+        # abandoned downloads finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.progress.stop()
+
     def _all_accounts(self, bank_code):
 
         self._delete_footer()
@@ -926,7 +976,7 @@ class BankenLedger():
                         )
                     )
                 return
-        self.mariadb.execute_delete(SHELVES, code=bank_code)
+        self.mariadb.shelve_delete(bank_code)
         del self.bank_names[bank_code]
         MessageBoxInfo(
             title=title,
@@ -1384,20 +1434,18 @@ class BankenLedger():
         Imports prices
         Updates market_price, total_amount
         """
-        price = self.mariadb.select_table(
-            PRICES_ISIN_VIEW, DB_close, result_dict=True, isin_code=holding_dict[DB_ISIN], price_date=holding_dict[DB_price_date])
-        if not price:
+        # close series of the symbol is loaded once for all positions and dates
+        close = self.mariadb.select_close_prices(
+            holding_dict[DB_symbol], [holding_dict[DB_price_date]], exact=True)[0]
+        if close is None:
             # import price data
             import_prices_run(title, self.mariadb, [holding_dict[DB_name]], BUTTON_APPEND)
-        price = self.mariadb.select_table(
-            PRICES_ISIN_VIEW, DB_close, result_dict=True, isin_code=holding_dict[DB_ISIN],
-            price_date=holding_dict[DB_price_date]
-            )
-        if price:
+            close = self.mariadb.select_close_prices(
+                holding_dict[DB_symbol], [holding_dict[DB_price_date]], exact=True)[0]
+        if close is not None:
             # update holding market price
-            price_dict = price[0]
             field_dict = {}
-            field_dict[DB_market_price] = price_dict[DB_close]
+            field_dict[DB_market_price] = close
             field_dict[DB_total_amount] = dec2.multiply(
                 field_dict[DB_market_price], holding_dict[DB_pieces])
             field_dict[DB_origin] = ORIGIN_PRICES
@@ -1462,12 +1510,8 @@ class BankenLedger():
                     isin_code, period, iban, data_dict[FN_COST_METHOD])
             else:
                 select_holding_ibans = self.mariadb.select_table_distinct(TRANSACTION, DB_iban, period=period)
-                select_isin_transaction = []
-                for _iban in select_holding_ibans:
-                    _iban = _iban[0]
-                    result = self.mariadb.get_transaction_overview(
-                        isin_code, period, _iban, data_dict[FN_COST_METHOD])
-                    select_isin_transaction.extend(result)
+                select_isin_transaction = self.mariadb.get_transaction_overviews(
+                    isin_code, period, [_iban[0] for _iban in select_holding_ibans], data_dict[FN_COST_METHOD])
             if select_isin_transaction:
                 title_period = '   '.join(
                     [title, data_dict[DB_name], get_message(MESSAGE_TEXT, 'PERIOD', data_dict[FN_FROM_DATE], data_dict[FN_TO_DATE])])
@@ -1578,13 +1622,13 @@ class BankenLedger():
                     break
                 else:
                     MessageBoxInfo(title=title, message=get_message(MESSAGE_TEXT, 'SELECT_INCOMPLETE'))
-            select_data = self.mariadb.select_table(PRICES_ISIN_VIEW, [DB_name, DB_price_date] + selected_fields,
-                                                    order=DB_name, result_dict=True,
+            select_data = self.mariadb.select_frame(PRICES_ISIN_VIEW, [DB_name, DB_price_date] + selected_fields,
+                                                    order=DB_name, coerce_float=False,
                                                     isin_code=selected_isins,
                                                     period=(data_dict[FN_FROM_DATE], data_dict[FN_TO_DATE]))
             select_origin_dict = dict(self.mariadb.select_table(
                 ISIN, [DB_name, DB_origin_symbol], isin_code=selected_isins))
-            if select_data:
+            if not select_data.empty:
                 self.footer.set('')
                 while True:
                     price_table = PandasBoxPrices(title=title, dataframe=(
@@ -1832,11 +1876,17 @@ class BankenLedger():
         message = title
         total_df = []
         if self.bank_names != {}:
+            bank_accounts = {
+                bank_code: self._show_balances_accounts(bank_code)
+                for bank_code in self.bank_names.keys()
+                }
+            snapshot = self.mariadb.select_balance_snapshot(
+                acc[KEY_ACC_IBAN] for accounts in bank_accounts.values() for acc in accounts)
             for bank_name in self.bank_names.values():
                 message = message + '\n' + bank_name
                 bank_code = dict_get_first_key(self.bank_names, bank_name)
                 bank_balances = self._show_balances_get(
-                    bank_code, owner_name=None)
+                    bank_code, accounts=bank_accounts[bank_code], snapshot=snapshot)
                 max_entry_date = ''
                 if bank_balances:
                     dataframe = DataFrame(bank_balances, columns=[KEY_ACC_BANK_CODE, KEY_ACC_ACCOUNT_NUMBER,
@@ -1877,123 +1927,92 @@ class BankenLedger():
         else:
             self.footer.set(get_message(MESSAGE_TEXT, 'DATA_NO', title, ''))
 
-    def _show_balances_get(self, bank_code, owner_name=None):
+    def _show_balances_accounts(self, bank_code, owner_name=None):
 
         if bank_code in self.bank_owner_account and owner_name:
-            accounts = self.bank_owner_account[bank_code][owner_name]
-        else:
-            accounts = self.mariadb.shelve_get_key(bank_code, KEY_ACCOUNTS)
-        balances = []
-        if accounts:
-            for acc in accounts:
-                iban = acc[KEY_ACC_IBAN]
-                max_entry_date = self.mariadb.select_scalar(
-                    STATEMENT, f"MAX({DB_entry_date})", iban=iban)
-                if max_entry_date:
-                    fields = [DB_counter,
-                              DB_closing_status, DB_closing_balance, DB_closing_currency, DB_closing_entry_date,
-                              DB_opening_status, DB_opening_balance, DB_opening_currency, DB_opening_entry_date]
-                    balance = self.mariadb.select_table(
-                        STATEMENT, fields, result_dict=True, date_name=DB_date, iban=iban, entry_date=max_entry_date, order=DB_counter)
-                    if balance:
-                        # STATEMENT Account
-                        current_date = date.today()
-                        # Monday is 0 and Sunday is 6
-                        if date.weekday(current_date) == 5:
-                            current_date = current_date - timedelta(1)
-                        # Monday is 0 and Sunday is 6
-                        elif date.weekday(current_date) == 6:
-                            current_date = current_date - timedelta(2)
-                        if balance[-1][DB_closing_entry_date] == current_date:
-                            balances.append(Balance(bank_code,
-                                                    acc[KEY_ACC_ACCOUNT_NUMBER],
-                                                    acc[KEY_ACC_PRODUCT_NAME],
-                                                    max_entry_date,
-                                                    balance[-1][DB_closing_status],
-                                                    balance[-1][DB_closing_balance],
-                                                    balance[-1][DB_closing_currency],
-                                                    balance[0][DB_opening_status],
-                                                    balance[0][DB_opening_balance],
-                                                    balance[0][DB_opening_currency],
-                                                    ))
-                        else:
-                            balances.append(Balance(bank_code,
-                                                    acc[KEY_ACC_ACCOUNT_NUMBER],
-                                                    acc[KEY_ACC_PRODUCT_NAME],
-                                                    max_entry_date,
-                                                    balance[-1][DB_closing_status],
-                                                    balance[-1][DB_closing_balance],
-                                                    balance[-1][DB_closing_currency],
-                                                    balance[-1][DB_closing_status],
-                                                    balance[-1][DB_closing_balance],
-                                                    balance[-1][DB_closing_currency],
-                                                    ))
+            return self.bank_owner_account[bank_code][owner_name]
+        return self.mariadb.shelve_get_key(bank_code, KEY_ACCOUNTS) or []
 
+    def _show_balances_get(self, bank_code, owner_name=None, accounts=None, snapshot=None):
+        """
+        Returns list of Balance of the accounts of bank_code.
+        snapshot: MariaDB.select_balance_snapshot of the accounts, selected if not given
+        """
+        if accounts is None:
+            accounts = self._show_balances_accounts(bank_code, owner_name=owner_name)
+        if snapshot is None:
+            snapshot = self.mariadb.select_balance_snapshot(acc[KEY_ACC_IBAN] for acc in accounts)
+        balances = []
+        for acc in accounts:
+            iban = acc[KEY_ACC_IBAN]
+            if iban in snapshot.statements:
+                # STATEMENT Account
+                first, last = snapshot.statements[iban]
+                current_date = date.today()
+                # Monday is 0 and Sunday is 6
+                if date.weekday(current_date) == 5:
+                    current_date = current_date - timedelta(1)
+                # Monday is 0 and Sunday is 6
+                elif date.weekday(current_date) == 6:
+                    current_date = current_date - timedelta(2)
+                if last[DB_closing_entry_date] != current_date:
+                    first = last
+                    opening = (DB_closing_status, DB_closing_balance, DB_closing_currency)
                 else:
-                    # HOLDING Account
-                    all_max_price_date = self.mariadb.select_scalar(
-                        HOLDING, f"MAX({DB_price_date})")
-                    max_price_date = self.mariadb.select_scalar(
-                        HOLDING, f"MAX({DB_price_date})", iban=iban)
-                    price_date = date_days.subtract(date.today(), 1)
-                    if date_days.isweekend(price_date):
-                        price_date = date_days.subtract(price_date, 1)
-                    if max_price_date and max_price_date >= all_max_price_date:  # if its an emty holding account
-                        fields = [DB_total_amount_portfolio,
-                                  DB_amount_currency]
-                        balance = self.mariadb.select_table(
-                            HOLDING, fields, result_dict=True, iban=iban, price_date=max_price_date)
-                        if balance:
-                            # HOLDING Account contains only 1 record per day
-                            balance = balance[0]
-                            # HOLDING previous entry
-                            clause = ' ' + DB_price_date + ' < ' + \
-                                '"' + max_price_date.strftime("%Y-%m-%d") + '"'
-                            max_price_date_previous = self.mariadb.select_scalar(
-                                HOLDING, f"MAX({DB_price_date})", iban=iban, clause=clause)
-                            balance_previous = self.mariadb.select_table(
-                                HOLDING, fields, result_dict=True, iban=iban, price_date=max_price_date_previous)
-                            if balance_previous:
-                                balance_previous = balance_previous[0]
-                            else:
-                                balance_previous = balance
-                            balances.append(Balance(bank_code,
-                                                    acc[KEY_ACC_ACCOUNT_NUMBER],
-                                                    acc[KEY_ACC_PRODUCT_NAME],
-                                                    max_price_date,
-                                                    '',
-                                                    balance[DB_total_amount_portfolio],
-                                                    balance[DB_amount_currency],
-                                                    '',
-                                                    balance_previous[DB_total_amount_portfolio],
-                                                    balance_previous[DB_amount_currency]
-                                                    ))
+                    opening = (DB_opening_status, DB_opening_balance, DB_opening_currency)
+                balances.append(Balance(bank_code,
+                                        acc[KEY_ACC_ACCOUNT_NUMBER],
+                                        acc[KEY_ACC_PRODUCT_NAME],
+                                        last[DB_entry_date],
+                                        last[DB_closing_status],
+                                        last[DB_closing_balance],
+                                        last[DB_closing_currency],
+                                        *(first[field] for field in opening)
+                                        ))
+            else:
+                # HOLDING Account
+                price_date = date_days.subtract(date.today(), 1)
+                if date_days.isweekend(price_date):
+                    price_date = date_days.subtract(price_date, 1)
+                balance, balance_previous = snapshot.holdings.get(iban, (None, None))
+                if balance and balance[DB_price_date] >= snapshot.max_price_date:  # if its an emty holding account
+                    balances.append(Balance(bank_code,
+                                            acc[KEY_ACC_ACCOUNT_NUMBER],
+                                            acc[KEY_ACC_PRODUCT_NAME],
+                                            balance[DB_price_date],
+                                            '',
+                                            balance[DB_total_amount_portfolio],
+                                            balance[DB_amount_currency],
+                                            '',
+                                            balance_previous[DB_total_amount_portfolio],
+                                            balance_previous[DB_amount_currency]
+                                            ))
+                else:
+                    ledger_total_amount = self.mariadb.select_ledger_total_amount(iban)
+                    if ledger_total_amount:
+                        balances.append(Balance(bank_code,
+                                                acc[KEY_ACC_ACCOUNT_NUMBER],
+                                                acc[KEY_ACC_PRODUCT_NAME],
+                                                ledger_total_amount[DB_entry_date],
+                                                ledger_total_amount[DB_status],
+                                                ledger_total_amount[DB_amount],
+                                                ledger_total_amount[DB_entry_date],
+                                                ledger_total_amount[DB_status],
+                                                ledger_total_amount[DB_amount],
+                                                ''
+                                                ))
                     else:
-                        ledger_total_amount = self.mariadb.select_ledger_total_amount(iban)
-                        if ledger_total_amount:
-                            balances.append(Balance(bank_code,
-                                                    acc[KEY_ACC_ACCOUNT_NUMBER],
-                                                    acc[KEY_ACC_PRODUCT_NAME],
-                                                    ledger_total_amount[DB_entry_date],
-                                                    ledger_total_amount[DB_status],
-                                                    ledger_total_amount[DB_amount],
-                                                    ledger_total_amount[DB_entry_date],
-                                                    ledger_total_amount[DB_status],
-                                                    ledger_total_amount[DB_amount],
-                                                    ''
-                                                    ))
-                        else:
-                            balances.append(Balance(bank_code,
-                                                    acc[KEY_ACC_ACCOUNT_NUMBER],
-                                                    acc[KEY_ACC_PRODUCT_NAME],
-                                                    price_date,
-                                                    '',
-                                                    0,
-                                                    '',
-                                                    '',
-                                                    0,
-                                                    ''
-                                                    ))
+                        balances.append(Balance(bank_code,
+                                                acc[KEY_ACC_ACCOUNT_NUMBER],
+                                                acc[KEY_ACC_PRODUCT_NAME],
+                                                price_date,
+                                                '',
+                                                0,
+                                                '',
+                                                '',
+                                                0,
+                                                ''
+                                                ))
         return balances
 
     def _show_statements(self, bank_code, account):
@@ -2025,11 +2044,11 @@ class BankenLedger():
                 filter(lambda x: data_dict[x] == 1, list(data_dict.keys())))
             message = get_message(MESSAGE_TEXT, 'HELP_PANDASTABLE')
             period = (data_dict[FN_FROM_DATE], data_dict[FN_TO_DATE])
-            data = self.mariadb.select_table(
-                STATEMENT, selected_check_button, result_dict=True,
+            data = self.mariadb.select_frame(
+                STATEMENT, selected_check_button, coerce_float=False,
                 date_name=DB_date, iban=iban, period=period)
             title_period = ' '.join([title, str(period)])
-            if data:
+            if not data.empty:
                 while True:
                     table = PandasBoxStatementTable(
                         title_period, data, message, mode=EDIT_ROW)
@@ -2290,13 +2309,10 @@ class BankenLedger():
         if input_period:
             from_date = input_period.field_dict[FN_FROM_DATE]
             to_date = input_period.field_dict[FN_TO_DATE]
-            data = []
-            data_counter = 0
-            for asset_day in date_days.iter_workdays(from_date, to_date):
-                asset_day_data = self._ledger_balance_account(asset_day, asset_accounts)
-                if asset_day_data:
-                    data = [*data, *asset_day_data]
-                    data_counter += 1
+            data = self._ledger_assets_data(from_date, to_date, asset_accounts)
+            if data is None:
+                return
+            data_counter = len({row[DB_date] for row in data})
             self._show_informations()
             title = ' '.join(
                 [title, get_message(MESSAGE_TEXT, 'PERIOD', from_date, to_date)])
@@ -2318,6 +2334,67 @@ class BankenLedger():
         else:
             self.footer.set(get_message(MESSAGE_TEXT, 'DATA_NO', title, ''))
 
+    def _ledger_assets_data(
+        self,
+        from_date: str,
+        to_date: str,
+        asset_accounts: List[Dict[str, any]],
+    ) -> Optional[List[Dict[str, any]]]:
+        """
+        Calculate balances of asset accounts for all workdays of a period.
+
+        Balances are taken from the date x account matrix of select_ledger_balance_matrix;
+        accounts without statement or opening balance booking fall back to
+        select_ledger_balance as in _ledger_balance_account.
+
+        Returns:
+            Optional[List[Dict[str, any]]]: A list of dictionaries, each containing:
+                - DB_account, DB_name, DB_date, FN_BALANCE
+            Returns None if the opening balance account is missing.
+        """
+        opening_balance_account = self.mariadb.select_scalar(
+            LEDGER_COA,
+            DB_account,
+            opening_balance_account=True  # check box value in table LEDGER_COA
+        )
+        if not opening_balance_account:
+            MessageBoxInfo(
+                message=get_message(MESSAGE_TEXT, 'OPENING_ACCOUNT_MISSED')
+            )
+            return None
+        matrix = self.mariadb.select_ledger_balance_matrix(
+            asset_accounts, opening_balance_account, from_date, to_date)
+        data: List[Dict[str, any]] = []
+        opening_ledger_missed = set()
+        for asset_day, balances in matrix.items():
+            for asset_account_dict in asset_accounts:
+                account = asset_account_dict[DB_account]
+                balance = balances[account]
+                if balance is None and not asset_account_dict[DB_portfolio]:
+                    # Ledger fallback
+                    period = (date(asset_day.year, 1, 1), asset_day)
+                    balance = self.mariadb.select_ledger_balance(
+                        asset_account_dict, opening_balance_account, period)
+                    if not balance and account not in opening_ledger_missed:
+                        opening_ledger_missed.add(account)
+                        MessageBoxInfo(
+                            message=get_message(
+                                MESSAGE_TEXT,
+                                'OPENING_LEDGER_MISSED',
+                                (None, asset_day),
+                                asset_account_dict[DB_name]
+                            ),
+                            info_storage=Informations.BANKDATA_INFORMATIONS,
+                        )
+                if balance:
+                    data.append({
+                        DB_account: account,
+                        DB_name: asset_account_dict[DB_name],
+                        DB_date: asset_day,
+                        FN_BALANCE: balance
+                    })
+        return data
+
     def _ledger_balance_account(
         self,
         to_date: str,
@@ -2418,13 +2495,8 @@ class BankenLedger():
             portfolio = asset_account_dict[DB_portfolio]
             balance: Optional[float] = None
 
-            balance = self.mariadb.select_scalar(
-                LEDGER_DAILY_BALANCE,
-                DB_balance,
-                account=account,
-                entry_date=to_date
-            )
-            if balance:  # use calculated balance
+            balance = self.mariadb.select_ledger_daily_balance(account, to_date)
+            if balance is not None:  # use calculated balance
                 pass
 
             # 1️⃣ Portfolio account: return 0 if no entries, no fallback
@@ -2462,10 +2534,12 @@ class BankenLedger():
                 balance = ledger_fallback(asset_account_dict, period)
             # Append calculated balance
             if balance:
-                if self.mariadb.select_scalar(LEDGER_COA, DB_asset_accounting, account=account):
+                # ledger-only accounts are maintained with each LEDGER change
+                if ((portfolio or iban != NOT_ASSIGNED)
+                        and self.mariadb.select_scalar(LEDGER_COA, DB_asset_accounting, account=account)):
                     self.mariadb.execute_replace(
                         LEDGER_DAILY_BALANCE,
-                        {DB_account: account, DB_entry_date: from_date, DB_balance: balance}
+                        {DB_account: account, DB_entry_date: to_date, DB_balance: balance}
                         )
                 data.append({
                     DB_account: account,
@@ -2620,10 +2694,10 @@ class BankenLedger():
             selected_row = 0
             while True:
                 period = (data_dict[FN_FROM_DATE], data_dict[FN_TO_DATE])
-                data = self.mariadb.select_table(
-                    LEDGER_VIEW, field_list, result_dict=True,
+                data = self.mariadb.select_frame(
+                    LEDGER_VIEW, field_list, coerce_float=False,
                     date_name=DB_entry_date, period=period)
-                if data:
+                if not data.empty:
                     table = PandasBoxLedgerTable(
                         title_period, data, message, mode=EDIT_ROW, selected_row=selected_row, period=period)
                     message = table.message
@@ -2668,6 +2742,10 @@ class BankenLedger():
                 LEDGER_DAILY_BALANCE,
                 **{DB_account: accounts_to_delete}
                 )
+            # ledger-only accounts are recomputed from LEDGER at once
+            rebuilt = self.mariadb.ledger_daily_balance_rebuild(accounts_to_delete)
+            self.footer.set(
+                get_message(MESSAGE_TEXT, 'LEDGER_DAILY_BALANCE_REBUILT', rebuilt))
         else:
             self.footer.set(
                 get_message(MESSAGE_TEXT, 'DATA_NO', LEDGER_DAILY_BALANCE.upper(), ''))
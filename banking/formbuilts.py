@@ -238,10 +238,20 @@ class ProgressBar(Progressbar):
 
         super().__init__(master=master, orient=HORIZONTAL, length=600, mode='indeterminate')
 
-    def start(self, interval=None):
-
+    def start(self, interval=None, maximum=None):
+        """
+        maximum: number of steps, shows determinate progress advanced by step()
+        """
         self.pack()
-        Progressbar.start(self, interval=interval)
+        if maximum:
+            self.configure(mode='determinate', maximum=maximum, value=0)
+        else:
+            Progressbar.start(self, interval=interval)
+        self.update_progressbar()
+
+    def step(self, amount=1):
+
+        self.configure(value=min(float(self['value']) + amount, float(self['maximum'])))
         self.update_progressbar()
 
     def update_progressbar(self):
@@ -251,6 +261,7 @@ class ProgressBar(Progressbar):
     def stop(self):
 
         Progressbar.stop(self)
+        self.configure(mode='indeterminate', value=0)
         self.pack_forget()
 
 
@@ -12,8 +12,11 @@ import webbrowser
 import requests
 import ta
 
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import redirect_stdout
-from yfinance import Ticker
+from queue import Queue
+from threading import Lock, Thread
+from yfinance import download as yahoo_download
 from decimal import Decimal
 from bisect import bisect_left
 from collections import namedtuple
@@ -55,7 +58,8 @@ from banking.declarations_mariadb import (
     DB_earnings, DB_spendings, DB_transfer_account, DB_transfer_rate
 )
 from banking.declarations import (
-    ALPHA_VANTAGE, ALPHA_VANTAGE_REQUIRED, ALPHA_VANTAGE_REQUIRED_COMBO,
+    ALPHA_VANTAGE, ALPHA_VANTAGE_RATE, ALPHA_VANTAGE_REQUIRED, ALPHA_VANTAGE_REQUIRED_COMBO,
+    ALPHA_VANTAGE_URL,
     ALPHA_VANTAGE_OPTIONAL_COMBO,
     BUTTON_INDICATOR,
     CURRENCIES, CREDIT,
@@ -69,7 +73,7 @@ from banking.declarations import (
     FN_PROFIT_CUM, FN_PIECES_CUM, FN_PROFIT, FN_BALANCE,
     HTTP_CODE_OK,
     OUTPUTSIZE_FULL, OUTPUTSIZE_COMPACT,
-    PERCENT,
+    PERCENT, PRICES_TIMEOUT, PRICES_WORKERS,
     INFORMATION,
     KEY_BANK_CODE, KEY_BANK_NAME, KEY_MAX_PIN_LENGTH,
     KEY_DOWNLOAD_ACTIVATED,
@@ -91,7 +95,7 @@ from banking.declarations import (
     TIME_SERIES_MONTHLY, TIME_SERIES_WEEKLY_ADJUSTED,
     ToolbarSwitch, TIME_SERIES_DAILY,
     TRANSACTION_TYPES, TRANSACTION_DELIVERY,
-    VALIDITY_DEFAULT, WARNING, KEY_ACC_ACCOUNT_NUMBER, NOT_ASSIGNED, YAHOO,
+    VALIDITY_DEFAULT, WARNING, KEY_ACC_ACCOUNT_NUMBER, NOT_ASSIGNED, YAHOO, YAHOO_BATCH_SIZE,
     WWW_YAHOO,
 
     COMBO, CHECK,
@@ -124,7 +128,7 @@ from banking.utils import (
     dec2,
     date_days,
     get_popup_menu_text, get_menu_text,
-    http_error_code)
+    http_error_code, TokenBucket)
 
 message_transaction_new = True  # Switch to show Message just once
 
@@ -141,188 +145,286 @@ def _set_defaults(field_defs=[FieldDefinition()], default_values=(1,)):
     return field_defs
 
 
-def import_prices_run(title, mariadb, field_list, state):
+PriceJob = namedtuple('PriceJob', 'name isin symbol origin_symbol from_date to_date full')
+
 
+def import_prices_run(title, mariadb, field_list, state):
+    """
+    Downloads (BUTTON_APPEND, BUTTON_REPLACE) or deletes (BUTTON_DELETE)
+    the prices of the securities field_list (names of table ISIN).
+    Downloads run concurrently in a PriceDownloader; their results are shown
+    in one message when all downloads are done.
+    """
+    select_isin_data = mariadb.select_table(
+        ISIN, [DB_name, DB_ISIN, DB_symbol, DB_origin_symbol], name=list(field_list), result_dict=True)
+    # names are compared case-insensitively like the collation of column name
+    isin_data = {row[DB_name].casefold(): row for row in select_isin_data}
+    start_date_prices = date_days.convert('2000-01-01')
+    to_date = date.today()
+    max_price_dates = {}
+    if state == BUTTON_APPEND:
+        symbols = [row[DB_symbol] for row in select_isin_data]
+        if symbols:
+            max_price_dates = {
+                symbol.casefold(): max_price_date
+                for symbol, max_price_date in mariadb.select_rows(
+                    table=PRICES, fields=[DB_symbol, f"MAX({DB_price_date})"],
+                    group_by=DB_symbol, symbol=symbols)
+                }
+    jobs = []
     for name in field_list:
-        select_isin_data = mariadb.select_table(
-            ISIN, [DB_ISIN, DB_symbol, DB_origin_symbol], name=name, result_dict=True)
-        if select_isin_data:
-            select_isin_data = select_isin_data[0]
-            symbol = select_isin_data[DB_symbol]
-            origin_symbol = select_isin_data[DB_origin_symbol]
-            message_symbol = symbol + '/' + origin_symbol
-            isin = select_isin_data[DB_ISIN]
-            if state == BUTTON_DELETE:
-                mariadb.execute_delete(PRICES, symbol=symbol)
+        select_isin_data = isin_data.get(name.casefold())
+        if not select_isin_data:
+            continue
+        symbol = select_isin_data[DB_symbol]
+        origin_symbol = select_isin_data[DB_origin_symbol]
+        message_symbol = symbol + '/' + origin_symbol
+        isin = select_isin_data[DB_ISIN]
+        if state == BUTTON_DELETE:
+            mariadb.execute_delete(PRICES, symbol=symbol)
+            MessageBoxInfo(
+                title=title,
+                info_storage=Informations.PRICES_INFORMATIONS,
+                message=get_message(
+                    MESSAGE_TEXT,
+                    'PRICES_DELETED',
+                    name,
+                    message_symbol,
+                    isin
+                    )
+                )
+        elif symbol == NOT_ASSIGNED or origin_symbol == NOT_ASSIGNED:
+            MessageBoxInfo(title=title, info_storage=Informations.PRICES_INFORMATIONS, information=WARNING,
+                           message=get_message(MESSAGE_TEXT, 'SYMBOL_MISSING', isin, name))
+        else:
+            from_date = start_date_prices
+            if max_price_dates.get(symbol.casefold()):
+                from_date = max_price_dates[symbol.casefold()] + timedelta(days=1)
+            if from_date > to_date:
                 MessageBoxInfo(
                     title=title,
                     info_storage=Informations.PRICES_INFORMATIONS,
                     message=get_message(
                         MESSAGE_TEXT,
-                        'PRICES_DELETED',
+                        'PRICES_ALREADY',
                         name,
                         message_symbol,
-                        isin
+                        origin_symbol,
+                        isin,
+                        '',
+                        to_date
                         )
                     )
             else:
-                if symbol == NOT_ASSIGNED or origin_symbol == NOT_ASSIGNED:
-                    MessageBoxInfo(title=title, info_storage=Informations.PRICES_INFORMATIONS, information=WARNING,
-                                   message=get_message(MESSAGE_TEXT, 'SYMBOL_MISSING', isin, name))
+                jobs.append(PriceJob(name, isin, symbol, origin_symbol, from_date, to_date,
+                                     from_date == start_date_prices))
+    if jobs:
+        messages = PriceDownloader(title, mariadb).run(jobs)
+        if messages:
+            MessageBoxInfo(title=title, info_storage=Informations.PRICES_INFORMATIONS,
+                           message='\n\n'.join(messages))
+
+
+class PriceDownloader:
+    """
+    Concurrent price download pipeline
+
+    Yahoo! symbols are fetched in multi-ticker batches, Alpha Vantage symbols
+    one request each behind a token bucket rate limiter.
+    Fetched frames are handed to a single writer thread storing them in table PRICES.
+    Result messages are collected and returned by run(), so the caller shows them
+    on its own thread.
+
+    The Alpha Vantage endpoint (alpha_vantage_url) and the Yahoo! batch download
+    (yahoo_download(symbols, start, end) -> DataFrame with columns (symbol, field))
+    are parameters, so the pipeline runs against a local stub server
+    replaying recorded responses.
+    """
+    YAHOO_COLUMNS = {"Date": DB_price_date, 'Open': DB_open, 'High': DB_high,
+                     'Low': DB_low, 'Close': DB_close, 'Adj Close': DB_adjclose,
+                     'Dividends': DB_dividends, 'Stock Splits': DB_splits,
+                     'Volume': DB_volume}
+    ALPHA_VANTAGE_COLUMNS = {"index": DB_price_date, '1. open': DB_open,
+                             '2. high': DB_high, '3. low': DB_low, '4. close': DB_close,
+                             '5. volume': DB_volume}
+    ALPHA_VANTAGE_ADJUSTED_COLUMNS = {"index": DB_price_date, '1. open': DB_open,
+                                      '2. high': DB_high, '3. low': DB_low, '4. close': DB_close,
+                                      '5. adjusted close': DB_adjclose, '6. volume': DB_volume,
+                                      '7. dividend amount': DB_dividends,
+                                      '8. split coefficient': DB_splits}
+
+    def __init__(self, title, mariadb, workers=PRICES_WORKERS, yahoo_batch_size=YAHOO_BATCH_SIZE,
+                 alpha_vantage_url=ALPHA_VANTAGE_URL, alpha_vantage_rate=ALPHA_VANTAGE_RATE,
+                 yahoo_download=None):
+
+        self.title = title
+        self.mariadb = mariadb
+        self.workers = workers
+        self.yahoo_batch_size = yahoo_batch_size
+        self.alpha_vantage_url = alpha_vantage_url
+        self.alpha_vantage_bucket = TokenBucket(*alpha_vantage_rate)
+        self.yahoo_download = yahoo_download or self._yahoo_download
+        # yfinance keeps the frames of a download in module state: one download at a time
+        self._yahoo_lock = Lock()
+        self._session = requests.Session()
+        self._frames = Queue()
+        self._messages = []
+        self._messages_lock = Lock()
+
+    def run(self, jobs):
+        """
+        Downloads the prices of jobs (PriceJob), returns when all frames are stored.
+        Returns the result messages (PRICES_LOADED, PRICES_NO, ALPHA_VANTAGE).
+        """
+        writer = Thread(name=' '.join([get_menu_text("Prices"), 'Writer']), target=self._writer)
+        writer.start()
+        try:
+            yahoo_jobs = sorted((job for job in jobs if job.origin_symbol == YAHOO), key=lambda job: job.from_date)
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prices') as pool:
+                futures = [
+                    pool.submit(self._fetch_yahoo, yahoo_jobs[index:index + self.yahoo_batch_size])
+                    for index in range(0, len(yahoo_jobs), self.yahoo_batch_size)
+                    ]
+                futures.extend(
+                    pool.submit(self._fetch_alpha_vantage, job)
+                    for job in jobs if job.origin_symbol == ALPHA_VANTAGE
+                    )
+            for future in futures:
+                if future.exception() is not None:
+                    prices_informations_append(ERROR, str(future.exception()))
+        finally:
+            self._frames.put(None)
+            writer.join()
+            self._session.close()
+        return self._messages
+
+    def _message(self, message):
+
+        with self._messages_lock:
+            self._messages.append(message)
+
+    @staticmethod
+    def _yahoo_download(symbols, start, end):
+
+        return yahoo_download(symbols, start=start, end=end, auto_adjust=False, actions=True,
+                              group_by='ticker', progress=False, threads=True)
+
+    def _fetch_yahoo(self, jobs):
+        """
+        Fetches a batch of Yahoo! symbols in one multi-ticker request
+        starting with the earliest from_date of the batch.
+        """
+        symbols = [job.symbol for job in jobs]
+        try:
+            f = io.StringIO()
+            with self._yahoo_lock, redirect_stdout(f):
+                dataframe = self.yahoo_download(
+                    symbols, min(job.from_date for job in jobs), max(job.to_date for job in jobs))
+            if f.getvalue():
+                prices_informations_append(INFORMATION, f.getvalue())
+        except Exception as info:
+            prices_informations_append(ERROR, ' '.join([YAHOO, ', '.join(symbols), str(info)]))
+            return
+        for job in jobs:
+            if dataframe.columns.nlevels > 1:
+                if job.symbol in dataframe.columns.get_level_values(0):
+                    frame = dataframe[job.symbol].dropna(how='all')
                 else:
-                    from_date = date_days.convert('2000-01-01')
-                    start_date_prices = from_date
-                    if state == BUTTON_APPEND:
-                        max_price_date = mariadb.select_scalar(
-                            PRICES, f"MAX({DB_price_date})", symbol=symbol)
-                        if max_price_date:
-                            from_date = max_price_date + timedelta(days=1)
-                    # to_date = date_days.subtract(date.today(), 1)
-                    to_date = date.today()
-                    if from_date > to_date:
-                        MessageBoxInfo(
-                            title=title,
-                            info_storage=Informations.PRICES_INFORMATIONS,
-                            message=get_message(
-                                MESSAGE_TEXT,
-                                'PRICES_ALREADY',
-                                name,
-                                message_symbol,
-                                origin_symbol,
-                                isin,
-                                '',
-                                to_date
-                                )
-                            )
-                    if origin_symbol == YAHOO:
-                        tickers = Ticker(symbol)
-                        f = io.StringIO()
-                        with redirect_stdout(f):
-                            dataframe = tickers.history(auto_adjust=False,
-                                                        period=None, start=from_date, end=to_date)
-                        if f.getvalue():
-                            prices_informations_append(
-                                INFORMATION, f.getvalue())
-                        columns = {"Date": DB_price_date, 'Open': DB_open, 'High': DB_high,
-                                   'Low': DB_low, 'Close': DB_close, 'Adj Close': DB_adjclose,
-                                   'Dividends': DB_dividends, 'Stock Splits': DB_splits,
-                                   'Volume': DB_volume}
-                    elif origin_symbol == ALPHA_VANTAGE:
-                        function = application_store.get(DB_alpha_vantage_price_period)
-                        """
-                        By default, outputsize=compact. Strings compact and full are accepted with the following specifications:
-                        compact returns only the latest 100 data points;
-                        full returns the full-length time series of 20+ years of historical data
-                        """
-                        url = 'https://www.alphavantage.co/query?function=' + function + '&symbol=' + \
-                            symbol + '&outputsize='
-                        if from_date == start_date_prices:
-                            url = url + OUTPUTSIZE_FULL + '&apikey=' + \
-                                application_store.get(DB_alpha_vantage)
-                        else:
-                            url = url + OUTPUTSIZE_COMPACT + '&apikey=' + \
-                                application_store.get(DB_alpha_vantage)
-                        data = requests.get(url).json()
-                        keys = [*data]  # list of keys of dictionary data
-                        dataframe = None
-                        if len(keys) == 2:
-                            try:
-                                """
-                                2. item of dict data contains Time Series as a dict ( *data[1})
-                                example: TIME_SERIES_DAILY                                                                {
-                                            "Meta Data": {
-                                                "1. Information": "Daily Prices (open, high, low, close) and Volumes",
-                                                "2. Symbol": "IBM",
-                                                "3. Last Refreshed": "2023-07-26",
-                                                "4. Output Size": "Compact",
-                                                "5. Time Zone": "US/Eastern"
-                                            },
-                                            "Time Series (Daily)": {
-                                                "2023-07-26": {
-                                                    "1. open": "140.4400",
-                                                    "2. high": "141.2500",
-                                                    "3. low": "139.8800",
-                                                    "4. close": "141.0700",
-                                                    "5. volume": "4046441"
-                                                },
-                                                "2023-07-25": {
-                                                    "1. open": "139.4200",
-                                                    "2. high": "140.4300",
-                                """
-                                data = data[keys[1]]
-                                dataframe = DataFrame(data)
-                                dataframe = dataframe.T
-                                if 'ADJUSTED' in function:
-                                    columns = {"index": DB_price_date, '1. open': DB_open,
-                                               '2. high': DB_high, '3. low': DB_low, '4. close': DB_close,
-                                               '5. adjusted close': DB_adjclose, '6. volume': DB_volume,
-                                               '7. dividend amount': DB_dividends,
-                                               '8. split coefficient': DB_splits}
-                                else:
-                                    columns = {"index": DB_price_date, '1. open': DB_open,
-                                               '2. high': DB_high, '3. low': DB_low, '4. close': DB_close,
-                                               '5. volume': DB_volume}
-                            except Exception:
-                                prices_informations_append(ERROR, data)
-                                MessageBoxInfo(title=title, info_storage=Informations.PRICES_INFORMATIONS,
-                                               message=get_message(MESSAGE_TEXT, 'ALPHA_VANTAGE', isin, name))
-                                return
-                        else:
-                            try:
-                                data = data['Information']
-                            except Exception:
-                                pass
-                            prices_informations_append(ERROR, data)
-                            MessageBoxInfo(title=title, info_storage=Informations.PRICES_INFORMATIONS,
-                                           message=get_message(MESSAGE_TEXT, 'ALPHA_VANTAGE', isin, name))
-                            return
-                    if dataframe.empty:
-                        MessageBoxInfo(
-                            title=title,
-                            info_storage=Informations.PRICES_INFORMATIONS,
-                            message=get_message(
-                                MESSAGE_TEXT,
-                                'PRICES_NO',
-                                name,
-                                message_symbol,
-                                origin_symbol,
-                                isin,
-                                ''
-                                )
-                            )
-                    else:
-                        dataframe = dataframe.reset_index()
-                        dataframe[DB_symbol] = symbol
-                        dataframe.rename(columns=columns, inplace=True)
-                        if origin_symbol == YAHOO:
-                            dataframe[DB_origin] = YAHOO
-                        elif origin_symbol == ALPHA_VANTAGE:
-                            dataframe[DB_origin] = ALPHA_VANTAGE
-                        try:
-                            dataframe[DB_price_date] = dataframe[DB_price_date].apply(
-                                lambda x: x.date())
-                        except Exception:
-                            pass
-                        dataframe = dataframe.set_index(
-                            [DB_symbol, DB_price_date])
-                        dataframe.sort_index(inplace=True)
-                        period = (
-                            dataframe.index[0][1], dataframe.index[-1][1])
-                        mariadb.execute_delete(
-                            PRICES, symbol=symbol, period=period)
-                        if mariadb.import_prices(title, dataframe):
-                            MessageBoxInfo(
-                                title=title,
-                                info_storage=Informations.PRICES_INFORMATIONS,
-                                message=get_message(
-                                    MESSAGE_TEXT,
-                                    'PRICES_LOADED',
-                                    name,
-                                    period,
-                                    message_symbol,
-                                    isin
-                                    )
-                                )
+                    frame = DataFrame()
+            else:
+                frame = dataframe.dropna(how='all')
+            if not frame.empty:
+                frame = frame[to_datetime(frame.index).date >= job.from_date]
+            self._frames.put((job, frame, self.YAHOO_COLUMNS))
+
+    def _fetch_alpha_vantage(self, job):
+        """
+        Fetches an Alpha Vantage time series, full outputsize if no prices are stored.
+        """
+        function = application_store.get(DB_alpha_vantage_price_period)
+        params = {'function': function, 'symbol': job.symbol,
+                  'outputsize': OUTPUTSIZE_FULL if job.full else OUTPUTSIZE_COMPACT,
+                  'apikey': application_store.get(DB_alpha_vantage)}
+        self.alpha_vantage_bucket.acquire()
+        try:
+            data = self._session.get(self.alpha_vantage_url, params=params, timeout=PRICES_TIMEOUT).json()
+        except (requests.RequestException, ValueError) as info:
+            data = str(info)
+        keys = [*data] if isinstance(data, dict) else []  # list of keys of dictionary data
+        dataframe = None
+        if len(keys) == 2:
+            try:
+                # 2. item of dict data contains Time Series as a dict ( *data[1})
+                dataframe = DataFrame(data[keys[1]]).T
+            except Exception:
+                dataframe = None
+        if dataframe is None:
+            if isinstance(data, dict):
+                data = data.get('Information', data)
+            prices_informations_append(ERROR, data)
+            self._message(get_message(MESSAGE_TEXT, 'ALPHA_VANTAGE', job.isin, job.name))
+            return
+        if 'ADJUSTED' in function:
+            columns = self.ALPHA_VANTAGE_ADJUSTED_COLUMNS
+        else:
+            columns = self.ALPHA_VANTAGE_COLUMNS
+        self._frames.put((job, dataframe, columns))
+
+    def _writer(self):
+        """
+        Single writer thread: stores the fetched frames in table PRICES.
+        """
+        with self.mariadb.worker_connection():
+            while (item := self._frames.get()) is not None:
+                job, dataframe, columns = item
+                try:
+                    self._store(job, dataframe, columns)
+                except Exception as info:
+                    prices_informations_append(ERROR, ' '.join([job.symbol, job.isin, str(info)]))
+
+    def _store(self, job, dataframe, columns):
+
+        message_symbol = job.symbol + '/' + job.origin_symbol
+        if dataframe.empty:
+            self._message(
+                get_message(
+                    MESSAGE_TEXT,
+                    'PRICES_NO',
+                    job.name,
+                    message_symbol,
+                    job.origin_symbol,
+                    job.isin,
+                    ''
+                    )
+                )
+            return
+        dataframe = dataframe.reset_index()
+        dataframe[DB_symbol] = job.symbol
+        dataframe.rename(columns=columns, inplace=True)
+        dataframe[DB_origin] = job.origin_symbol
+        try:
+            dataframe[DB_price_date] = dataframe[DB_price_date].apply(
+                lambda x: x.date())
+        except Exception:
+            pass
+        dataframe = dataframe.set_index(
+            [DB_symbol, DB_price_date])
+        dataframe.sort_index(inplace=True)
+        period = (
+            dataframe.index[0][1], dataframe.index[-1][1])
+        self.mariadb.execute_delete(
+            PRICES, symbol=job.symbol, period=period)
+        if self.mariadb.import_prices(self.title, dataframe):
+            self._message(
+                get_message(
+                    MESSAGE_TEXT,
+                    'PRICES_LOADED',
+                    job.name,
+                    period,
+                    message_symbol,
+                    job.isin
+                    )
+                )
 
 
 class AlphaVantageParameter(BuiltEnterBox):
@@ -2177,7 +2279,7 @@ class PandasBoxLedgerTable(BuiltPandasBox):
         else:
             self.credit_statement_missed = self.debit_statement_missed = []
         self.message = message
-        if data:
+        if len(data):  # list of dicts or DataFrame
             super().__init__(title=title, dataframe=data, message=message,
                              mode=mode, selected_row=self.selected_row)
         else:
@@ -3,7 +3,10 @@ Created on 11.08.2024
 __updated__ = "2026-01-30"
 @author: Wolfgang Kramer
 """
+from bisect import bisect_right, insort
 from datetime import date, timedelta
+from operator import itemgetter
+from threading import Lock
 
 from banking.declarations import NOT_ASSIGNED, WARNING, CREDIT, DEBIT
 from banking.declarations import START_DATE_LEDGER
@@ -38,63 +41,135 @@ from banking.message_handler import get_message, MessageBoxInfo, MESSAGE_TEXT
 from banking.utils import dec2,  date_days
 
 
-def _recommend_account(mariadb, account, statement_dict, posting_text_dict):
+ID_NO_YEAR = 1000000  # id_no: position 1-4 ledger year, position 5-10 ledger document number
+SEPA_CHECK_FIELDS = [DB_creditor_id, DB_debitor_id, DB_mandate_id,
+                     DB_applicant_iban, DB_applicant_name, DB_purpose_wo_identifier]
+
+
+class ContraAccountRecommender:
     """
-    recommendation contra account, otherwise return 'NA'
-    hierarchy of contra_account selection
+    Recommendation of contra accounts for the statements of one IBAN in a transfer run.
+
+    Built once per transfer run, holds hash maps: SEPA field value --> contra accounts used
+    in the last 370 days sorted by entry_date. Ledger rows created during the run are
+    added incrementally.
+
+    hierarchy of contra_account selection:
+        1. contra_account of LEDGER_COA
+        2. contra_account used last 370 days, statement fields checked in order of SEPA_CHECK_FIELDS
+        3. contra_account used for posting_text in the last 365 days
     """
-    # 1. table LEDGER_COA
-    ledger_coa = mariadb.select_table(
-        LEDGER_COA, [DB_contra_account, DB_iban], result_dict=True, account=account)
-    if ledger_coa and ledger_coa[0][DB_contra_account] != NOT_ASSIGNED:
-        if ledger_coa[0][DB_contra_account] != account:
-            return ledger_coa[0][DB_contra_account]
-    # 2. find contra_account used last 370 days, statement fields checked in this order
-    check_field_list = [DB_creditor_id, DB_debitor_id, DB_mandate_id,
-                        DB_applicant_iban, DB_applicant_name, DB_purpose_wo_identifier]
-    period = (statement_dict[DB_entry_date] -
-              timedelta(days=370), date_days.subtract(statement_dict[DB_entry_date], 1))
-    for field_name in check_field_list:
-        if statement_dict[field_name]:
-            if field_name == DB_creditor_id:
-                account = mariadb.select_sepa_fields_in_statement(
-                    statement_dict[DB_iban], period=period, creditor_id=statement_dict[DB_creditor_id])
-            elif field_name == DB_debitor_id:
-                account = mariadb.select_sepa_fields_in_statement(
-                    statement_dict[DB_iban], period=period, debitor_id=statement_dict[DB_debitor_id])
-            elif field_name == DB_mandate_id:
-                account = mariadb.select_sepa_fields_in_statement(
-                    statement_dict[DB_iban], period=period, mandate_id=statement_dict[DB_mandate_id])
-            elif field_name == DB_applicant_iban:
-                account = mariadb.select_sepa_fields_in_statement(
-                    statement_dict[DB_iban], period=period, applicant_iban=statement_dict[DB_applicant_iban])
-            elif field_name == DB_applicant_name:
-                account = mariadb.select_sepa_fields_in_statement(
-                    statement_dict[DB_iban], period=period, applicant_name=statement_dict[DB_applicant_name])
-            elif field_name == DB_purpose_wo_identifier:
-                account = mariadb.select_sepa_fields_in_statement(
-                    statement_dict[DB_iban], period=period,
-                    clause=f"{DB_purpose_wo_identifier} LIKE ?",
-                    clause_vars=(f"{statement_dict[DB_purpose_wo_identifier][:20]} + %",)
-                    )
-            if account != NOT_ASSIGNED:
-                return account
-    # 3. dictionary  used posting_text_dict of last 365 days
-    if statement_dict[DB_posting_text] in posting_text_dict.keys():
-        # contra_account matched posting_text
-        if posting_text_dict[statement_dict[DB_posting_text]] != account:
-            return posting_text_dict[statement_dict[DB_posting_text]]
-    return NOT_ASSIGNED
+
+    def __init__(self, mariadb, iban, account, contra_account, from_date):
+
+        self.account = account
+        self.contra_account = contra_account
+        self.posting_text_dicts = {
+            CREDIT: mariadb.select_ledger_posting_text_account(iban),
+            DEBIT: mariadb.select_ledger_posting_text_account(iban, credit=False)
+            }
+        # key: field_name, value: dict of key: normalized field value, value: list of (entry_date, contra_account)
+        self.index = {field_name: {} for field_name in SEPA_CHECK_FIELDS}
+        rows = mariadb.select_sepa_fields_contra_accounts(
+            iban, date_days.convert_to_date(from_date) - timedelta(days=370), SEPA_CHECK_FIELDS)
+        for row in rows:
+            self.add(row, row[DB_contra_account])
+
+    def _key(self, field_name, value):
+        """
+        normalized lookup key (database comparison is case insensitive)
+        """
+        if field_name == DB_purpose_wo_identifier:
+            value = value[:20]
+        return value.rstrip().casefold()
+
+    def add(self, statement_dict, contra_account):
+        """
+        register contra_account used for statement_dict
+        """
+        entry_date = statement_dict[DB_entry_date]
+        for field_name in SEPA_CHECK_FIELDS:
+            value = statement_dict[field_name]
+            if value:
+                entries = self.index[field_name].setdefault(self._key(field_name, value), [])
+                if entries and entries[-1][0] > entry_date:
+                    insort(entries, (entry_date, contra_account), key=itemgetter(0))
+                else:
+                    entries.append((entry_date, contra_account))
+
+    def _lookup(self, field_name, value, period):
+        """
+        contra account of the most recent statement within period matching value, otherwise 'NA'
+        """
+        entries = self.index[field_name].get(self._key(field_name, value))
+        if not entries:
+            return NOT_ASSIGNED
+        from_date, to_date = period
+        idx = bisect_right(entries, to_date, key=itemgetter(0))
+        if idx and entries[idx - 1][0] >= from_date:
+            return entries[idx - 1][1]
+        return NOT_ASSIGNED
+
+    def recommend(self, statement_dict):
+        """
+        recommendation contra account, otherwise return 'NA'
+        """
+        account = self.account
+        # 1. table LEDGER_COA
+        if self.contra_account != NOT_ASSIGNED and self.contra_account != account:
+            return self.contra_account
+        # 2. find contra_account used last 370 days, statement fields checked in this order
+        period = (statement_dict[DB_entry_date] -
+                  timedelta(days=370), date_days.subtract(statement_dict[DB_entry_date], 1))
+        for field_name in SEPA_CHECK_FIELDS:
+            if statement_dict[field_name]:
+                account = self._lookup(field_name, statement_dict[field_name], period)
+                if account != NOT_ASSIGNED:
+                    return account
+        # 3. dictionary  used posting_text_dict of last 365 days
+        posting_text_dict = self.posting_text_dicts[CREDIT if statement_dict[DB_status] == CREDIT else DEBIT]
+        if statement_dict[DB_posting_text] in posting_text_dict.keys():
+            # contra_account matched posting_text
+            if posting_text_dict[statement_dict[DB_posting_text]] != account:
+                return posting_text_dict[statement_dict[DB_posting_text]]
+        return NOT_ASSIGNED
+
+
+def _select_linked_statements(mariadb, iban, from_date):
+    """
+    returns set of statement keys (entry_date, counter, status) already assigned in ledger
+    """
+    rows = mariadb.select_table(
+        LEDGER_STATEMENT, [DB_entry_date, DB_counter, DB_status],
+        clause=f"{DB_entry_date} >= ?", clause_vars=(from_date,), iban=iban)
+    return set(rows)
+
+
+# downloads of several banks run concurrently (Executing._download_banks):
+# id_no's are allocated from the max id_no per year under this lock
+_id_no_lock = Lock()
+
+
+def _select_max_id_no_per_year(mariadb):
+    """
+    returns dict: key ledger year, value max id_no of ledger year
+    """
+    year_expression = f"{DB_id_no} DIV {ID_NO_YEAR}"
+    rows = mariadb.select_grouped(
+        LEDGER, [year_expression, f"MAX({DB_id_no})"], group_by=year_expression)
+    return {int(year): max_id_no for year, max_id_no in rows}
 
 
 def transfer_statement_to_ledger(mariadb, bank):
     """
     Upload ledger rows from table statement
+
+    Linked statements and contra account data are loaded once.
+    The id_no's are allocated in memory from the max id_no per year while
+    holding _id_no_lock, so concurrent transfers of other banks in this process
+    don't allocate the same id_no's; LEDGER and LEDGER_STATEMENT rows are stored
+    with one bulk insert each.
     """
-    posting_text_credit_dict = mariadb.select_ledger_posting_text_account(
-        bank.iban)
-    posting_text_debit_dict = mariadb.select_ledger_posting_text_account(
-        bank.iban, credit=False)
     ledger_max_entry_date = mariadb.select_scalar(
         LEDGER_STATEMENT, f"MAX({DB_entry_date})", iban=bank.iban)
     if ledger_max_entry_date is None:
@@ -110,7 +185,7 @@ def transfer_statement_to_ledger(mariadb, bank):
     if statements:
         # get ledger account_number assigned to iban of bank-account
         result = mariadb.select_table(
-            LEDGER_COA, [DB_account, DB_name], result_dict=True, portfolio=False, iban=bank.iban
+            LEDGER_COA, [DB_account, DB_name, DB_contra_account], result_dict=True, portfolio=False, iban=bank.iban
             )
         if result:
             account_dict = result[0]
@@ -141,57 +216,63 @@ def transfer_statement_to_ledger(mariadb, bank):
         opening_balance = statements[0][DB_opening_balance]
         if statements[0][DB_opening_status] == DEBIT:
             opening_balance = -opening_balance
-        # check and store statement records in ledger table
-
+        # load lookup data once per account
+        linked_statements = _select_linked_statements(mariadb, bank.iban, ledger_max_entry_date)
+        recommender = ContraAccountRecommender(
+            mariadb, bank.iban, account_dict[DB_account], account_dict[DB_contra_account],
+            ledger_max_entry_date)
+        # check and create ledger records of statements in memory
+        ledger_rows = []
+        ledger_statement_rows = []
         for statement_dict in statements:
-            iban = statement_dict[DB_iban]
             entry_date = statement_dict[DB_entry_date]
             counter = statement_dict[DB_counter]
             status = statement_dict[DB_status]
-            if mariadb.select_exists(LEDGER_STATEMENT, iban=iban, entry_date=entry_date,  counter=counter, status=status):
-                pass  # statement already assigned in ledger
+            if (entry_date, counter, status) in linked_statements:
+                continue  # statement already assigned in ledger
+            # create ledger, id_no is allocated when storing
+            ledger_dict = {}
+            statement_to_ledger_fields = [
+                DB_entry_date,
+                DB_date,
+                DB_purpose_wo_identifier,
+                DB_amount,
+                DB_currency,
+                DB_applicant_name
+            ]
+            for ledger_field_name in statement_to_ledger_fields:
+                ledger_value = statement_dict[ledger_field_name]
+                if ledger_value:
+                    ledger_dict[ledger_field_name] = ledger_value
+            contra_account = recommender.recommend(statement_dict)
+            if statement_dict[DB_status] == CREDIT:
+                ledger_dict[DB_credit_account] = account_dict[DB_account]
+                ledger_dict[DB_debit_account] = contra_account
             else:
-                # create ledger
-                from_id_no = entry_date.year * 1000000
-                to_id_no = (entry_date.year + 1) * 1000000
-                clause = ' '.join(
-                    [DB_id_no, ">", str(from_id_no), 'AND', DB_id_no, "<", str(to_id_no)])
-                max_id_no = mariadb.select_scalar(
-                    LEDGER, f"MAX({DB_id_no})", clause=clause)
-                if max_id_no:
-                    id_no = max_id_no + 1
-                else:
-                    id_no = from_id_no + 1
-                ledger_dict = {DB_id_no: id_no}
-                statement_to_ledger_fields = [
-                    DB_entry_date,
-                    DB_date,
-                    DB_purpose_wo_identifier,
-                    DB_amount,
-                    DB_currency,
-                    DB_applicant_name
-                ]
-                for ledger_field_name in statement_to_ledger_fields:
-                    ledger_value = statement_dict[ledger_field_name]
-                    if ledger_value:
-                        ledger_dict[ledger_field_name] = ledger_value
-                if statement_dict[DB_status] == CREDIT:
-                    ledger_dict[DB_credit_account] = account_dict[DB_account]
-                    ledger_dict[DB_debit_account] = _recommend_account(
-                        mariadb, account_dict[DB_account], statement_dict, posting_text_credit_dict)
-                else:
-                    ledger_dict[DB_debit_account] = account_dict[DB_account]
-                    ledger_dict[DB_credit_account] = _recommend_account(
-                        mariadb, account_dict[DB_account], statement_dict, posting_text_debit_dict)
-                mariadb.execute_insert(LEDGER,  ledger_dict)
-                # connect to ledger_statemnt
-                ledger_statement_dict = {}
-                ledger_statement_dict[DB_iban] = statement_dict[DB_iban]
-                ledger_statement_dict[DB_entry_date] = statement_dict[DB_entry_date]
-                ledger_statement_dict[DB_counter] = statement_dict[DB_counter]
-                ledger_statement_dict[DB_status] = statement_dict[DB_status]
-                ledger_statement_dict[DB_id_no] = id_no
-                mariadb.execute_insert(LEDGER_STATEMENT, ledger_statement_dict)
+                ledger_dict[DB_debit_account] = account_dict[DB_account]
+                ledger_dict[DB_credit_account] = contra_account
+            recommender.add(statement_dict, contra_account)
+            ledger_rows.append(ledger_dict)
+            # connect to ledger_statemnt
+            ledger_statement_rows.append({
+                DB_iban: statement_dict[DB_iban],
+                DB_entry_date: entry_date,
+                DB_counter: counter,
+                DB_status: status
+            })
+            linked_statements.add((entry_date, counter, status))
+        # store ledger and ledger_statement rows
+        if ledger_rows:
+            with _id_no_lock, mariadb.transaction():
+                max_id_no_per_year = _select_max_id_no_per_year(mariadb)
+                for ledger_dict, ledger_statement_dict in zip(ledger_rows, ledger_statement_rows):
+                    year = ledger_statement_dict[DB_entry_date].year
+                    id_no = max_id_no_per_year.get(year, year * ID_NO_YEAR) + 1
+                    max_id_no_per_year[year] = id_no
+                    ledger_dict[DB_id_no] = id_no
+                    ledger_statement_dict[DB_id_no] = id_no
+                mariadb.execute_insert_many(LEDGER, ledger_rows)
+                mariadb.execute_insert_many(LEDGER_STATEMENT, ledger_statement_rows)
         # check balances of LEDGER and STATEMENT table
         period = (ledger_max_entry_date, date(date.today().year, 12, 31))
         # compare balances
@@ -3,20 +3,29 @@ Created on 26.11.2019
 __updated__ = "2026-02-15"
 @author: Wolfgang Kramer
 """
+import numpy as np
 import sqlalchemy
+import hashlib
 import json
+import logging
 import re
 
 
 from decimal import Decimal
 from collections.abc import Sequence
-from pandas import DataFrame
+from pandas import DataFrame, read_sql
 from inspect import stack
-from typing import NamedTuple, Iterable, List, Tuple, Any, Dict, Optional, Union
-from mariadb import connect, Error
-from itertools import chain
-from datetime import date
-from collections import namedtuple
+from typing import NamedTuple, Iterable, Iterator, List, Tuple, Any, Dict, Optional, Union
+from mariadb import connect, ConnectionPool, Error, PoolError
+from itertools import chain, groupby
+from operator import itemgetter
+from bisect import bisect_right
+from datetime import date, timedelta
+from collections import namedtuple, OrderedDict
+from time import perf_counter
+from contextlib import contextmanager
+from copy import deepcopy
+from threading import current_thread, local, main_thread, Lock
 from fints.types import ValueList
 from banking.declarations_mariadb import (
     TABLE_NAMES, TABLE_FIELDS, TABLE_FIELDS_PROPERTIES, DATABASE_FIELDS_PROPERTIES,
@@ -28,7 +37,7 @@ from banking.declarations_mariadb import (
     CREATE_TABLES, HOLDING, ISIN, PRICES, LEDGER, LEDGER_VIEW, LEDGER_COA, LEDGER_STATEMENT,
     SELECTION, SERVER, STATEMENT, SHELVES, TRANSACTION, TRANSACTION_VIEW, DB_credit_account,
     DB_debit_account, DB_bank_reference, DB_closing_balance, DB_closing_status,
-    DB_close
+    DB_close, DB_contra_account
     )
 from banking.declarations import (
     KEY_ACC_OWNER_NAME, KEY_ACC_ALLOWED_TRANSACTIONS, INFORMATION,
@@ -36,10 +45,10 @@ from banking.declarations import (
     COST_LIFO, COST_FIFO, COST_AVERAGE,
     KEY_ACCOUNTS, KEY_ACC_IBAN, KEY_ACC_ACCOUNT_NUMBER,
     KEY_ACC_PRODUCT_NAME, KEY_BANK_NAME, NOT_ASSIGNED,
-    ORIGIN, PERCENT, SCRAPER_BANKDATA, START_DATE_STATEMENTS, TRANSACTION_RECEIPT,
+    PERCENT, SCRAPER_BANKDATA, START_DATE_STATEMENTS, TRANSACTION_RECEIPT,
     TRANSACTION_DELIVERY, WARNING, START_DIALOG_FAILED
     )
-from banking.declarations import TYP_ALPHANUMERIC, TYP_DECIMAL, TYP_DATE, WM_DELETE_WINDOW
+from banking.declarations import TYP_ALPHANUMERIC, TYP_DECIMAL, TYP_DATE
 from banking.message_handler import (
     get_message,
     MESSAGE_TEXT,
@@ -49,19 +58,77 @@ from banking.message_handler import (
 from banking.ledger import transfer_statement_to_ledger
 from banking.utils import (
     application_store, dec2,
-    date_days, date_yyyymmdd, Termination,
+    date_days, date_yyyymmdd, signed_balance, Termination,
     )
 from banking.declarations_mariadb import (
-    HOLDING_VIEW, DB_closing_entry_date,
-    DB_asset_accounting
+    HOLDING_VIEW, DB_closing_entry_date, DB_closing_currency, DB_amount_currency,
+    DB_opening_status, DB_opening_balance, DB_opening_currency, DB_opening_entry_date,
+    DB_updated_at,
+    DB_asset_accounting,
+    ADD_APPLICATION_SCHEMA_VERSION, SCHEMA_MIGRATIONS, SCHEMA_VERSION, SCHEMA_VERSION_ROW_ID,
+    SCHEMA_VERSION_LEDGER_DAILY_BALANCE,
+    ADD_APPLICATION_SCHEMA_FINGERPRINT, DB_schema_fingerprint,
+    DB_schema_version, DB_portfolio, DB_total_amount_portfolio,
+    DB_pieces, DB_acquisition_price, DB_price_currency
     )
 from banking.trading_calendar import xetra_cls, xetra_bday
 
 NAMED_PARAM_RE = re.compile(r":([a-zA-Z_][a-zA-Z0-9_]*)")
+# LEDGER fields changing LEDGER_DAILY_BALANCE
+LEDGER_BALANCE_FIELDS = (DB_entry_date, DB_debit_account, DB_credit_account, DB_amount)
+# tables and views created by CREATE_TABLES
+SCHEMA_OBJECTS = frozenset(
+    re.search(r"IF NOT EXISTS\s+`(\w+)`", statement).group(1).lower() for statement in CREATE_TABLES
+    )
+logger = logging.getLogger(__name__)
+
+
+def schema_fingerprint() -> str:
+    """
+    Return the SHA-256 hex digest of CREATE_TABLES and SCHEMA_MIGRATIONS.
+    """
+    digest = hashlib.sha256()
+    for statement in CREATE_TABLES:
+        digest.update(statement.encode('utf-8'))
+    digest.update(repr(SCHEMA_MIGRATIONS).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PooledConnection:
+    """
+    Connection checked out of the connection pool of MariaDBConnection.
+
+    Returned to the pool by release() or when garbage collected,
+    e.g. with the thread-local storage of a finished thread.
+    """
+
+    def __init__(self, conn):
+
+        self.conn = conn
+        self.conn.autocommit = True
+        self.cursor = self.conn.cursor()
+
+    def release(self):
+
+        if self.conn is not None:
+            self.cursor.close()
+            self.conn.close()  # pooled connection: back to the pool
+            self.conn = None
+            self.cursor = None
+
+    def __del__(self):
+
+        try:
+            self.release()
+        except Error:
+            pass
 
 
 class MariaDBConnection:
 
+    # connections available for threads other than the main thread
+    POOL_SIZE = 8
+
     def __init__(self, user, password, database, host="localhost"):
 
         self.user = user
@@ -71,6 +138,7 @@ class MariaDBConnection:
         self.conn = None
         self.cursor = None
         self.engine = None
+        self.pool = None
 
     def connect(self):
         """
@@ -107,6 +175,7 @@ class MariaDBConnection:
     def _connect_to_database(self):
 
         self._create_engine()
+        self._create_pool()
 
         self.conn = connect(
             host=self.host,
@@ -119,6 +188,32 @@ class MariaDBConnection:
         self.cursor = self.conn.cursor()
         self.cursor.execute("SELECT DATABASE()")
 
+    def _create_pool(self):
+
+        self.pool = ConnectionPool(
+            pool_name=f"{self.database}_{id(self)}",
+            pool_size=self.POOL_SIZE,
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database
+        )
+
+    def checkout(self) -> PooledConnection:
+        """
+        Return a connection of the pool; an unpooled connection if the pool is exhausted.
+        """
+        try:
+            conn = self.pool.get_connection()
+        except PoolError:
+            conn = connect(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database
+            )
+        return PooledConnection(conn)
+
     def _create_engine(self):
 
         credentials = ''.join(
@@ -129,6 +224,260 @@ class MariaDBConnection:
         if self.conn and self.conn.is_connected():
             self.cursor.close()
             self.conn.close()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+
+class BatchStatistics(NamedTuple):
+    """
+    Result of MariaDBExecutor.executemany_batches.
+
+    rowcount: affected rows of all batches
+    batches: (affected rows, seconds) per batch
+    """
+    rowcount: int
+    batches: tuple[tuple[int, float], ...]
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.batches)
+
+
+class BalanceSnapshot(NamedTuple):
+    """
+    Result of MariaDBStatements.select_balance_snapshot.
+
+    statements: {iban: (first, last)} STATEMENT rows of the latest entry_date
+    holdings: {iban: (latest, previous)} HOLDING rows of the two latest price_dates
+    max_price_date: latest price_date of all HOLDING accounts
+    """
+    statements: dict[str, tuple[dict, dict]]
+    holdings: dict[str, tuple[dict, dict]]
+    max_price_date: date | None
+
+
+class SqlCache:
+    """
+    Thread-safe LRU cache of finished SQL texts keyed by query shape.
+    """
+
+    def __init__(self, maxsize: int = 512):
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def statistics(self) -> dict[str, int]:
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+
+class ShelveCache:
+    """
+    Thread-safe cache of decoded SHELVES bankdata per bank code.
+
+    Entries are versioned by column updated_at and validated against
+    the database at most every check_interval seconds.
+    """
+
+    def __init__(self, check_interval: float = 2.0):
+
+        self.check_interval = check_interval
+        self._data: dict[str, tuple[Any, dict]] = {}
+        self._checked = None
+        self._lock = Lock()
+
+    def get(self, code: str) -> dict | None:
+        """Return the cached bankdata of code, None if not cached."""
+        with self._lock:
+            entry = self._data.get(code)
+            return None if entry is None else entry[1]
+
+    def put(self, code: str, updated_at, bankdata: dict) -> None:
+        """Cache bankdata of code stored with version updated_at."""
+        with self._lock:
+            self._data[code] = (updated_at, bankdata)
+
+    def discard(self, code: str) -> None:
+        """Drop the cached bankdata of code."""
+        with self._lock:
+            self._data.pop(code, None)
+
+    def check_due(self) -> bool:
+        """Return True if check_interval has passed since the last full validation."""
+        with self._lock:
+            return self._checked is None or perf_counter() - self._checked >= self.check_interval
+
+    def validate(self, versions: dict[str, Any], codes: Iterable[str] | None = None) -> None:
+        """
+        Drop entries whose updated_at differs from versions {code: updated_at}.
+        codes: entries to validate, all entries if None
+        """
+        with self._lock:
+            for code in list(self._data if codes is None else codes):
+                entry = self._data.get(code)
+                if entry is not None and versions.get(code) != entry[0]:
+                    del self._data[code]
+            if codes is None:
+                self._checked = perf_counter()
+
+
+class CostBasisCheckpoints:
+    """
+    Thread-safe store of cost basis states per (iban, isin_code, cost_method).
+
+    A checkpoint at date d holds the lots (FIFO, LIFO) or the average state
+    after all TRANSACTION rows with price_date < d. Checkpoints are kept
+    in process memory for the session. Writes of TRANSACTION rows through
+    MariaDB drop the checkpoints after the earliest changed price_date;
+    changes of other processes are not seen.
+    """
+
+    def __init__(self, max_checkpoints: int = 32):
+
+        self.max_checkpoints = max_checkpoints
+        self.generation = 0
+        # key: (checkpoint dates ascending, states)
+        self._data: dict[tuple, tuple[list[date], list]] = {}
+        self._lock = Lock()
+
+    def get(self, key: tuple, until_date: date) -> tuple[date | None, Any]:
+        """
+        Return (checkpoint date, copy of state) of the latest checkpoint
+        at or before until_date, or (None, None).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            index = bisect_right(entry[0], until_date) - 1 if entry else -1
+            if index < 0:
+                return None, None
+            return entry[0][index], deepcopy(entry[1][index])
+
+    def put(self, key: tuple, checkpoint_date: date, state, generation: int) -> None:
+        """
+        Store a copy of state as checkpoint of key at checkpoint_date;
+        states computed before an invalidation (older generation) are not stored.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            dates, states = self._data.setdefault(key, ([], []))
+            index = bisect_right(dates, checkpoint_date)
+            if index and dates[index - 1] == checkpoint_date:
+                states[index - 1] = deepcopy(state)
+                return
+            dates.insert(index, checkpoint_date)
+            states.insert(index, deepcopy(state))
+            if len(dates) > self.max_checkpoints:
+                del dates[0], states[0]
+
+    def invalidate(self, changes: dict[tuple, date] | None = None) -> None:
+        """
+        Drop the checkpoints after changed TRANSACTION rows.
+        changes: {(iban, isin_code): earliest changed price_date}, all checkpoints if None
+        """
+        with self._lock:
+            self.generation += 1
+            if changes is None:
+                self._data.clear()
+                return
+            for key, (dates, states) in self._data.items():
+                price_date = changes.get(key[:2])
+                if price_date is not None:
+                    index = bisect_right(dates, price_date)
+                    del dates[index:], states[index:]
+
+
+class ClosePriceIndex:
+    """
+    Thread-safe as-of index of the PRICES close series per symbol.
+
+    A series is loaded once into sorted arrays (price_date, close) and answers
+    "close on or before date D" by binary search for any number of dates.
+    """
+
+    def __init__(self):
+
+        self.generation = 0
+        self._data: dict[str, tuple[np.ndarray, list[Decimal]]] = {}
+        self._lock = Lock()
+
+    def get(self, symbol: str) -> tuple[np.ndarray, list[Decimal]] | None:
+        """Return the loaded series of symbol, None if not loaded."""
+        with self._lock:
+            return self._data.get(symbol)
+
+    def put(self, symbol: str, series: tuple[np.ndarray, list[Decimal]], generation: int) -> None:
+        """
+        Store a series loaded while generation was current;
+        series loaded before an invalidation are not stored.
+        """
+        with self._lock:
+            if generation == self.generation:
+                self._data[symbol] = series
+
+    def invalidate(self, symbols: Iterable[str] | None = None) -> None:
+        """
+        Drop the series of symbols, all series if None.
+        """
+        with self._lock:
+            self.generation += 1
+            if symbols is None:
+                self._data.clear()
+            else:
+                for symbol in symbols:
+                    self._data.pop(symbol, None)
+
+    @staticmethod
+    def as_of(
+        series: tuple[np.ndarray, list[Decimal]],
+        price_dates: Iterable,
+        exact: bool = False
+    ) -> list[Decimal | None]:
+        """
+        Return the close on or before each price_date (on price_date if exact),
+        None if not available.
+        """
+        dates, closes = series
+        keys = np.array([str(price_date)[:10] for price_date in price_dates], dtype='datetime64[D]')
+        indexes = np.searchsorted(dates, keys, side='right') - 1
+        return [
+            None if index < 0 or (exact and dates[index] != key) else closes[index]
+            for key, index in zip(keys, indexes)
+        ]
 
 
 class MariaDBExecutor:
@@ -137,6 +486,11 @@ class MariaDBExecutor:
     GUI independent.
     """
 
+    # bind tuples sent per executemany round trip
+    BATCH_SIZE = 1000
+    # server-side prepared cursors kept per connection
+    PREPARED_CURSORS = 64
+
     SELECT_RE = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
     MODIFY_RE = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.I)
 
@@ -144,6 +498,43 @@ class MariaDBExecutor:
         self._db = db
         self._cursor = db.cursor
         self._conn = db.conn
+        self._in_transaction = False
+        # {account: earliest entry_date} of LEDGER changes of the running transaction
+        self.ledger_changes: dict[str, str] = {}
+        # SQL text -> prepared cursor (LRU)
+        self._prepared: OrderedDict = OrderedDict()
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the statements of a with-block as one transaction.
+
+        COMMIT at the end of the block, ROLLBACK if the block raises.
+        A nested block joins the enclosing transaction.
+
+        Usage:
+            with executor.transaction():
+                ...
+        """
+        if self._in_transaction:
+            yield self
+            return
+        self._cursor.execute("START TRANSACTION")
+        self._in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            self._in_transaction = False
+            self._cursor.execute("ROLLBACK")
+            raise
+        self._in_transaction = False
+        self._cursor.execute("COMMIT")
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._in_transaction
 
     def execute(
         self,
@@ -152,7 +543,8 @@ class MariaDBExecutor:
         *,
         duplicate: bool = False,
         result_dict: bool = False,
-        compress: bool = False
+        compress: bool = False,
+        prepared: bool = False
     ):
         """
         Execute SQL statement.
@@ -163,6 +555,8 @@ class MariaDBExecutor:
             duplicate: ignore duplicate key error (1062)
             result_dict: return list of dicts instead of tuples
             compress: normalize whitespace in SQL
+            prepared: SELECT with bind parameters runs on a server-side prepared
+                      cursor reused for the same SQL text (parsed once per connection)
 
         Returns:
             SELECT/WITH   -> list[tuple] | list[dict]
@@ -173,6 +567,11 @@ class MariaDBExecutor:
 
         try:
             # print(sql, vars_)
+            if prepared and vars_ and self._is_select(sql):
+                cursor = self._prepared_cursor(sql)
+                cursor.execute(sql, vars_)
+                return self._fetch(result_dict, cursor)
+
             self._execute(sql, vars_)
 
             if self._is_select(sql):
@@ -189,6 +588,48 @@ class MariaDBExecutor:
             exc.params = vars_
             raise
 
+    def executemany(self, sql: str, seq_vars: Sequence[tuple]) -> int:
+        """
+        Execute one INSERT/UPDATE/DELETE/REPLACE statement for a sequence of bind tuples.
+
+        The tuples are sent in batches of BATCH_SIZE, one client/server round trip each;
+        executemany_batches returns the timing per batch.
+
+        Returns:
+            affected row count of all batches
+        """
+        return self.executemany_batches(sql, seq_vars).rowcount
+
+    def executemany_batches(
+        self,
+        sql: str,
+        seq_vars: Sequence[tuple],
+        batch_size: int | None = None
+    ) -> BatchStatistics:
+        """
+        Execute one INSERT/UPDATE/DELETE/REPLACE statement for a sequence of bind tuples
+        in batches of batch_size (default BATCH_SIZE).
+
+        Returns:
+            BatchStatistics: aggregate affected row count and (rows, seconds) per batch
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        batches = []
+        for start in range(0, len(seq_vars), batch_size):
+            batch = seq_vars[start:start + batch_size]
+            started = perf_counter()
+            try:
+                self._cursor.executemany(sql, batch)
+            except Exception as exc:
+                exc.statement = sql
+                exc.params = batch
+                raise
+            batches.append((self._cursor.rowcount, perf_counter() - started))
+        return BatchStatistics(
+            rowcount=sum(rows for rows, _ in batches),
+            batches=tuple(batches)
+        )
+
     # ---------- helpers ----------
 
     def _prepare_sql(self, sql: str, compress: bool) -> str:
@@ -208,16 +649,31 @@ class MariaDBExecutor:
     def _is_modify(self, sql: str) -> bool:
         return bool(self.MODIFY_RE.match(sql))
 
-    def _fetch(self, result_dict: bool):
-        rows = self._cursor.fetchall()
+    def _fetch(self, result_dict: bool, cursor=None):
+        cursor = cursor or self._cursor
+        rows = cursor.fetchall()
         if not result_dict:
             return rows
-        columns = [c[0] for c in self._cursor.description]
+        columns = [c[0] for c in cursor.description]
         return [dict(zip(columns, row)) for row in rows]
 
+    def _prepared_cursor(self, sql: str):
+        cursor = self._prepared.get(sql)
+        if cursor is not None:
+            self._prepared.move_to_end(sql)
+            self.prepared_hits += 1
+            return cursor
+        self.prepared_misses += 1
+        cursor = self._conn.cursor(prepared=True)
+        self._prepared[sql] = cursor
+        if len(self._prepared) > self.PREPARED_CURSORS:
+            _, evicted = self._prepared.popitem(last=False)
+            evicted.close()
+        return cursor
+
     def _row_count(self) -> int:
-        self._cursor.execute('SELECT ROW_COUNT()')
-        return self._cursor.fetchone()[0]
+        # affected rows reported by the server with the OK packet, no extra round trip
+        return self._cursor.rowcount
 
 
 class DatabaseErrorHandler:
@@ -373,12 +829,18 @@ class MariaDBInitializer:
         self._initialized = True
 
         # --- Context / infrastructure ---------------------------------------
+        started = perf_counter()
         self.context = MariaDBContext(
             user=user,
             password=password,
             database=database,
             host=host
         )
+        # durations in seconds of the startup phases
+        self.startup_timing: dict[str, float] = {'connection': perf_counter() - started}
+        self.schema_unchanged = False
+        # SCHEMA_MIGRATIONS versions applied at this startup
+        self.schema_migrations_applied: list[int] = []
 
         # Backward compatibility
         self.conn = self.context.conn
@@ -395,12 +857,111 @@ class MariaDBInitializer:
 
         self._initialize_database()
         self._init_database_info()
+        if SCHEMA_VERSION_LEDGER_DAILY_BALANCE in self.schema_migrations_applied:
+            started = perf_counter()
+            self.ledger_daily_balance_rebuild()
+            self.startup_timing['ledger_daily_balance'] = perf_counter() - started
+        logger.info(self.startup_timing_report())
+
+    # SQL executors of threads other than the main thread
+    _thread_local = local()
+
+    @property
+    def executor(self) -> MariaDBExecutor:
+        """
+        SQL executor of the current thread.
+
+        The main thread uses the main connection. Any other thread checks out
+        a connection of the pool on first use; it is returned to the pool
+        when the thread ends or its worker_connection block exits.
+        """
+        executor = getattr(self._thread_local, 'executor', None)
+        if executor is not None:
+            return executor
+        if current_thread() is main_thread():
+            return self._executor
+        pooled = self.context.connection.checkout()
+        self._thread_local.pooled = pooled
+        self._thread_local.executor = MariaDBExecutor(pooled)
+        return self._thread_local.executor
+
+    @executor.setter
+    def executor(self, executor: MariaDBExecutor) -> None:
+        self._executor = executor
+
+    @contextmanager
+    def worker_connection(self):
+        """
+        Bind a pooled database connection to the current thread.
+
+        All SQL executed by the thread through the executor uses this connection,
+        so worker threads (e.g. concurrent bank downloads) neither share the cursor
+        nor the transaction state of the main connection.
+        The connection is returned to the pool when the block exits.
+
+        Usage
+        -----
+        with mariadb.worker_connection():
+            mariadb.all_accounts(bank)
+        """
+        previous = (
+            getattr(self._thread_local, 'pooled', None),
+            getattr(self._thread_local, 'executor', None)
+        )
+        pooled = self.context.connection.checkout()
+        self._thread_local.pooled = pooled
+        self._thread_local.executor = MariaDBExecutor(pooled)
+        try:
+            yield pooled
+        finally:
+            self._thread_local.pooled, self._thread_local.executor = previous
+            pooled.release()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager running a with-block as one transaction
+        on the connection of the current thread (see MariaDBExecutor.transaction).
+
+        LEDGER changes of the block update LEDGER_DAILY_BALANCE once, before COMMIT.
+
+        Usage
+        -----
+        with mariadb.transaction():
+            mariadb.execute_insert_many(...)
+        """
+        executor = self.executor
+        if executor.in_transaction:
+            yield executor
+            return
+        with executor.transaction():
+            try:
+                yield executor
+                if executor.ledger_changes:
+                    self.ledger_daily_balance_refresh(executor.ledger_changes)
+            finally:
+                executor.ledger_changes = {}
+
+    def startup_timing_report(self) -> str:
+        """Return the durations of the startup phases as message text."""
+        phases = ', '.join(
+            f'{phase} {seconds * 1000:.0f} ms' for phase, seconds in self.startup_timing.items()
+            )
+        return get_message(
+            MESSAGE_TEXT, 'MARIADB_STARTUP', self.host, self.database,
+            sum(self.startup_timing.values()) * 1000, phases,
+            'unchanged' if self.schema_unchanged else 'created/updated'
+            )
 
     def _initialize_database(self) -> None:
         """Create database, connect, and initialize tables/views."""
         try:
+            started = perf_counter()
             self._create_database_if_missing()
+            self.startup_timing['database'] = perf_counter() - started
+            started = perf_counter()
             self._create_tables_and_views()
+            self.startup_timing['schema'] = perf_counter() - started
         except Error as exc:
             DatabaseErrorHandler.handle_error(self.database, Informations.BANKDATA_INFORMATIONS, exc)
 
@@ -426,12 +987,77 @@ class MariaDBInitializer:
                     self.DATABASES.append(db_name)
 
     def _create_tables_and_views(self) -> None:
-        """Create tables and update views if necessary."""
+        """
+        Create tables and update views if necessary.
+
+        Skipped if the schema fingerprint stored in table APPLICATION matches
+        CREATE_TABLES and SCHEMA_MIGRATIONS and all tables and views exist.
+        """
+        fingerprint = schema_fingerprint()
+        if self._schema_is_current(fingerprint):
+            self.schema_unchanged = True
+            return
         for statement in CREATE_TABLES:
             self.cursor.execute(statement)
             if statement.startswith('CREATE ALGORITHM'):
                 alter_stmt = statement.replace('CREATE ALGORITHM', 'ALTER ALGORITHM').replace('IF NOT EXISTS', '')
                 self.cursor.execute(alter_stmt)
+        self._migrate_schema()
+        self.cursor.execute(ADD_APPLICATION_SCHEMA_FINGERPRINT)
+        self.cursor.execute(
+            f"INSERT INTO {APPLICATION} ({DB_row_id}, {DB_schema_fingerprint}) VALUES (?, ?) "
+            f"ON DUPLICATE KEY UPDATE {DB_schema_fingerprint} = VALUES({DB_schema_fingerprint})",
+            (SCHEMA_VERSION_ROW_ID, fingerprint)
+        )
+
+    def _schema_is_current(self, fingerprint: str) -> bool:
+        """
+        True if the stored schema fingerprint equals `fingerprint`
+        and no table or view of CREATE_TABLES is missing.
+        """
+        try:
+            self.cursor.execute(
+                f"SELECT {DB_schema_fingerprint} FROM {APPLICATION} WHERE {DB_row_id} = ?",
+                (SCHEMA_VERSION_ROW_ID,)
+            )
+            row = self.cursor.fetchone()
+        except Error:
+            return False  # table APPLICATION or column schema_fingerprint missing
+        if not row or row[0] != fingerprint:
+            return False
+        self.cursor.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()"
+        )
+        existing = {table_name.lower() for (table_name,) in self.cursor.fetchall()}
+        return SCHEMA_OBJECTS <= existing
+
+    def _migrate_schema(self) -> None:
+        """
+        Apply pending SCHEMA_MIGRATIONS to an existing database.
+
+        The applied schema version is stored in table APPLICATION (row_id 3),
+        so each migration runs only once.
+        """
+        self.cursor.execute(ADD_APPLICATION_SCHEMA_VERSION)
+        self.cursor.execute(
+            f"SELECT {DB_schema_version} FROM {APPLICATION} WHERE {DB_row_id} = ?",
+            (SCHEMA_VERSION_ROW_ID,)
+        )
+        row = self.cursor.fetchone()
+        schema_version = row[0] if row and row[0] else 0
+        if schema_version >= SCHEMA_VERSION:
+            return
+        for version, statements in SCHEMA_MIGRATIONS:
+            if version <= schema_version:
+                continue
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.schema_migrations_applied.append(version)
+            self.cursor.execute(
+                f"INSERT INTO {APPLICATION} ({DB_row_id}, {DB_schema_version}) VALUES (?, ?) "
+                f"ON DUPLICATE KEY UPDATE {DB_schema_version} = VALUES({DB_schema_version})",
+                (SCHEMA_VERSION_ROW_ID, version)
+            )
 
     def _create_engine(self):
         """Create and return a SQLAlchemy engine."""
@@ -454,19 +1080,12 @@ class MariaDBInitializer:
         - TABLE_FIELDS_PROPERTIES
         - DATABASE_FIELDS_PROPERTIES
         """
-        self._load_table_names()
+        started = perf_counter()
         self._load_column_metadata()
-
-    def _load_table_names(self) -> None:
-        """Load all table names from the current schema."""
-        sql = (
-            'SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE();'
-            )
-        self.table_names = list(chain(*self.executor.execute(sql)))
-        TABLE_NAMES[:] = self.table_names
+        self.startup_timing['metadata'] = perf_counter() - started
 
     def _load_column_metadata(self) -> None:
-        """Load column properties for all tables."""
+        """Load table names and column properties of all tables with one query."""
         columns = [
             'column_name',
             'character_maximum_length',
@@ -476,18 +1095,21 @@ class MariaDBInitializer:
             'column_comment'
             ]
         Column = namedtuple('Column', columns)
-        for table in self.table_names:
-            sql = (
-                f"SELECT {','.join(columns)} FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = '{table}' ORDER BY ordinal_position;"
-                )
-            result = self.executor.execute(sql)
+        sql = (
+            f"SELECT table_name, {','.join(columns)} FROM information_schema.columns WHERE table_schema = DATABASE() ORDER BY table_name, ordinal_position;"
+            )
+        table_names = []
+        for table, rows in groupby(self.executor.execute(sql), key=itemgetter(0)):
             field_properties = {}
-            for row in result:
-                column = Column(*row)
+            for row in rows:
+                column = Column(*row[1:])
                 field_properties[column.column_name] = self._build_field_property(column)
+            table_names.append(table)
             TABLE_FIELDS[table] = list(field_properties.keys())
             TABLE_FIELDS_PROPERTIES[table] = field_properties
             DATABASE_FIELDS_PROPERTIES.update(field_properties)
+        self.table_names = table_names
+        TABLE_NAMES[:] = table_names
 
     def _build_field_property(self, column):
         """Create a FieldsProperty instance for a column."""
@@ -538,6 +1160,22 @@ class MariaDBInitializer:
 
 
 class MariaDBTables:
+
+    # finished SQL texts of _select and _select_cte per query shape
+    _sql_cache = SqlCache()
+
+    def sql_cache_statistics(self) -> dict[str, Any]:
+        """
+        Return statistics of the SQL text cache and of the prepared cursors
+        of the current thread's connection.
+        """
+        statistics = self._sql_cache.statistics()
+        statistics.update({
+            'prepared_hits': self.executor.prepared_hits,
+            'prepared_misses': self.executor.prepared_misses,
+        })
+        return statistics
+
     # ------------------------------------------------------------------
     # Core QueryBuilder helpers
     # ------------------------------------------------------------------
@@ -601,6 +1239,41 @@ class MariaDBTables:
 
         return "WHERE " + " AND ".join(sql_parts) + " ", tuple(vars_)
 
+    def _where_vars(self, *, clause_vars: Sequence[Any] = (), **kwargs) -> tuple[Any, ...]:
+        """
+        Return the bind variables of _where_clause without building the SQL text.
+        """
+        vars_: list[Any] = []
+        for key, value in kwargs.items():
+            if isinstance(value, date):
+                value = date_days.convert_to_str(value)
+            if key == "period":
+                vars_.extend(map(date_days.convert_to_str, value))
+            elif isinstance(value, (list, tuple)):
+                vars_.extend(value)
+            else:
+                vars_.append(value)
+        vars_.extend(clause_vars)
+        return tuple(vars_)
+
+    def _where_shape(self, kwargs: dict) -> tuple:
+        """
+        Return the part of kwargs determining the WHERE clause text:
+        filter keys, and the number of values of IN filters.
+        """
+        return tuple(
+            (key, len(value)) if key != "period" and isinstance(value, (list, tuple)) else key
+            for key, value in kwargs.items()
+        )
+
+    def _freeze(self, value):
+        """
+        Return a hashable version of fields/order/group_by arguments.
+        """
+        if isinstance(value, (list, tuple)):
+            return tuple(self._freeze(item) for item in value)
+        return value
+
     def _normalize_fields(
         self,
         fields: str | Iterable[str]
@@ -638,27 +1311,6 @@ class MariaDBTables:
             return tuple(vars_.values())
         raise TypeError(f"Unsupported vars type: {type(vars_)}")
 
-    def _normalize_named_sql(self, sql: str, vars_: dict):
-        """
-        Replace :named parameters with ? placeholders
-        and return ordered tuple of bind variables.
-        """
-        if not vars_:
-            return sql, ()
-
-        order = []
-
-        def repl(match):
-            key = match.group(1)
-            if key not in vars_:
-                raise KeyError(f"Missing SQL bind parameter: {key}")
-            order.append(key)
-            return "?"
-
-        sql = NAMED_PARAM_RE.sub(repl, sql)
-        values = tuple(vars_[k] for k in order)
-        return sql, values
-
     # ------------------------------------------------------------------
     # Generic SELECT methods
     # ------------------------------------------------------------------
@@ -735,6 +1387,110 @@ class MariaDBTables:
         if not fields:
             return []
 
+        sql, vars_ = self._select_sql(
+            table=table,
+            fields=fields,
+            distinct=distinct,
+            clause=clause,
+            clause_vars=clause_vars,
+            date_name=date_name,
+            order=order,
+            sort=sort,
+            group_by=group_by,
+            having=having,
+            having_vars=having_vars,
+            limit=limit,
+            **kwargs
+        )
+
+        # ------------------------------------------------------------
+        # Execute query
+        # ------------------------------------------------------------
+        return self.executor.execute(
+            sql,
+            vars_=vars_,
+            result_dict=result_dict,
+            prepared=True
+        )
+
+    def _select_sql(
+        self,
+        *,
+        table: str,
+        fields: str | list[str] | tuple[str, ...],
+        distinct: bool = False,
+        clause: str | None = None,
+        clause_vars: tuple = (),
+        date_name: str | None = None,
+        order: str | list[str] | tuple | list[tuple] | None = None,
+        sort: str = "ASC",
+        group_by: str | list[str] | None = None,
+        having: str | None = None,
+        having_vars: tuple = (),
+        limit: int | None = None,
+        **kwargs
+    ) -> tuple[str, tuple]:
+        """
+        Build the SELECT statement and bind variables of `_select()`.
+
+        Returns
+        -------
+        tuple[str, tuple]
+            SQL statement and positional bind variables.
+        """
+        # ------------------------------------------------------------
+        # SQL text cache: identical query shapes produce identical SQL
+        # ------------------------------------------------------------
+        shape = (
+            table, self._freeze(fields), distinct, clause, date_name,
+            self._where_shape(kwargs), self._freeze(order), sort,
+            self._freeze(group_by), having, limit
+        )
+        sql = self._sql_cache.get(shape)
+        if sql is not None:
+            vars_ = self._where_vars(clause_vars=clause_vars, **kwargs)
+            if having:
+                vars_ += tuple(having_vars)
+            return sql, vars_
+        sql, vars_ = self._build_select_sql(
+            table=table,
+            fields=fields,
+            distinct=distinct,
+            clause=clause,
+            clause_vars=clause_vars,
+            date_name=date_name,
+            order=order,
+            sort=sort,
+            group_by=group_by,
+            having=having,
+            having_vars=having_vars,
+            limit=limit,
+            **kwargs
+        )
+        self._sql_cache.put(shape, sql)
+        return sql, vars_
+
+    def _build_select_sql(
+        self,
+        *,
+        table: str,
+        fields: str | list[str] | tuple[str, ...],
+        distinct: bool = False,
+        clause: str | None = None,
+        clause_vars: tuple = (),
+        date_name: str | None = None,
+        order: str | list[str] | tuple | list[tuple] | None = None,
+        sort: str = "ASC",
+        group_by: str | list[str] | None = None,
+        having: str | None = None,
+        having_vars: tuple = (),
+        limit: int | None = None,
+        **kwargs
+    ) -> tuple[str, tuple]:
+        """
+        Build the SELECT statement and bind variables (uncached).
+        """
+
         # ------------------------------------------------------------
         # Normalize SELECT fields
         # ------------------------------------------------------------
@@ -787,14 +1543,7 @@ class MariaDBTables:
         if limit is not None:
             sql += f" LIMIT {limit} "
 
-        # ------------------------------------------------------------
-        # Execute query
-        # ------------------------------------------------------------
-        return self.executor.execute(
-            sql,
-            vars_=vars_,
-            result_dict=result_dict
-        )
+        return sql, vars_
 
     def _select_scalar(
         self,
@@ -924,47 +1673,138 @@ class MariaDBTables:
         """
         if not fields:
             fields = '*'
+        # SQL text cache: compressed statement and order of named parameters
+        shape = ('cte', sql, self._freeze(fields), isinstance(vars_, dict) and bool(vars_))
+        cached = self._sql_cache.get(shape)
+        if cached is None:
+            param_names = NAMED_PARAM_RE.findall(sql)
+            if isinstance(vars_, dict) and vars_:
+                sql = NAMED_PARAM_RE.sub("?", sql)
+            fields_sql = self._normalize_fields(fields)
+            final_sql = self.executor._prepare_sql(
+                f"""
+                SELECT {fields_sql}
+                FROM (
+                    {sql}
+                ) AS cte
+                """,
+                compress=True
+            )
+            cached = (final_sql, tuple(param_names))
+            self._sql_cache.put(shape, cached)
+        final_sql, param_names = cached
         if isinstance(vars_, dict):
-            sql, vars_ = self._normalize_named_sql(sql, vars_)
+            if vars_:
+                missing = [name for name in param_names if name not in vars_]
+                if missing:
+                    raise KeyError(f"Missing SQL bind parameter: {missing[0]}")
+                vars_ = tuple(vars_[name] for name in param_names)
+            else:
+                vars_ = ()
         else:
             vars_ = self._normalize_vars(vars_)
 
-        fields_sql = self._normalize_fields(fields)
-
-        final_sql = f"""
-            SELECT {fields_sql}
-            FROM (
-                {sql}
-            ) AS cte
-        """
         return self.executor.execute(
             final_sql,
             vars_=vars_,
             result_dict=result_dict,
-            compress=True
+            prepared=True
+        )
+
+    def select_table(
+        self,
+        table: str,
+        field_list,
+        *,
+        order=None,
+        sort: str = "ASC",
+        result_dict: bool = False,
+        date_name: str | None = None,
+        **kwargs
+    ):
+        """Select rows from a table."""
+        return self._select(
+            table=table,
+            fields=field_list,
+            order=order,
+            sort=sort,
+            date_name=date_name,
+            result_dict=result_dict,
+            **kwargs
         )
 
-    def select_table(
+    def select_frame(
         self,
         table: str,
         field_list,
         *,
         order=None,
         sort: str = "ASC",
-        result_dict: bool = False,
         date_name: str | None = None,
+        clause: str | None = None,
+        clause_vars: tuple = (),
+        coerce_float: bool = True,
+        parse_dates: list[str] | None = None,
+        dtype: dict | None = None,
+        chunksize: int | None = None,
         **kwargs
-    ):
-        """Select rows from a table."""
-        return self._select(
+    ) -> DataFrame | Iterator[DataFrame]:
+        """
+        Select rows from a table directly into a pandas DataFrame.
+
+        Rows are read through the SQLAlchemy engine into DataFrame columns
+        without building intermediate lists of tuples or dictionaries.
+        Filters are the same as for select_table.
+
+        Parameters
+        ----------
+        table : str
+            Name of the database table or view.
+        field_list : str | list[str]
+            Fields to select.
+        coerce_float : bool, optional
+            If True, DECIMAL columns are converted to float64 columns,
+            if False they keep Decimal values (object columns).
+        parse_dates : list[str] | None, optional
+            Columns converted to datetime64 columns.
+        dtype : dict | None, optional
+            Column data types, e.g. {DB_pieces: 'float64'}.
+        chunksize : int | None, optional
+            If set, an iterator of DataFrames with up to chunksize rows is returned;
+            rows are streamed from the server instead of being fetched at once.
+
+        Returns
+        -------
+        DataFrame | Iterator[DataFrame]
+            Empty DataFrame (with the selected columns) if no rows are found.
+        """
+        sql, vars_ = self._select_sql(
             table=table,
             fields=field_list,
             order=order,
             sort=sort,
             date_name=date_name,
-            result_dict=result_dict,
+            clause=clause,
+            clause_vars=clause_vars,
             **kwargs
         )
+        read_kwargs = dict(
+            params=vars_ or None,
+            coerce_float=coerce_float,
+            parse_dates=parse_dates,
+            dtype=dtype
+        )
+        if chunksize is None:
+            return read_sql(sql, con=self.engine, **read_kwargs)
+        return self._select_frame_chunks(sql, chunksize, read_kwargs)
+
+    def _select_frame_chunks(self, sql: str, chunksize: int, read_kwargs: dict) -> Iterator[DataFrame]:
+        """
+        Stream the result of sql in DataFrame chunks over a server-side cursor.
+        """
+        with self.engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            yield from read_sql(sql, con=connection, chunksize=chunksize, **read_kwargs)
 
     def select_table_distinct(
         self,
@@ -1330,15 +2170,145 @@ class MariaDBTables:
         placeholders = ', '.join('?' for _ in field_dict)
         sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
         self.executor.execute(sql, vars_=tuple(field_dict.values()))
+        if table == LEDGER:
+            self._ledger_daily_balance_changed(self._ledger_changes([field_dict]))
+        elif table == PRICES:
+            self.invalidate_close_prices(self._prices_changes([field_dict]))
+        elif table == TRANSACTION:
+            self.invalidate_cost_basis_checkpoints(self._transaction_changes([field_dict]))
+
+    def execute_insert_many(
+        self,
+        table: str,
+        field_dicts: Iterable[dict],
+        *,
+        ignore: bool = False
+    ) -> int:
+        """
+        Insert many records into a table with multi-row executemany calls.
+
+        Records are grouped by their column set, so each group is sent
+        as one batch. Columns missing in a record keep their table defaults.
+
+        Parameters
+        ----------
+        table : str
+            Name of the database table.
+        field_dicts : Iterable[dict]
+            Records to insert.
+        ignore : bool, optional
+            If True, generate INSERT IGNORE (duplicate keys are skipped).
+
+        Returns
+        -------
+        int
+            Number of inserted rows.
+        """
+        field_dicts = list(field_dicts)
+        inserted = self._execute_many("INSERT IGNORE" if ignore else "INSERT", table, field_dicts)
+        if table == LEDGER:
+            self._ledger_daily_balance_changed(self._ledger_changes(field_dicts))
+        elif table == PRICES:
+            self.invalidate_close_prices(self._prices_changes(field_dicts))
+        elif table == TRANSACTION:
+            self.invalidate_cost_basis_checkpoints(self._transaction_changes(field_dicts))
+        return inserted
+
+    def execute_replace_many(self, table: str, field_dicts: Iterable[dict]) -> int:
+        """
+        Insert/Change many records with multi-row REPLACE executemany calls.
+
+        Parameters
+        ----------
+        table : str
+            Name of the database table.
+        field_dicts : Iterable[dict]
+            Records to insert or replace.
+
+        Returns
+        -------
+        int
+            Number of affected rows (replaced rows count twice).
+        """
+        if table == LEDGER:
+            raise ValueError("REPLACE is not supported for LEDGER, use execute_insert_many/execute_update")
+        field_dicts = list(field_dicts)
+        affected = self._execute_many("REPLACE", table, field_dicts)
+        if table == PRICES:
+            self.invalidate_close_prices(self._prices_changes(field_dicts))
+        elif table == TRANSACTION:
+            self.invalidate_cost_basis_checkpoints(self._transaction_changes(field_dicts))
+        return affected
+
+    def _prices_changes(self, field_dicts: list[dict], filters: dict | None = None) -> list[str] | None:
+        """
+        Return the symbols of changed PRICES rows, None if not known (all symbols).
+
+        field_dicts are written values, filters the WHERE filters of an UPDATE/DELETE.
+        """
+        if filters is not None:
+            symbols = filters.get(DB_symbol)
+            if symbols is None or any(DB_symbol in field_dict for field_dict in field_dicts):
+                return None
+            return list(symbols) if isinstance(symbols, (list, tuple)) else [symbols]
+        symbols = [field_dict.get(DB_symbol) for field_dict in field_dicts]
+        return None if None in symbols else symbols
+
+    def _transaction_changes(self, field_dicts: list[dict], filters: dict | None = None) -> dict | None:
+        """
+        Return {(iban, isin_code): earliest price_date} of changed TRANSACTION rows,
+        None if not known (all rows).
+
+        field_dicts are written values, filters the WHERE filters of an UPDATE/DELETE.
+        """
+        keys = (DB_iban, DB_ISIN, DB_price_date)
+        if filters is not None:
+            if any(key in field_dict for field_dict in field_dicts for key in keys):
+                return None
+            field_dicts = [filters]
+        changes = {}
+        for field_dict in field_dicts:
+            iban, isin_code, price_date = (field_dict.get(key) for key in keys)
+            if not all(isinstance(value, (str, date)) for value in (iban, isin_code, price_date)):
+                return None
+            price_date = self._as_date(price_date)
+            if changes.get((iban, isin_code), price_date) >= price_date:
+                changes[(iban, isin_code)] = price_date
+        return changes
+
+    def _execute_many(self, statement: str, table: str, field_dicts: Iterable[dict]) -> int:
+        """
+        Execute INSERT/REPLACE for records grouped by their column set,
+        each group sent as one batch. Columns missing in a record keep their table defaults.
+        """
+        batches: dict[tuple, list[tuple]] = {}
+        for field_dict in field_dicts:
+            batches.setdefault(tuple(field_dict.keys()), []).append(tuple(field_dict.values()))
+
+        affected = 0
+        for columns, seq_vars in batches.items():
+            placeholders = ', '.join('?' for _ in columns)
+            sql = f"{statement} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+            affected += self.executor.executemany(sql, seq_vars)
+        return affected
 
     def execute_update(self, table: str, field_dict: dict, **kwargs) -> None:
         """Update rows in a table."""
+        ledger_rows = None
+        if table == LEDGER and set(LEDGER_BALANCE_FIELDS) & field_dict.keys():
+            ledger_rows = self._select_ledger_changes(**kwargs)
         set_clause = ', '.join(f"{k}=?" for k in field_dict)
         sql = f"UPDATE {table} SET {set_clause} "
         where_sql, vars_where = self._where_clause(**kwargs)
         sql += where_sql
         vars_ = tuple(field_dict.values()) + vars_where
         self.executor.execute(sql, vars_=vars_)
+        if ledger_rows:
+            self._ledger_daily_balance_changed(self._ledger_changes(ledger_rows, field_dict))
+        elif table == PRICES:
+            self.invalidate_close_prices(self._prices_changes([field_dict], filters=kwargs))
+        elif table == TRANSACTION:
+            self.invalidate_cost_basis_checkpoints(self._transaction_changes([field_dict], filters=kwargs))
 
     def execute_replace(self, table, field_dict):
         """
@@ -1354,6 +2324,10 @@ class MariaDBTables:
         sql_statement = 'REPLACE INTO ' + table + set_fields
         sql_statement = sql_statement[:-2]
         self.executor.execute(sql_statement, vars_=vars_)
+        if table == PRICES:
+            self.invalidate_close_prices(self._prices_changes([field_dict]))
+        elif table == TRANSACTION:
+            self.invalidate_cost_basis_checkpoints(self._transaction_changes([field_dict]))
 
     def execute_delete(
         self,
@@ -1364,6 +2338,9 @@ class MariaDBTables:
         **kwargs
     ) -> None:
         """Delete rows from a table."""
+        ledger_rows = None
+        if table == LEDGER:
+            ledger_rows = self._select_ledger_changes(clause=clause, clause_vars=clause_vars, **kwargs)
         where_sql, vars_ = self._where_clause(
             clause=clause,
             clause_vars=clause_vars,
@@ -1373,6 +2350,14 @@ class MariaDBTables:
         sql = f"DELETE FROM {table} {where_sql}"
 
         self.executor.execute(sql, vars_)
+        if ledger_rows:
+            self._ledger_daily_balance_changed(self._ledger_changes(ledger_rows))
+        elif table == PRICES:
+            self.invalidate_close_prices(
+                None if clause else self._prices_changes([], filters=kwargs))
+        elif table == TRANSACTION:
+            self.invalidate_cost_basis_checkpoints(
+                None if clause else self._transaction_changes([], filters=kwargs))
 
 
 class MariaDBLedger:
@@ -1661,8 +2646,8 @@ class MariaDBLedger:
         from_date, to_date = period
         account = account_dict[DB_account]
 
-        balance = self.select_table(LEDGER_DAILY_BALANCE, DB_balance, account=account, entry_date=to_date)
-        if balance:
+        balance = self.select_ledger_daily_balance(account, to_date)
+        if balance is not None:
             return balance
 
         # Resolve IBAN (if available)
@@ -1769,6 +2754,158 @@ class MariaDBLedger:
 
         return balance
 
+    def select_ledger_balance_matrix(
+        self,
+        asset_accounts: List[Dict[str, Any]],
+        opening_balance_account: str,
+        from_date: date | str,
+        to_date: date | str,
+    ) -> Dict[date, Dict[str, Optional[Decimal]]]:
+        """
+        Determine the balances of asset accounts for all workdays of a period.
+
+        Each balance source is read with one query and carried forward in one pass,
+        replacing the lookups per account and day:
+        - portfolio accounts: total_amount_portfolio at the latest price date of HOLDING
+        - IBAN accounts: closing balance of the latest statement
+        - other accounts, or IBAN accounts without statements: ledger balance
+          starting with the latest opening balance booking
+
+        Parameters
+        ----------
+        asset_accounts : List[Dict[str, Any]]
+            LEDGER_COA rows containing DB_account, DB_iban and DB_portfolio.
+        opening_balance_account : str
+            Ledger account used for opening balance postings.
+        from_date, to_date : date | str
+            Period, format YYYY-MM-DD.
+
+        Returns
+        -------
+        Dict[date, Dict[str, Optional[Decimal]]]
+            key: workday, value: {account: balance}.
+            Balance is None if no source provides a balance at that day.
+        """
+        workdays = list(date_days.iter_workdays(from_date, to_date))
+        if not workdays or not asset_accounts:
+            return {}
+        from_date = date_days.convert_to_str(workdays[0])
+        to_date = date_days.convert_to_str(workdays[-1])
+
+        portfolio_dates, portfolio_balances = self._select_portfolio_balance_series(from_date, to_date)
+        statement_ibans = [
+            account_dict[DB_iban] for account_dict in asset_accounts
+            if not account_dict[DB_portfolio] and account_dict[DB_iban] != NOT_ASSIGNED
+        ]
+        statement_series = self._select_statement_balance_series(statement_ibans, from_date, to_date)
+        ledger_accounts = [
+            account_dict[DB_account] for account_dict in asset_accounts if not account_dict[DB_portfolio]
+        ]
+        ledger_series = {}
+        if ledger_accounts:
+            postings = self._ledger_daily_balance_postings(ledger_accounts)
+            for account in ledger_accounts:
+                rows = self._ledger_daily_balance_rows(account, postings[account], opening_balance_account)
+                ledger_series[account] = (
+                    [row[DB_entry_date] for row in rows],
+                    [row[DB_balance] for row in rows]
+                )
+
+        def as_of(series: tuple[list, list] | None, day: date) -> Optional[Any]:
+            if not series:
+                return None
+            index = bisect_right(series[0], day)
+            return series[1][index - 1] if index else None
+
+        matrix = {}
+        for day in workdays:
+            balances = {}
+            price_date = as_of((portfolio_dates, portfolio_dates), day)
+            for account_dict in asset_accounts:
+                account = account_dict[DB_account]
+                if account_dict[DB_portfolio]:
+                    balance = None
+                    if price_date:
+                        balance = portfolio_balances.get((account_dict[DB_iban], price_date), 0)
+                else:
+                    balance = as_of(statement_series.get(account_dict[DB_iban]), day)
+                    if balance is None:
+                        balance = as_of(ledger_series.get(account), day)
+                balances[account] = balance
+            matrix[day] = balances
+        return matrix
+
+    def _select_portfolio_balance_series(
+        self,
+        from_date: str,
+        to_date: str
+    ) -> Tuple[List[date], Dict[Tuple[str, date], Decimal]]:
+        """
+        Return price dates of HOLDING and portfolio totals per (iban, price_date)
+        relevant for a period, starting with the latest price date before the period.
+        """
+        rows = self.select_cte(
+            sql=f"""
+                SELECT {DB_iban}, {DB_price_date},
+                       MAX({DB_total_amount_portfolio}) AS {DB_total_amount_portfolio}
+                FROM {HOLDING}
+                WHERE {DB_price_date} <= :to_date
+                  AND {DB_price_date} >= COALESCE(
+                        (SELECT MAX({DB_price_date}) FROM {HOLDING} WHERE {DB_price_date} <= :from_date),
+                        :from_date
+                      )
+                GROUP BY {DB_iban}, {DB_price_date}
+            """,
+            vars_={"from_date": from_date, "to_date": to_date},
+            fields=(DB_iban, DB_price_date, DB_total_amount_portfolio),
+        )
+        price_dates = sorted({price_date for _, price_date, _ in rows})
+        balances = {(iban, price_date): total for iban, price_date, total in rows}
+        return price_dates, balances
+
+    def _select_statement_balance_series(
+        self,
+        ibans: List[str],
+        from_date: str,
+        to_date: str
+    ) -> Dict[str, Tuple[List[date], List[Decimal]]]:
+        """
+        Return the signed closing balances of the last statement per day and IBAN
+        relevant for a period, starting with the latest statement before the period.
+        """
+        if not ibans:
+            return {}
+        vars_ = {"from_date": from_date, "to_date": to_date, "start_date": START_DATE_STATEMENTS}
+        vars_.update({f"iban{index}": iban for index, iban in enumerate(ibans)})
+        placeholders = ', '.join(f":iban{index}" for index in range(len(ibans)))
+        rows = self.select_cte(
+            sql=f"""
+                SELECT {DB_iban}, {DB_entry_date}, {DB_closing_balance}, {DB_closing_status},
+                       ROW_NUMBER() OVER (
+                           PARTITION BY {DB_iban}, {DB_entry_date}
+                           ORDER BY {DB_counter} DESC
+                       ) AS row_no
+                FROM {STATEMENT} s
+                WHERE {DB_iban} IN ({placeholders})
+                  AND {DB_entry_date} BETWEEN :start_date AND :to_date
+                  AND {DB_entry_date} >= COALESCE(
+                        (SELECT MAX(p.{DB_entry_date}) FROM {STATEMENT} p
+                         WHERE p.{DB_iban} = s.{DB_iban}
+                           AND p.{DB_entry_date} BETWEEN :start_date AND :from_date),
+                        :from_date
+                      )
+            """,
+            vars_=vars_,
+            fields=(DB_iban, DB_entry_date, DB_closing_balance, DB_closing_status, "row_no"),
+        )
+        series = {}
+        for iban, entry_date, closing_balance, closing_status, row_no in sorted(rows, key=itemgetter(0, 1)):
+            if row_no == 1:
+                dates, balances = series.setdefault(iban, ([], []))
+                dates.append(entry_date)
+                balances.append(signed_balance(closing_balance, closing_status))
+        return series
+
     def select_ledger_total_amount(
         self,
         iban: str,
@@ -1849,6 +2986,274 @@ class MariaDBLedger:
         }
 
 
+class MariaDBLedgerDailyBalance:
+    """
+    Materialization of daily ledger balances in table LEDGER_DAILY_BALANCE.
+
+    Maintained for ledger-only asset accounts (asset accounting, no IBAN,
+    no portfolio). Balances follow select_ledger_balance: the latest opening
+    balance booking plus all later movements, excluding opening balance postings.
+    A row is stored for each entry_date with postings, starting with the first
+    opening balance booking.
+
+    This class is designed as a mixin and relies on the QueryBuilder
+    API provided by MariaDBTables.
+    """
+
+    def _ledger_daily_balance_accounts(self, accounts: Iterable[str] | None = None) -> list[str]:
+        """
+        Return the ledger accounts maintained in LEDGER_DAILY_BALANCE.
+
+        Parameters
+        ----------
+        accounts : Iterable[str] | None
+            Restrict the result to these accounts; None returns all accounts.
+        """
+        kwargs = {}
+        if accounts is not None:
+            accounts = list(accounts)
+            if not accounts:
+                return []
+            kwargs[DB_account] = accounts
+        rows = self._select(
+            table=LEDGER_COA,
+            fields=DB_account,
+            asset_accounting=True,
+            portfolio=False,
+            opening_balance_account=False,
+            iban=NOT_ASSIGNED,
+            **kwargs
+        )
+        return [row[0] for row in rows]
+
+    def _ledger_daily_balance_rows(
+        self,
+        account: str,
+        postings: Iterable[tuple],
+        opening_balance_account: str | None,
+        balance: Decimal | None = None
+    ) -> list[dict]:
+        """
+        Compute running daily balances of an account in one pass.
+
+        Parameters
+        ----------
+        account : str
+            Ledger account.
+        postings : Iterable[tuple]
+            (entry_date, debit_account, credit_account, amount) sorted by entry_date.
+        opening_balance_account : str | None
+            Ledger account used for opening balance postings.
+        balance : Decimal | None
+            Balance before the first posting; None if no opening balance booking exists.
+
+        Returns
+        -------
+        list[dict]
+            LEDGER_DAILY_BALANCE rows.
+        """
+        rows = []
+        for entry_date, day_postings in groupby(postings, key=itemgetter(0)):
+            opening = None
+            movements = Decimal("0.00")
+            for _, debit_account, credit_account, amount in day_postings:
+                amount = -amount if debit_account == account else amount
+                if opening_balance_account in (debit_account, credit_account):
+                    opening = (opening or Decimal("0.00")) + amount
+                else:
+                    movements += amount
+            if opening is not None:
+                balance = opening + movements
+            elif balance is not None:
+                balance += movements
+            else:
+                continue  # no opening balance booking so far
+            rows.append({DB_account: account, DB_entry_date: entry_date, DB_balance: balance})
+        return rows
+
+    def _ledger_daily_balance_postings(
+        self,
+        accounts: list[str],
+        from_date: date | str | None = None
+    ) -> dict[str, list[tuple]]:
+        """
+        Return postings of the accounts ordered by entry_date with one query.
+
+        Returns
+        -------
+        dict[str, list[tuple]]
+            key: account, value: [(entry_date, debit_account, credit_account, amount), ...]
+        """
+        placeholders = ', '.join('?' for _ in accounts)
+        clause = f"({DB_debit_account} IN ({placeholders}) OR {DB_credit_account} IN ({placeholders}))"
+        clause_vars = (*accounts, *accounts)
+        if from_date is not None:
+            clause = f"{clause} AND {DB_entry_date} >= ?"
+            clause_vars += (date_days.convert_to_str(from_date),)
+        rows = self._select(
+            table=LEDGER,
+            fields=[DB_entry_date, DB_debit_account, DB_credit_account, DB_amount],
+            clause=clause,
+            clause_vars=clause_vars,
+            order=[DB_entry_date, DB_id_no]
+        )
+        postings = {account: [] for account in accounts}
+        for row in rows:
+            _, debit_account, credit_account, _ = row
+            if debit_account in postings:
+                postings[debit_account].append(row)
+            if credit_account in postings and credit_account != debit_account:
+                postings[credit_account].append(row)
+        return postings
+
+    def ledger_daily_balance_rebuild(self, accounts: Iterable[str] | None = None) -> int:
+        """
+        Rebuild LEDGER_DAILY_BALANCE from LEDGER.
+
+        Parameters
+        ----------
+        accounts : Iterable[str] | None
+            Accounts to rebuild; None rebuilds all maintained accounts.
+
+        Returns
+        -------
+        int
+            Number of stored daily balance rows.
+        """
+        accounts = self._ledger_daily_balance_accounts(accounts)
+        if not accounts:
+            return 0
+        opening_balance_account = self.select_scalar(
+            LEDGER_COA, DB_account, opening_balance_account=True)
+        postings = self._ledger_daily_balance_postings(accounts)
+        rows = list(chain.from_iterable(
+            self._ledger_daily_balance_rows(account, postings[account], opening_balance_account)
+            for account in accounts
+        ))
+        with self.transaction():
+            self.execute_delete(LEDGER_DAILY_BALANCE, **{DB_account: accounts})
+            inserted = self.execute_insert_many(LEDGER_DAILY_BALANCE, rows)
+        return inserted
+
+    def ledger_daily_balance_refresh(self, changes: dict[str, date | str]) -> None:
+        """
+        Recompute LEDGER_DAILY_BALANCE rows after changed postings.
+
+        Only rows from the earliest changed entry_date onwards are replaced.
+
+        Parameters
+        ----------
+        changes : dict[str, date | str]
+            key: changed ledger account, value: earliest changed entry_date.
+        """
+        accounts = self._ledger_daily_balance_accounts(changes.keys())
+        if not accounts:
+            return
+        opening_balance_account = self.select_scalar(
+            LEDGER_COA, DB_account, opening_balance_account=True)
+        for account in accounts:
+            from_date = date_days.convert_to_str(changes[account])
+            last_rows = self._select(
+                table=LEDGER_DAILY_BALANCE,
+                fields=DB_balance,
+                clause=f"{DB_entry_date} < ?",
+                clause_vars=(from_date,),
+                order=DB_entry_date,
+                sort="DESC",
+                limit=1,
+                account=account
+            )
+            balance = last_rows[0][0] if last_rows else None
+            postings = self._ledger_daily_balance_postings([account], from_date)
+            rows = self._ledger_daily_balance_rows(
+                account, postings[account], opening_balance_account, balance)
+            self.execute_delete(
+                LEDGER_DAILY_BALANCE,
+                clause=f"{DB_entry_date} >= ?",
+                clause_vars=(from_date,),
+                account=account
+            )
+            self.execute_insert_many(LEDGER_DAILY_BALANCE, rows)
+
+    def _ledger_daily_balance_changed(self, changes: dict[str, str]) -> None:
+        """
+        Refresh LEDGER_DAILY_BALANCE after changed postings.
+
+        Within a transaction the changes are collected and refreshed once before COMMIT
+        (see MariaDBInitializer.transaction).
+        """
+        executor = self.executor
+        if not executor.in_transaction:
+            self.ledger_daily_balance_refresh(changes)
+            return
+        pending = executor.ledger_changes
+        for account, entry_date in changes.items():
+            if account not in pending or entry_date < pending[account]:
+                pending[account] = entry_date
+
+    def select_ledger_daily_balance(self, account: str, to_date: date | str) -> Decimal | None:
+        """
+        Return the stored balance of a ledger account at to_date.
+
+        Maintained accounts return the latest daily balance on or before to_date,
+        other accounts only a balance stored for exactly to_date.
+        """
+        to_date = date_days.convert_to_str(to_date)
+        rows = self.select_cte(
+            sql=f"""
+                SELECT {DB_entry_date}, {DB_balance}
+                FROM {LEDGER_DAILY_BALANCE}
+                WHERE {DB_account} = :account
+                  AND (
+                        {DB_entry_date} = :to_date
+                     OR (
+                            {DB_entry_date} <= :to_date
+                        AND {DB_account} IN (
+                            SELECT {DB_account} FROM {LEDGER_COA}
+                            WHERE asset_accounting AND NOT portfolio
+                              AND NOT opening_balance_account AND {DB_iban} = :not_assigned
+                        )
+                     )
+                  )
+                ORDER BY {DB_entry_date} DESC
+                LIMIT 1
+            """,
+            vars_={"account": account, "to_date": to_date, "not_assigned": NOT_ASSIGNED},
+            fields=(DB_entry_date, DB_balance),
+        )
+        return rows[0][1] if rows else None
+
+    def _ledger_changes(self, rows: Iterable[dict], field_dict: dict | None = None) -> dict:
+        """
+        Return {account: earliest entry_date} of LEDGER rows, optionally overlaid
+        with changed field values.
+        """
+        changes = {}
+        for row in rows:
+            versions = [row]
+            if field_dict:
+                versions.append({**row, **field_dict})
+            for version in versions:
+                entry_date = date_days.convert_to_str(version.get(DB_entry_date))
+                if not entry_date:
+                    continue
+                for account in (version.get(DB_debit_account), version.get(DB_credit_account)):
+                    if account and (account not in changes or entry_date < changes[account]):
+                        changes[account] = entry_date
+        return changes
+
+    def _select_ledger_changes(self, **kwargs) -> list[dict]:
+        """
+        Return balance relevant fields of LEDGER rows selected by kwargs.
+        """
+        return self._select(
+            table=LEDGER,
+            fields=list(LEDGER_BALANCE_FIELDS),
+            result_dict=True,
+            **kwargs
+        )
+
+
 class MariaDBHolding:
 
     def select_isin_with_ticker(
@@ -1935,26 +3340,24 @@ class MariaDBHolding:
                 Holding data rows for the calculated interval.
         """
         # ------------------------------------------------------------
-        # Determine min/max price_date per ISIN (QueryBuilder-basiert)
+        # Determine min/max price_date of all ISINs with one grouped query
         # ------------------------------------------------------------
-        periods: list[tuple] = []
-
-        for isin in isin_codes:
-            min_date = self.select_scalar(
-                HOLDING,
-                f"MIN({DB_price_date})",
-                isin_code=isin,
-                **kwargs
-            )
-            max_date = self.select_scalar(
-                HOLDING,
-                f"MAX({DB_price_date})",
-                isin_code=isin,
+        isin_codes = list(isin_codes)
+        if not isin_codes:
+            return None, None, []
+        if iban:
+            kwargs[DB_iban] = iban
+        periods = [
+            (min_date, max_date)
+            for _, min_date, max_date in self._select(
+                table=HOLDING,
+                fields=[DB_ISIN, f"MIN({DB_price_date})", f"MAX({DB_price_date})"],
+                group_by=DB_ISIN,
+                isin_code=isin_codes,
                 **kwargs
             )
-
-            if min_date and max_date:
-                periods.append((min_date, max_date))
+            if min_date and max_date
+        ]
 
         if not periods:
             return None, None, []
@@ -2197,10 +3600,11 @@ class MariaDBHolding:
 
     def update_total_holding_amount(self, **kwargs) -> None:
         """
-        Update the portfolio total amount per price date in batch using MariaDBTables.
+        Update the portfolio total amount per IBAN and price date.
 
         Aggregates total_amount per IBAN and price_date and updates the
-        HOLDING table with the calculated totals in a single query.
+        HOLDING table with the calculated totals in a single
+        UPDATE ... JOIN (SELECT ... GROUP BY) statement.
 
         Parameters
         ----------
@@ -2212,32 +3616,26 @@ class MariaDBHolding:
         -------
         None
         """
-        # ------------------------------------------------------------
-        # Aggregate total_amount per IBAN and price_date
-        # ------------------------------------------------------------
-        rows = self._select(
-            table=HOLDING,
-            fields=[
-                DB_iban,
-                DB_price_date,
-                f"SUM({DB_total_amount}) AS total_amount_portfolio"
-            ],
-            group_by=[DB_iban, DB_price_date],
-            **kwargs
-        )
+        where_sql, vars_ = self._where_clause(date_name=DB_price_date, **kwargs)
+        self._update_total_holding_amount(where_sql, vars_)
 
-        if not rows:
-            return  # nothing to update
-        # ------------------------------------------------------------
-        # Batch update each row using execute_update and _where_clause
-        # ------------------------------------------------------------
-        for iban, price_date, total_amount_portfolio in rows:
-            self.execute_update(
-                table=HOLDING,
-                field_dict={"total_amount_portfolio": total_amount_portfolio},
-                iban=iban,
-                **{DB_price_date: price_date}
-            )
+    def _update_total_holding_amount(self, where_sql: str, vars_: tuple) -> int:
+        """
+        Set total_amount_portfolio of all HOLDING rows selected by where_sql
+        to the sum of total_amount of their IBAN and price date.
+        """
+        sql = f"""
+            UPDATE {HOLDING} AS h
+            JOIN (
+                SELECT {DB_iban}, {DB_price_date}, SUM({DB_total_amount}) AS total
+                FROM {HOLDING}
+                {where_sql}
+                GROUP BY {DB_iban}, {DB_price_date}
+            ) AS t
+              ON h.{DB_iban} = t.{DB_iban} AND h.{DB_price_date} = t.{DB_price_date}
+            SET h.{DB_total_amount_portfolio} = t.total
+        """
+        return self.executor.execute(sql, vars_=vars_, compress=True)
 
 
 class MariaDBStatements:
@@ -2320,14 +3718,200 @@ class MariaDBStatements:
             id_no=id_no,
             default=NOT_ASSIGNED
         )
-
-        return account
+
+        return account
+
+    def select_sepa_fields_contra_accounts(
+        self,
+        iban: str,
+        from_date: date | str,
+        sepa_fields: Iterable[str]
+    ) -> list[dict]:
+        """
+        Return SEPA fields and the assigned ledger contra account of all statements
+        of an IBAN since from_date in one query.
+
+        Credit statement → debit ledger account
+        Debit statement  → credit ledger account
+        Statements without ledger assignment return NOT_ASSIGNED.
+
+        Parameters
+        ----------
+        iban : str
+            IBAN of the statement account.
+        from_date : date | str
+            First entry_date (inclusive).
+        sepa_fields : Iterable[str]
+            STATEMENT fields returned in addition to entry_date and counter.
+
+        Returns
+        -------
+        list[dict]
+            Rows ordered by entry_date, counter ascending containing
+            entry_date, counter, sepa_fields and contra_account.
+        """
+        sepa_fields = list(sepa_fields)
+        statement_fields = ', '.join(f"s.{field}" for field in sepa_fields)
+        sql = f"""
+            SELECT
+                s.{DB_entry_date},
+                s.{DB_counter},
+                {statement_fields},
+                COALESCE(
+                    CASE
+                        WHEN s.{DB_status} = :credit THEN l.{DB_debit_account}
+                        ELSE l.{DB_credit_account}
+                    END,
+                    :not_assigned
+                ) AS {DB_contra_account}
+            FROM {STATEMENT} s
+            LEFT JOIN {LEDGER_STATEMENT} ls
+              ON ls.{DB_iban} = s.{DB_iban}
+             AND ls.{DB_entry_date} = s.{DB_entry_date}
+             AND ls.{DB_counter} = s.{DB_counter}
+             AND ls.{DB_status} = s.{DB_status}
+            LEFT JOIN {LEDGER} l
+              ON l.{DB_id_no} = ls.{DB_id_no}
+            WHERE s.{DB_iban} = :iban
+              AND s.{DB_entry_date} >= :from_date
+        """
+        rows = self.select_cte(
+            sql=sql,
+            vars_={
+                "credit": CREDIT,
+                "not_assigned": NOT_ASSIGNED,
+                "iban": iban,
+                "from_date": date_days.convert_to_str(from_date),
+            },
+            fields=[DB_entry_date, DB_counter, *sepa_fields, DB_contra_account],
+            result_dict=True,
+        )
+        # ORDER BY of the inner SQL is not applied by the select_cte wrapper
+        rows.sort(key=lambda row: (row[DB_entry_date], row[DB_counter]))
+        return rows
+
+    # ------------------------------------------------------------------
+    # Balance snapshot
+    # ------------------------------------------------------------------
+    def select_balance_snapshot(self, ibans: Iterable[str]) -> BalanceSnapshot:
+        """
+        Return the latest and previous balances of all IBANs
+        in a constant number of queries.
+
+        Parameters
+        ----------
+        ibans : Iterable[str]
+            IBANs of the accounts shown.
+
+        Returns
+        -------
+        BalanceSnapshot
+            statements: {iban: (first, last)} first and last STATEMENT row of the
+                latest entry_date, containing entry_date, counter and the
+                closing_... and opening_... fields.
+            holdings: {iban: (latest, previous)} HOLDING row of the latest and
+                the previous price_date containing price_date, total_amount_portfolio
+                and amount_currency; previous is latest if only one price_date exists.
+            max_price_date: latest price_date of table HOLDING.
+        """
+        ibans = list(dict.fromkeys(ibans))
+        if not ibans:
+            return BalanceSnapshot({}, {}, None)
+        return BalanceSnapshot(
+            self._select_statement_snapshot(ibans),
+            self._select_holding_snapshot(ibans),
+            self.select_scalar(HOLDING, f"MAX({DB_price_date})")
+        )
+
+    def _select_statement_snapshot(self, ibans: list[str]) -> dict[str, tuple[dict, dict]]:
+        """
+        Return {iban: (first, last)} STATEMENT rows of the latest entry_date per IBAN.
+        """
+        vars_ = {f"iban{index}": iban for index, iban in enumerate(ibans)}
+        placeholders = ', '.join(f":iban{index}" for index in range(len(ibans)))
+        fields = [DB_iban, DB_entry_date, DB_counter,
+                  DB_closing_status, DB_closing_balance, DB_closing_currency, DB_closing_entry_date,
+                  DB_opening_status, DB_opening_balance, DB_opening_currency, DB_opening_entry_date]
+        rows = self.select_cte(
+            sql=f"""
+                SELECT *
+                FROM (
+                    SELECT {', '.join(fields)},
+                           ROW_NUMBER() OVER (
+                               PARTITION BY {DB_iban}
+                               ORDER BY {DB_entry_date} DESC, {DB_counter} DESC
+                           ) AS last_no,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY {DB_iban}, {DB_entry_date}
+                               ORDER BY {DB_counter} ASC
+                           ) AS first_no,
+                           MAX({DB_entry_date}) OVER (PARTITION BY {DB_iban}) AS max_entry_date
+                    FROM {STATEMENT}
+                    WHERE {DB_iban} IN ({placeholders})
+                ) s
+                WHERE last_no = 1
+                   OR (first_no = 1 AND {DB_entry_date} = max_entry_date)
+            """,
+            vars_=vars_,
+            fields=fields + ["last_no"],
+            result_dict=True,
+        )
+        snapshot = {}
+        for row in rows:
+            first, last = snapshot.get(row[DB_iban], (None, None))
+            if row.pop("last_no") == 1:
+                last = row
+            if first is None or row[DB_counter] < first[DB_counter]:
+                first = row
+            snapshot[row[DB_iban]] = (first, last)
+        return snapshot
+
+    def _select_holding_snapshot(self, ibans: list[str]) -> dict[str, tuple[dict, dict]]:
+        """
+        Return {iban: (latest, previous)} HOLDING rows of the two latest price_dates per IBAN.
+        """
+        vars_ = {f"iban{index}": iban for index, iban in enumerate(ibans)}
+        placeholders = ', '.join(f":iban{index}" for index in range(len(ibans)))
+        fields = [DB_iban, DB_price_date, DB_total_amount_portfolio, DB_amount_currency]
+        rows = self.select_cte(
+            sql=f"""
+                SELECT *
+                FROM (
+                    SELECT {', '.join(fields)},
+                           DENSE_RANK() OVER (
+                               PARTITION BY {DB_iban}
+                               ORDER BY {DB_price_date} DESC
+                           ) AS date_no,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY {DB_iban}, {DB_price_date}
+                               ORDER BY {DB_ISIN}
+                           ) AS row_no
+                    FROM {HOLDING}
+                    WHERE {DB_iban} IN ({placeholders})
+                ) h
+                WHERE date_no <= 2 AND row_no = 1
+            """,
+            vars_=vars_,
+            fields=fields + ["date_no"],
+            result_dict=True,
+        )
+        snapshot = {}
+        for row in sorted(rows, key=itemgetter("date_no")):
+            date_no = row.pop("date_no")
+            if date_no == 1:
+                snapshot[row[DB_iban]] = (row, row)
+            else:
+                snapshot[row[DB_iban]] = (snapshot[row[DB_iban]][0], row)
+        return snapshot
 
     # ------------------------------------------------------------------
 
 
 class MariaDBTransactions:
 
+    # cost basis states per (iban, isin_code, cost_method) at period boundaries
+    _cost_basis_checkpoints = CostBasisCheckpoints()
+
     def get_transaction_overview(
         self,
         isin_code: str,
@@ -2344,6 +3928,23 @@ class MariaDBTransactions:
             COST_LIFO    = "LIFO"
             COST_AVERAGE = "AVERAGE"
         """
+        return self.get_transaction_overviews(isin_code, period, [iban], cost_method)
+
+    def get_transaction_overviews(
+        self,
+        isin_code: str,
+        period: tuple,
+        ibans: Iterable[str],
+        cost_method: str = COST_FIFO
+    ) -> list[list]:
+        """
+        Determine the transaction overview of get_transaction_overview
+        for several IBANs in one batched pass.
+
+        The cost basis state before the period is replayed from the nearest
+        cost basis checkpoint. Transactions of all IBANs are read by
+        one ordered query.
+        """
 
         # ------------------------------------------------------------
         # Helper functions
@@ -2426,41 +4027,25 @@ class MariaDBTransactions:
             profit_loss = proceeds - cost
             return -sell_pieces, proceeds, profit_loss
 
-        # -------------------- REBUILD --------------------
-
-        def rebuild_cost_state(isin_code, iban, until_date):
-            """
-            Rebuild cost basis state from historical transactions.
-            """
-            rows = self.select_rows(
-                table=TRANSACTION,
-                fields=("transaction_type", "pieces", "posted_amount", "price"),
-                isin_code=isin_code,
-                iban=iban,
-                clause="price_date < ?",
-                clause_vars=(until_date,),
-                order=[("price_date", "ASC"), ("counter", "ASC")]
-            )
+        # -------------------- REPLAY --------------------
 
+        def new_cost_state():
             if cost_method == COST_AVERAGE:
-                state = {"pieces": Decimal("0.00"), "avg_price": Decimal("0.00")}
-
-                for t_type, pieces, amount, price in rows:
-                    if t_type != TRANSACTION_DELIVERY:
-                        buy_average(state, pieces, amount)
-                    else:
-                        sell_average(state, pieces, price)
-
-                return state
+                return {"pieces": Decimal("0.00"), "avg_price": Decimal("0.00")}
+            return []
 
+        def apply_transaction(cost_state, t_type, pieces, amount, price):
+            """Apply a historical transaction to the cost basis state."""
+            if cost_method == COST_AVERAGE:
+                if t_type != TRANSACTION_DELIVERY:
+                    buy_average(cost_state, pieces, amount)
+                else:
+                    sell_average(cost_state, pieces, price)
             else:
-                cost_basis = []
-                for t_type, pieces, amount, price in rows:
-                    if t_type != TRANSACTION_DELIVERY:
-                        buy_lot(cost_basis, pieces, amount)
-                    else:
-                        sell_lot(cost_basis, pieces, price, lifo=(cost_method == COST_LIFO))
-                return cost_basis
+                if t_type != TRANSACTION_DELIVERY:
+                    buy_lot(cost_state, pieces, amount)
+                else:
+                    sell_lot(cost_state, pieces, price, lifo=(cost_method == COST_LIFO))
 
         # ------------------------------------------------------------
         # Start of method
@@ -2468,157 +4053,234 @@ class MariaDBTransactions:
 
         from_date, to_date = period
         from_date, to_date = xetra_cls.adjust_period(from_date, to_date, xetra_bday)
+        # transactions before start build the opening stock,
+        # transactions of the period as entered are listed
+        start = self._as_date(from_date)
+        period_from, period_to = map(self._as_date, period)
+
+        ibans = list(dict.fromkeys(ibans))
+        checkpoints = self._cost_basis_checkpoints
+        generation = checkpoints.generation
+        replay_from = {}
+        cost_states = {}
+        for iban in ibans:
+            key = (iban, isin_code, cost_method)
+            replay_from[iban], cost_states[iban] = checkpoints.get(key, start)
+        rows_per_iban = self._select_transaction_replay(
+            isin_code, replay_from, start, (period_from, period_to))
 
         result: list[list] = []
+        for iban in ibans:
+            key = (iban, isin_code, cost_method)
+            rows = rows_per_iban.get(iban, [])
+            try:
+                iban_result: list[list] = []
+
+                # --------------------------------------------------------
+                # 1. Opening stock
+                # --------------------------------------------------------
+
+                cost_state = cost_states[iban]
+                if cost_state is None:
+                    cost_state = new_cost_state()
+                replayed = False
+                for price_date, counter, t_type, price, pieces, posted_amount in rows:
+                    if price_date < start and (replay_from[iban] is None or price_date >= replay_from[iban]):
+                        apply_transaction(cost_state, t_type, pieces, posted_amount, price)
+                        replayed = True
+                if replayed or replay_from[iban] != start:
+                    checkpoints.put(key, start, cost_state, generation)
 
-        try:
-            # --------------------------------------------------------
-            # 1. Opening stock
-            # --------------------------------------------------------
+                if cost_method == COST_AVERAGE:
+                    current_pieces = cost_state["pieces"]
+                else:
+                    current_pieces = total_pieces(cost_state)
 
-            cost_state = rebuild_cost_state(isin_code, iban, from_date)
+                if current_pieces > 0:
+                    market_price = self.get_close_price(isin_code, from_date)
 
-            if cost_method == COST_AVERAGE:
-                current_pieces = cost_state["pieces"]
-            else:
-                current_pieces = total_pieces(cost_state)
-
-            if current_pieces > 0:
-                market_price = self.get_close_price(isin_code, from_date)
-
-                result.append([
-                    from_date,
-                    0,
-                    "OPEN",
-                    Decimal(market_price),
-                    Decimal("0.00"),
-                    current_pieces,
-                    current_pieces * market_price,
-                    Decimal("0.00"),
-                    iban
-                ])
-
-            # --------------------------------------------------------
-            # 2. Load transactions
-            # --------------------------------------------------------
-
-            transactions = self.select_rows(
-                table=TRANSACTION,
-                fields=(
-                    "price_date",
-                    "counter",
-                    "transaction_type",
-                    "price",
-                    "pieces",
-                    "posted_amount"
-                ),
-                order=[("price_date", "ASC"), ("counter", "ASC")],
-                isin_code=isin_code,
-                iban=iban,
-                period=period
-            )
+                    iban_result.append([
+                        from_date,
+                        0,
+                        "OPEN",
+                        Decimal(market_price),
+                        Decimal("0.00"),
+                        current_pieces,
+                        current_pieces * market_price,
+                        Decimal("0.00"),
+                        iban
+                    ])
+
+                # --------------------------------------------------------
+                # 2. Transactions of the period
+                # --------------------------------------------------------
 
-            # --------------------------------------------------------
-            # 3. Process transactions
-            # --------------------------------------------------------
+                transactions = [
+                    row for row in rows if period_from <= row[0] <= period_to
+                ]
 
-            for price_date, counter, t_type, price, pieces, posted_amount in transactions:
+                # --------------------------------------------------------
+                # 3. Process transactions
+                # --------------------------------------------------------
+
+                for price_date, counter, t_type, price, pieces, posted_amount in transactions:
+
+                    if t_type != TRANSACTION_DELIVERY:
+                        # BUY
+                        if cost_method == COST_AVERAGE:
+                            tx_pieces = buy_average(cost_state, pieces, posted_amount)
+                        else:
+                            tx_pieces = buy_lot(cost_state, pieces, posted_amount)
+
+                        profit_loss = Decimal("0.00")
+                        posted_amount = abs(Decimal(posted_amount))
+
+                    else:
+                        # SELL
+                        if cost_method == COST_AVERAGE:
+                            tx_pieces, posted_amount, profit_loss = sell_average(
+                                cost_state, pieces, price
+                            )
+                        else:
+                            tx_pieces, posted_amount, profit_loss = sell_lot(
+                                cost_state,
+                                pieces,
+                                price,
+                                lifo=(cost_method == COST_LIFO)
+                            )
 
-                if t_type != TRANSACTION_DELIVERY:
-                    # BUY
                     if cost_method == COST_AVERAGE:
-                        tx_pieces = buy_average(cost_state, pieces, posted_amount)
+                        current_pieces = cost_state["pieces"]
                     else:
-                        tx_pieces = buy_lot(cost_state, pieces, posted_amount)
+                        current_pieces = total_pieces(cost_state)
+
+                    iban_result.append([
+                        price_date,
+                        counter,
+                        t_type,
+                        price,
+                        tx_pieces,
+                        current_pieces,
+                        posted_amount,
+                        profit_loss,
+                        iban
+                    ])
 
-                    profit_loss = Decimal("0.00")
-                    posted_amount = abs(Decimal(posted_amount))
+                # state after all transactions up to period_to, unless transactions
+                # between period_from and start were counted twice
+                if start <= period_to and not any(period_from <= row[0] < start for row in rows):
+                    checkpoints.put(key, period_to + timedelta(days=1), cost_state, generation)
+
+                # --------------------------------------------------------
+                # 4. Virtual CLOSE
+                # --------------------------------------------------------
+
+                if current_pieces > 0:
+                    end_price = self.get_close_price(isin_code, to_date)
 
-                else:
-                    # SELL
                     if cost_method == COST_AVERAGE:
                         tx_pieces, posted_amount, profit_loss = sell_average(
-                            cost_state, pieces, price
+                            cost_state, current_pieces, end_price
                         )
                     else:
                         tx_pieces, posted_amount, profit_loss = sell_lot(
                             cost_state,
-                            pieces,
-                            price,
+                            current_pieces,
+                            end_price,
                             lifo=(cost_method == COST_LIFO)
                         )
 
-                if cost_method == COST_AVERAGE:
-                    current_pieces = cost_state["pieces"]
-                else:
-                    current_pieces = total_pieces(cost_state)
+                    if cost_method == COST_AVERAGE:
+                        current_pieces = cost_state["pieces"]
+                    else:
+                        current_pieces = total_pieces(cost_state)
+
+                    iban_result.append([
+                        to_date,
+                        9999,
+                        "CLOSE",
+                        Decimal(end_price),
+                        tx_pieces,
+                        current_pieces,
+                        posted_amount,
+                        profit_loss,
+                        iban
+                    ])
 
-                result.append([
-                    price_date,
-                    counter,
-                    t_type,
-                    price,
-                    tx_pieces,
-                    current_pieces,
-                    posted_amount,
-                    profit_loss,
-                    iban
-                ])
-
-            # --------------------------------------------------------
-            # 4. Virtual CLOSE
-            # --------------------------------------------------------
-
-            if current_pieces > 0:
-                end_price = self.get_close_price(isin_code, to_date)
+                result.extend(iban_result)
 
-                if cost_method == COST_AVERAGE:
-                    tx_pieces, posted_amount, profit_loss = sell_average(
-                        cost_state, current_pieces, end_price
-                    )
-                else:
-                    tx_pieces, posted_amount, profit_loss = sell_lot(
-                        cost_state,
-                        current_pieces,
-                        end_price,
-                        lifo=(cost_method == COST_LIFO)
+            except Exception as exc:
+                MessageBoxError(
+                    title="TRANSACTION ERROR",
+                    info_storage=Informations.BANKDATA_INFORMATIONS,
+                    message=get_message(
+                        MESSAGE_TEXT,
+                        "UNEXCEPTED_ERROR",
+                        __file__,
+                        0,
+                        "get_transaction_overview",
+                        type(exc).__name__,
+                        exc,
+                        ""
                     )
+                )
+        return result
 
-                if cost_method == COST_AVERAGE:
-                    current_pieces = cost_state["pieces"]
-                else:
-                    current_pieces = total_pieces(cost_state)
+    @staticmethod
+    def _as_date(value) -> date:
+        """
+        Return a date of a date, ISO date string or pandas Timestamp.
+        """
+        return date_days.convert_to_date(date_days.convert_to_str(value)[:10])
 
-                result.append([
-                    to_date,
-                    9999,
-                    "CLOSE",
-                    Decimal(end_price),
-                    tx_pieces,
-                    current_pieces,
-                    posted_amount,
-                    profit_loss,
-                    iban
-                ])
+    def invalidate_cost_basis_checkpoints(self, changes: dict[tuple, date] | None = None) -> None:
+        """
+        Drop the cost basis checkpoints after changes of table TRANSACTION.
+        changes: {(iban, isin_code): earliest changed price_date}, all if None
+        """
+        self._cost_basis_checkpoints.invalidate(changes)
 
-            return result
+    def _select_transaction_replay(
+        self,
+        isin_code: str,
+        replay_from: dict[str, date | None],
+        start: date,
+        period: tuple[date, date]
+    ) -> dict[str, list[tuple]]:
+        """
+        Select the transactions of an ISIN needed for the overviews of several IBANs
+        in one ordered query.
 
-        except Exception as exc:
-            MessageBoxError(
-                title="TRANSACTION ERROR",
-                info_storage=Informations.BANKDATA_INFORMATIONS,
-                message=get_message(
-                    MESSAGE_TEXT,
-                    "UNEXCEPTED_ERROR",
-                    __file__,
-                    0,
-                    "get_transaction_overview",
-                    type(exc).__name__,
-                    exc,
-                    ""
-                )
-            )
-            return []
+        Returns {iban: [(price_date, counter, transaction_type, price, pieces, posted_amount)]}
+        containing the transactions of the period and the transactions before start
+        from replay_from[iban] (checkpoint date, all if None) onward.
+        """
+        if not replay_from:
+            return {}
+        lower_bounds = []
+        clause_vars = []
+        for iban, checkpoint_date in replay_from.items():
+            if checkpoint_date is None:
+                lower_bounds.append(f"{DB_iban} = ?")
+                clause_vars.append(iban)
+            else:
+                lower_bounds.append(f"({DB_iban} = ? AND {DB_price_date} >= ?)")
+                clause_vars.extend((iban, date_days.convert_to_str(checkpoint_date)))
+        clause = (
+            f"{DB_price_date} BETWEEN ? AND ? "
+            f"OR ({DB_price_date} < ? AND ({' OR '.join(lower_bounds)}))"
+        )
+        clause_vars = [*map(date_days.convert_to_str, period), date_days.convert_to_str(start), *clause_vars]
+        rows = self._select(
+            table=TRANSACTION,
+            fields=("iban", "price_date", "counter", "transaction_type", "price", "pieces", "posted_amount"),
+            clause=clause,
+            clause_vars=tuple(clause_vars),
+            order=[("iban", "ASC"), ("price_date", "ASC"), ("counter", "ASC")],
+            isin_code=isin_code,
+            iban=list(replay_from)
+        )
+        return {iban: [row[1:] for row in group] for iban, group in groupby(rows, key=itemgetter(0))}
 
     def select_transactions_data(
         self,
@@ -2746,6 +4408,9 @@ class MariaDBTransactions:
 
 class MariaDBPrices:
 
+    # close series per symbol for as-of price lookups
+    _close_price_index = ClosePriceIndex()
+
     def select_first_price_date_of_prices(
         self,
         symbol_list: list[str],
@@ -2793,16 +4458,71 @@ class MariaDBPrices:
 
         return max(first_dates) if first_dates else None
 
-    def get_close_price(self, isin_code, price_date):
+    def close_price_series(self, symbol: str) -> tuple[np.ndarray, list[Decimal]]:
+        """
+        Return the close series of a symbol as sorted arrays (price_date, close),
+        loaded once into the close price index.
+        """
+        series = self._close_price_index.get(symbol)
+        if series is None:
+            generation = self._close_price_index.generation
+            rows = self._select(
+                table=PRICES,
+                fields=[DB_price_date, DB_close],
+                clause=f"{DB_close} IS NOT NULL",
+                order=DB_price_date,
+                symbol=symbol
+            )
+            series = (
+                np.array([str(price_date)[:10] for price_date, _ in rows], dtype='datetime64[D]'),
+                [Decimal(close) for _, close in rows]
+            )
+            self._close_price_index.put(symbol, series, generation)
+        return series
+
+    def select_close_prices(
+        self,
+        symbol: str,
+        price_dates: Iterable,
+        exact: bool = False
+    ) -> list[Decimal | None]:
+        """
+        Return the close price of a symbol on or before each of price_dates.
+
+        Parameters
+        ----------
+        symbol : str
+            Symbol of table PRICES.
+        price_dates : Iterable
+            Dates (date or 'YYYY-MM-DD').
+        exact : bool, default False
+            If True, only a close of the price_date itself is returned.
 
+        Returns
+        -------
+        list[Decimal | None]
+            Close prices in order of price_dates, None if not available.
+        """
+        return ClosePriceIndex.as_of(self.close_price_series(symbol), price_dates, exact=exact)
+
+    def invalidate_close_prices(self, symbols: Iterable[str] | None = None) -> None:
+        """
+        Drop the close series of symbols (all if None) after changes of table PRICES.
+        """
+        self._close_price_index.invalidate(symbols)
+
+    def get_close_price(self, isin_code, price_date):
+        """
+        Return the close price of an ISIN on or before price_date.
+        """
         symbol = self.select_scalar(ISIN, DB_symbol, isin_code=isin_code)
-        close = self.select_scalar(PRICES, DB_close, symbol=symbol)
+        close = self.select_close_prices(symbol, [price_date])[0] if symbol else None
         if close:
-            return Decimal(close)
+            return close
         else:
             message = get_message(
                 MESSAGE_TEXT, 'PRICES_NO',
-                ' '.join([DB_price_date.upper(), price_date]),
+                ' '.join([DB_price_date.upper(), date_days.convert_to_str(price_date)]),
                 symbol,
                 '',
                 isin_code,
@@ -2817,8 +4537,12 @@ class MariaDBShelves:
     Helper class for managing bank and account information stored in the SHELVES table.
 
     Provides methods to list banks, retrieve accounts, and manipulate JSON-serialized bank data.
+    Decoded bank data is kept in a shelve cache; writes go through to it.
     """
 
+    # decoded bankdata per bank code, versioned by SHELVES.updated_at
+    _shelve_cache = ShelveCache()
+
     # ----------------------------
     # IBAN / Bank Helpers
     # ----------------------------
@@ -2929,6 +4653,53 @@ class MariaDBShelves:
             return list(obj)
         raise TypeError(f"Expected ValueList, got {type(obj)}")
 
+    def _shelve_bankdata(self, shelve_name: str, check: bool = False) -> dict | None:
+        """
+        Return the decoded bankdata of a bank from the shelve cache.
+
+        Cached entries are validated against SHELVES.updated_at; changes of
+        other processes are detected within ShelveCache.check_interval seconds.
+
+        Parameters
+        ----------
+        shelve_name : str
+            Bank/shelve identifier.
+        check : bool, default False
+            If True, validate the entry of shelve_name now (before writes).
+
+        Returns
+        -------
+        dict | None
+            Decoded bankdata (shared, do not modify) or None if the bank is missing.
+        """
+        if check:
+            versions = self._select(table=SHELVES, fields=[DB_code, DB_updated_at], code=shelve_name)
+            self._shelve_cache.validate(dict(versions), codes=[shelve_name])
+        elif self._shelve_cache.check_due():
+            versions = self._select(table=SHELVES, fields=[DB_code, DB_updated_at])
+            self._shelve_cache.validate(dict(versions))
+        bankdata = self._shelve_cache.get(shelve_name)
+        if bankdata is None:
+            rows = self._select(table=SHELVES, fields=[DB_updated_at, DB_bankdata], code=shelve_name)
+            if not rows or not rows[0][1]:
+                return None
+            updated_at, _bankdata = rows[0]
+            bankdata = json.loads(_bankdata)
+            self._shelve_cache.put(shelve_name, updated_at, bankdata)
+        return bankdata
+
+    def _shelve_write(self, shelve_name: str, bankdata: dict) -> None:
+        """
+        Store bankdata in SHELVES and write it through to the shelve cache.
+        REPLACE and the read of updated_at run in one transaction,
+        so the cached version is the one written here.
+        """
+        bankdata_json = json.dumps(bankdata, default=self.shelve_serialize)
+        with self.transaction():
+            self.execute_replace(SHELVES, {DB_code: shelve_name, DB_bankdata: bankdata_json})
+            updated_at = self.select_scalar(SHELVES, DB_updated_at, code=shelve_name)
+        self._shelve_cache.put(shelve_name, updated_at, json.loads(bankdata_json))
+
     def shelve_get_key(
         self,
         shelve_name: str,
@@ -2952,19 +4723,18 @@ class MariaDBShelves:
         dict | any
             Dictionary (for list input) or single value (for string input).
         """
-        _bankdata = self.select_scalar(SHELVES, DB_bankdata, code=shelve_name)
-        if not _bankdata:
+        bankdata = self._shelve_bankdata(shelve_name)
+        if not bankdata:
             Termination(
                 info=get_message(MESSAGE_TEXT, "SHELVE_NAME_MISSED", shelve_name)
             ).terminate()
 
-        bankdata = json.loads(_bankdata)
-
+        # copies: callers may modify the returned values
         if isinstance(key, list):
             res_dict = dict.fromkeys(key, None) if none else {}
-            res_dict.update(bankdata)
+            res_dict.update(deepcopy(bankdata))
             return res_dict
-        return bankdata.get(key, {} if not none else None)
+        return deepcopy(bankdata.get(key, {} if not none else None))
 
     def shelve_put_key(self, shelve_name: str, data: tuple | list[tuple]) -> None:
         """
@@ -2977,15 +4747,13 @@ class MariaDBShelves:
         data : tuple | list[tuple]
             Key-value pair(s) to update.
         """
-        _bankdata = self.select_scalar(SHELVES, DB_bankdata, code=shelve_name)
-        bankdata = json.loads(_bankdata) if _bankdata else {}
+        bankdata = dict(self._shelve_bankdata(shelve_name, check=True) or {})
 
         if isinstance(data, tuple):
             data = [data]
 
         bankdata.update(dict(data))
-        bankdata_json = json.dumps(bankdata, default=self.shelve_serialize)
-        self.execute_replace(SHELVES, {DB_code: shelve_name, DB_bankdata: bankdata_json})
+        self._shelve_write(shelve_name, bankdata)
 
     def shelve_del_key(self, shelve_name: str, key: str) -> None:
         """
@@ -2998,11 +4766,23 @@ class MariaDBShelves:
         key : str
             Key to remove.
         """
-        _bankdata = self.select_scalar(SHELVES, DB_bankdata, code=shelve_name)
-        if _bankdata:
-            bankdata = json.loads(_bankdata)
+        bankdata = self._shelve_bankdata(shelve_name, check=True)
+        if bankdata:
+            bankdata = dict(bankdata)
             bankdata.pop(key, None)
-            self.execute_replace(SHELVES, {DB_code: shelve_name, DB_bankdata: json.dumps(bankdata)})
+            self._shelve_write(shelve_name, bankdata)
+
+    def shelve_delete(self, shelve_name: str) -> None:
+        """
+        Delete the shelve of a bank and its shelve cache entry.
+
+        Parameters
+        ----------
+        shelve_name : str
+            Bank/shelve identifier.
+        """
+        self.execute_delete(SHELVES, code=shelve_name)
+        self._shelve_cache.discard(shelve_name)
 
 
 class MariaDBSelection:
@@ -3277,8 +5057,10 @@ class MariaDBServices:
         2. Normalizes the price date (adjusts weekends to the previous business day).
         3. Replaces existing holdings for the same IBAN and price date.
         4. Ensures referenced ISIN master data exists.
-        5. Updates acquisition amounts per holding.
-        6. Commits all changes as a single database transaction.
+        5. Computes acquisition amounts from the previous holdings of the IBAN.
+        6. Inserts missing ISIN master data with one multi-row INSERT IGNORE,
+           replaces holdings with one multi-row REPLACE
+           and commits all changes as a single database transaction.
 
         Parameters
         ----------
@@ -3297,17 +5079,11 @@ class MariaDBServices:
             - the transaction is rolled back due to user cancellation.
         """
 
-        # ------------------------------------------------------------------
-        # Start database transaction
-        # ------------------------------------------------------------------
-        self.executor.execute("START TRANSACTION;")
-
         # ------------------------------------------------------------------
         # Download holdings from bank
         # ------------------------------------------------------------------
         holdings: List[Dict[str, Any]] = bank.dialogs.holdings(bank)
-        if holdings in START_DIALOG_FAILED:
-            self.executor.execute("ROLLBACK;")
+        if holdings in START_DIALOG_FAILED or not holdings:
             return holdings
 
         # ------------------------------------------------------------------
@@ -3321,129 +5097,110 @@ class MariaDBServices:
         elif weekday == 6:        # Sunday
             price_date_holding = date_yyyymmdd.subtract(price_date_holding, 2)
 
-        # -----------------------------------------------------------------
-        # Remove existing holdings for the same IBAN and price date
-        # ------------------------------------------------------------------
-        self.execute_delete(
-            HOLDING,
-            iban=bank.iban,
-            price_date=price_date_holding
-        )
-
         # ------------------------------------------------------------------
-        # Insert or replace holdings
+        # Store holdings as a single database transaction
         # ------------------------------------------------------------------
-        for holding in holdings:
-            isin = holding[DB_ISIN]
-            name = holding[DB_name]
-
-            # Ensure ISIN master record exists
-            if not self.select_exists(ISIN, name=name):
-                self.execute_replace(
-                    ISIN,
-                    {
-                        DB_ISIN: isin,
-                        DB_name: name,
-                    }
-                )
-
-            # Prepare holding record
-            holding_data = holding.copy()
-            holding_data.pop(DB_name)
-            holding_data[DB_price_date] = price_date_holding
-            holding_data[DB_iban] = bank.iban
-
-            # Persist holding
-            self.execute_replace(HOLDING, holding_data)
+        with self.transaction():
+            # -----------------------------------------------------------------
+            # Remove existing holdings for the same IBAN and price date
+            # ------------------------------------------------------------------
+            self.execute_delete(
+                HOLDING,
+                iban=bank.iban,
+                price_date=price_date_holding
+            )
 
-            # Update acquisition amount (may require user interaction)
-            button_state = self._set_acquisition_amount(bank, isin, name)
-            if button_state == WM_DELETE_WINDOW:
-                self.executor.execute("ROLLBACK;")
-                MessageBoxInfo(
-                    message=get_message(
-                        MESSAGE_TEXT,
-                        "DOWNLOAD_REPEAT",
-                        bank.bank_name
-                    )
-                )
-                return []
+            # ------------------------------------------------------------------
+            # Prepare ISIN master records and holdings
+            # ------------------------------------------------------------------
+            isin_rows = [{DB_ISIN: holding[DB_ISIN], DB_name: holding[DB_name]} for holding in holdings]
+            previous_holdings = self._select_previous_holdings(
+                bank.iban, price_date_holding, [holding[DB_ISIN] for holding in holdings])
+
+            holding_rows = []
+            for holding in holdings:
+                holding_data = holding.copy()
+                name = holding_data.pop(DB_name)
+                holding_data[DB_price_date] = price_date_holding
+                holding_data[DB_iban] = bank.iban
+                holding_data[DB_acquisition_amount] = self._acquisition_amount(
+                    bank, holding_data, name, previous_holdings.get(holding[DB_ISIN]))
+                holding_rows.append(holding_data)
 
-        # ------------------------------------------------------------------
-        # Commit transaction
-        # ------------------------------------------------------------------
-        self.executor.execute("COMMIT;")
+            # ------------------------------------------------------------------
+            # Insert missing ISIN master records, replace holdings
+            # (INSERT IGNORE: a name already stored, compared by the collation
+            # of column name, keeps its master data e.g. symbol, origin_symbol)
+            # ------------------------------------------------------------------
+            self.execute_insert_many(ISIN, isin_rows, ignore=True)
+            self.execute_replace_many(HOLDING, holding_rows)
 
         return holdings
 
-    def _set_acquisition_amount(self, bank, isin: str, name_: str):
+    def _select_previous_holdings(
+        self,
+        iban: str,
+        price_date: date | str,
+        isins: List[str]
+    ) -> Dict[str, HoldingAcquisition]:
+        """
+        Return the latest holding before price_date of each ISIN with one query.
+
+        Returns
+        -------
+        Dict[str, HoldingAcquisition]
+            key: ISIN, value: previous holding.
+        """
+        if not isins:
+            return {}
+        placeholders = ', '.join('?' for _ in isins)
+        sql = f"""
+            SELECT h.isin_code, h.price_date, h.price_currency, h.market_price, h.acquisition_price,
+                   h.pieces, h.amount_currency, h.total_amount, h.acquisition_amount, h.origin
+            FROM {HOLDING} h
+            WHERE h.iban=? AND h.isin_code IN ({placeholders})
+              AND h.price_date = (
+                    SELECT MAX(p.price_date) FROM {HOLDING} p
+                    WHERE p.iban=h.iban AND p.isin_code=h.isin_code AND p.price_date<?
+                  )
+        """
+        rows = self.executor.execute(sql, (iban, *isins, price_date))
+        return {row[0]: HoldingAcquisition(*row[1:]) for row in rows}
+
+    def _acquisition_amount(
+        self,
+        bank,
+        holding: Dict[str, Any],
+        name_: str,
+        previous: Optional[HoldingAcquisition]
+    ) -> Decimal:
         """
-        Update the acquisition amount of a holding based on previous entries.
+        Return the acquisition amount of a holding based on the previous holding.
 
         Parameters
         ----------
         bank : Bank
             Bank object.
-        isin : str
-            ISIN of the holding.
+        holding : Dict[str, Any]
+            HOLDING record to be stored.
         name_ : str
             Name of the security.
-
-        Returns
-        -------
-        Optional[int]
-            Button state if user interaction occurs, else None.
-        """
-        sql = f"""
-            SELECT price_date, price_currency, market_price, acquisition_price,
-                   pieces, amount_currency, total_amount, acquisition_amount, origin
-            FROM {HOLDING}
-            WHERE iban=? AND isin_code=?
-            ORDER BY price_date DESC
-            LIMIT 2
-        """
-        rows = self.executor.execute(sql, (bank.iban, isin))
-        if not rows:
-            return None
-
-        data = [HoldingAcquisition(*row) for row in reversed(rows)]
-        pieces_diff = data[0].pieces - data[-1].pieces
-
-        if len(data) > 1 and pieces_diff == 0 and data[0].acquisition_price == data[-1].acquisition_price:
-            acquisition_amount = data[0].acquisition_amount
-        elif data[-1].price_currency == PERCENT:
-            MessageBoxInfo(message=get_message(MESSAGE_TEXT, 'ACQUISITION_AMOUNT', bank.bank_name, bank.iban, name_, isin),
+        previous : Optional[HoldingAcquisition]
+            Latest holding of the ISIN before the holding's price date.
+        """
+        pieces = holding.get(DB_pieces, 0)
+        acquisition_price = holding.get(DB_acquisition_price, 0)
+        if (previous is not None and previous.pieces == pieces
+                and previous.acquisition_price == acquisition_price):
+            return previous.acquisition_amount
+        if holding.get(DB_price_currency) == PERCENT:
+            MessageBoxInfo(message=get_message(MESSAGE_TEXT, 'ACQUISITION_AMOUNT', bank.bank_name,
+                                               bank.iban, name_, holding[DB_ISIN]),
                            information=WARNING)
-            acquisition_amount = data[0].acquisition_amount
-        else:
-            acquisition_amount = dec2.multiply(data[-1].pieces, data[-1].acquisition_price)
-
-        data[-1].acquisition_amount = acquisition_amount
-        self.update_holding_acquisition(bank.iban, isin, data[-1])
-        return None
-
-    def update_holding_acquisition(self, iban, isin, HoldingAcquisition, period=None, mode=None):
-
-        if HoldingAcquisition.origin == ORIGIN:
-            sql_statement = ("UPDATE " + HOLDING +
-                             " SET acquisition_amount=? WHERE iban=? AND isin_code=?")
-            vars_ = (HoldingAcquisition.acquisition_amount, iban, isin,
-                     HoldingAcquisition.price_date)
-        else:
-            sql_statement = ("UPDATE " + HOLDING + " SET acquisition_price=?, "
-                             " acquisition_amount=? WHERE iban=? AND isin_code=?")
-            vars_ = (HoldingAcquisition.acquisition_price, HoldingAcquisition.acquisition_amount,
-                     iban, isin, HoldingAcquisition.price_date)
-        if mode is None:
-            sql_statement = sql_statement + " AND price_date=?"
-        else:
-            if period is None:
-                sql_statement = sql_statement + " AND price_date>=?"
-            else:
-                _, to_date = period
-                vars_ = vars_ + (to_date,)
-                sql_statement = sql_statement + " AND price_date>=? AND price_date<=?"
-        self.execute(sql_statement, vars_=vars_)
+            if previous is not None:
+                return previous.acquisition_amount
+            return holding.get(DB_acquisition_amount, Decimal("0.00"))
+        return dec2.multiply(pieces, acquisition_price)
 
     def _statements(self, bank) -> list[dict]:
         """
@@ -3457,44 +5214,144 @@ class MariaDBServices:
         Returns
         -------
         list[dict]
-            List of statements inserted into the database.
+            Downloaded statements; statements of a FinTS download are stored
+            in chunks as they are parsed and not returned.
         """
         max_entry_date = self.select_scalar(STATEMENT, f"MAX({DB_entry_date})", iban=bank.iban)
         bank.from_date = max_entry_date if max_entry_date else START_DATE_STATEMENTS
         bank.to_date = str(date.today())
 
-        statements = bank.download_statements() if bank.scraper else bank.dialogs.statements(bank)
+        counters = {}
+        stored = [0, 0]  # inserted, downloaded
 
-        if statements in START_DIALOG_FAILED or statements == []:
-            return statements
+        def store(statements):
+            inserted = self._store_statements(bank, statements, counters)
+            stored[0] += inserted
+            stored[1] += len(statements)
 
-        entry_date = None
-        for statement in statements:
-            if statement[DB_entry_date] != entry_date:
-                entry_date = statement[DB_entry_date]
-                counter = 0
+        if bank.scraper:
+            statements = bank.download_statements()
+            if statements in START_DIALOG_FAILED or statements == []:
+                return statements
+            store(statements)
+        else:
+            statements = bank.dialogs.statements(bank, store=store)
+            if statements in START_DIALOG_FAILED or not stored[1]:
+                return statements
+
+        bankdata_informations_append(
+            INFORMATION,
+            get_message(
+                MESSAGE_TEXT,
+                'STATEMENTS_STORED',
+                bank.iban,
+                stored[0],
+                stored[1] - stored[0]
+                )
+            )
+
+        if application_store.get(DB_ledger):
+            transfer_statement_to_ledger(self, bank)
+
+        return statements
 
+    def _store_statements(self, bank, statements: list[dict], counters: dict) -> int:
+        """
+        Store one chunk of downloaded statements in the STATEMENT table.
+
+        Parameters
+        ----------
+        bank : Bank
+            Bank object of the statement account.
+        statements : list[dict]
+            Downloaded statements in booking order.
+        counters : dict
+            {entry_date: next counter}, carried over the chunks of a download.
+
+        Returns
+        -------
+        int
+            Number of inserted statements.
+        """
+        # ------------------------------------------------------------------
+        # Assign counters per entry_date
+        # ------------------------------------------------------------------
+        for statement in statements:
+            counter = counters.get(statement[DB_entry_date], 0)
             statement[DB_iban] = bank.iban
             statement[DB_counter] = counter
+            counters[statement[DB_entry_date]] = counter + 1
 
-            # Skip if already exists
-            if self.select_exists(STATEMENT, iban=statement[DB_iban], entry_date=statement[DB_entry_date], counter=counter):
-                pass
-            elif DB_bank_reference in statement and self.select_exists(STATEMENT, iban=statement[DB_iban], bank_reference=statement[DB_bank_reference]):
-                pass
-            else:
-                if not statement.get(DB_purpose_wo_identifier):
-                    statement[DB_purpose_wo_identifier] = statement[DB_purpose]
-                self.execute_insert(STATEMENT, statement)
+        # ------------------------------------------------------------------
+        # Load existing keys and bank references of the download window once
+        # ------------------------------------------------------------------
+        existing_keys, existing_references = self._select_statement_keys(bank.iban, statements)
+
+        new_statements = []
+        for statement in statements:
+            key = (str(statement[DB_entry_date])[:10], statement[DB_counter])
+            bank_reference = statement.get(DB_bank_reference)
+            if key in existing_keys:
+                continue
+            if DB_bank_reference in statement and bank_reference in existing_references:
+                continue
+            if not statement.get(DB_purpose_wo_identifier):
+                statement[DB_purpose_wo_identifier] = statement[DB_purpose]
+            existing_keys.add(key)
+            if bank_reference:
+                existing_references.add(bank_reference)
+            new_statements.append(statement)
 
-            counter += 1
+        # ------------------------------------------------------------------
+        # Store new statements in one transaction
+        # ------------------------------------------------------------------
+        with self.transaction():
+            return self.execute_insert_many(STATEMENT, new_statements, ignore=True)
 
-        self.executor.execute('COMMIT;')
+    def _select_statement_keys(self, iban: str, statements: list[dict]) -> tuple[set, set]:
+        """
+        Return existing (entry_date, counter) keys and bank references of STATEMENT
+        for the download window of `statements` in one query.
 
-        if application_store.get(DB_ledger):
-            transfer_statement_to_ledger(self, bank)
+        Bank references outside the window are included, if they appear
+        in the downloaded statements.
 
-        return statements
+        Parameters
+        ----------
+        iban : str
+            IBAN of the statement account.
+        statements : list[dict]
+            Downloaded statements.
+
+        Returns
+        -------
+        tuple[set, set]
+            ({(entry_date 'YYYY-MM-DD', counter), ...}, {bank_reference, ...})
+        """
+        from_date = min(str(statement[DB_entry_date])[:10] for statement in statements)
+        bank_references = list({
+            statement[DB_bank_reference] for statement in statements
+            if statement.get(DB_bank_reference)
+            })
+
+        clause = f"{DB_entry_date} >= ?"
+        clause_vars = (from_date,)
+        if bank_references:
+            placeholders = ', '.join('?' for _ in bank_references)
+            clause = f"{clause} OR {DB_bank_reference} IN ({placeholders})"
+            clause_vars += tuple(bank_references)
+
+        rows = self._select(
+            table=STATEMENT,
+            fields=[DB_entry_date, DB_counter, DB_bank_reference],
+            clause=clause,
+            clause_vars=clause_vars,
+            iban=iban
+        )
+
+        existing_keys = {(str(entry_date), counter) for entry_date, counter, _ in rows}
+        existing_references = {bank_reference for _, _, bank_reference in rows if bank_reference}
+        return existing_keys, existing_references
 
     def select_total_amounts(self, period: tuple) -> list:
         """
@@ -3769,6 +5626,7 @@ class MariaDBImporter:
             "WHERE pieces < 0"
         )
         self.executor.execute(update_sql, (TRANSACTION_DELIVERY,))
+        self.invalidate_cost_basis_checkpoints()
 
     def import_prices(self, title: str, dataframe: DataFrame) -> bool:
         """
@@ -3793,6 +5651,7 @@ class MariaDBImporter:
         try:
             dataframe.to_sql(PRICES, con=self.engine, if_exists='append', index_label=['symbol', 'price_date'])
             self.executor.execute('COMMIT')
+            self.invalidate_close_prices(set(dataframe.index.get_level_values(0)))
             return True
         except sqlalchemy.exc.SQLAlchemyError as info:
             DatabaseErrorHandler.handle_error(title, Informations.PRICES_INFORMATIONS, info)
@@ -3803,6 +5662,7 @@ class MariaDB(
     MariaDBInitializer,
     MariaDBTables,
     MariaDBLedger,
+    MariaDBLedgerDailyBalance,
     MariaDBHolding,
     MariaDBStatements,
     MariaDBTransactions,
@@ -75,6 +75,9 @@ MESSAGE_TEXT = {
     'DOWNLOAD_ACCOUNT_NOT_ACTIVATED': 'Bank: {} {}\n Bank Account: {}  {}       \n     Download Bank Data of Iban {} not activated in LEDGER_COA',
     'DOWNLOAD_DONE': 'BANK: {}   Data downloading finished',
     'DOWNLOAD_NOT_DONE': 'BANK: {}   Data downloading finished with E R R O R ',
+    'DOWNLOAD_FAILED': 'BANK: {}   Data downloading failed: {}',
+    'DOWNLOAD_TIMEOUT': 'BANK: {}   Data downloading not finished after {} seconds, download abandoned',
+    'DOWNLOAD_ABANDONED_END': 'BANK: {}   Abandoned data downloading finished, bank dialog ended',
     'DOWNLOAD_REPEAT': 'Download {} canceled by User! \n\nStart Download once more!',
     'DOWNLOAD_RUNNING': '{} Data Download running',
     'EXCEL': 'Excel File {} created, sheet added',
@@ -83,6 +86,7 @@ MESSAGE_TEXT = {
     'FIELDLIST_MIN': 'Select at least {} positions in fieldlist',
     'FIELDLIST_INTERSECTION_EMPTY': 'Intersection of the data in the selected period of all selected isin_codes is empty',
     'FIXED': '{} MUST HAVE {} Characters ',
+    'FINTS_LATENCY': 'Bank: {}  Server: {}  FinTS message {}: {} ms',
     'FINTS_UPDATE_BPD_VERSION': 'Bank: {} \n Version of the bank parameter data updated.\n  New version: {}',
     'FINTS_UPDATE_UPD_VERSION': 'Bank: {} \n Version of the user parameter data updated.\n  New version: {}',
     'HELP_PANDASTABLE': 'Show Row Menu: \n          Select row\n          Click on row number with the right mouse button',
@@ -106,6 +110,7 @@ MESSAGE_TEXT = {
     'LEDGER_ROW': 'No additional statement data available for table row ',
     'LEDGER_STATEMENT_ASSIGMENT_EMPTY': 'There are no assignment statements for ledger IdNo {} and Ledger Account {}',
     'LEDGER_STATEMENT_ASSIGMENT_MISSED': 'Update and select new assignment (statement) of credit/debit accounts marked in red !',
+    'LEDGER_DAILY_BALANCE_REBUILT': 'Daily balances of ledger-only accounts rebuilt from LEDGER: {} rows',
     'LEDGER_DAILY_BALANCE_RESET': 'Select account from which the daily balances should be deleted.',
     'LENGTH': '{} Exceeds Length OF {} Characters',
     'LOAD_DATA': 'Data imported if no message was displayed previously \nfrom File {}',
@@ -117,6 +122,7 @@ MESSAGE_TEXT = {
     'MARIADB_DUPLICATE': 'Duplicate Entry ignored\nSQL Statement: \n{} \n Error: \n{} \n Vars: \n{}',
     'MARIADB_ERROR_SQL': 'SQL_Statement\n {} \n\nVars\n {}',
     'MARIADB_ERROR': 'MariaDB Error\n{} \n {}',
+    'MARIADB_STARTUP': 'MariaDB {} database {} started in {:.0f} ms ({}), schema {}',
     'MIN_LENGTH': '{} Must have a Length OF {} Characters',
     'NAME_INPUT': 'Enter Query Name (Name of Stored Procedure, allowed Chars [alphanumeric and _): ',
     'NAMING': 'Fix Naming. Allowed Characters: A-Z, a-z, 0-9, _',
@@ -150,10 +156,12 @@ MESSAGE_TEXT = {
     'SELECT_DATA': 'Selection incomplete',
     'SELECT_INCOMPLETE': 'Enter your Selection',
     'SELECT_ROW': 'Select row, then right clicking on row number',
+    'SEND_ERROR': 'Sending FinTS message failed: {}',
     'SEPA_CRDT_TRANSFER': 'SEPA Credit Transfer \nBank:    {}  \nAccount:    {} ({})',
     'SQLALCHEMY_ERROR': "Error Calling SQLAlchemy {}:    {}",
     'SHELVE': '\n LOGON Data, Synchronization Data >>>>> BANK: {}\n\n',
     'STACK': '\n\n LINE\n {} \n        MODULE  {}\n        METHOD {}',
+    'STATEMENTS_STORED': 'IBAN {}: {} Statements stored, {} Statements already stored (skipped)',
     'SYMBOL_MISSING_ALL': '{} \n \n No ticker/symbol found in Table ISIN. \n You must add ticker symbols in Table ISIN',
     'SYMBOL_MISSING': 'No ticker/symbol (symbol_origin) found. \n ISIN: {}  /  {} \n\n You must add ticker symbol in Table ISIN',
     'SYMBOL_USED': 'Symbol already used in {}',
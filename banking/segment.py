@@ -404,7 +404,8 @@ class Segments():
                 supported_camt_messages=bank.supported_camt_messages,
                 all_accounts=False,
                 date_start=bank.from_date,
-                date_end=bank.to_date
+                date_end=bank.to_date,
+                touchdown_point=bank.touchdown_point
         )
         return message
 
@@ -436,7 +437,8 @@ class Segments():
                     _sepaaccount(bank)),
                 all_accounts=False,
                 date_start=bank.from_date,
-                date_end=bank.to_date
+                date_end=bank.to_date,
+                touchdown_point=bank.touchdown_point
             )
             return message
         MessageBoxTermination(info=get_message(MESSAGE_TEXT,'HIKAZ', 
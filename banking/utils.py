@@ -13,7 +13,12 @@ import re
 import sys
 import requests
 
+from requests.adapters import HTTPAdapter
+from threading import Lock
+from time import monotonic, sleep
 from typing import Dict, List, Iterator
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
 from collections import Counter
 from tkinter import Tk, messagebox, TclError
 from datetime import date, timedelta, datetime
@@ -21,6 +26,7 @@ from decimal import Decimal, getcontext, ROUND_HALF_EVEN, DivisionByZero
 
 from banking.declarations import (
     EURO, CREDIT,
+    FINTS_POOL_SIZE, FINTS_RETRIES,
     POPUP_MENU_TEXT, MENU_TEXT,
     WIDTH_TEXT
 )
@@ -240,6 +246,63 @@ def only_alphanumeric(string_value):
     return ''.join(char_ for char_ in string_value if char_.isalnum())
 
 
+_http_sessions = {}
+_http_sessions_lock = Lock()
+
+
+def http_session(server):
+    """
+    Returns the requests.Session of the server's scheme and host.
+    The session keeps connections alive and is shared by all banks using the host.
+    Only failed connection attempts are retried, sent messages are never repeated.
+    """
+    url = urlsplit(server)
+    key = (url.scheme, url.netloc)
+    with _http_sessions_lock:
+        session = _http_sessions.get(key)
+        if session is None:
+            retry = Retry(total=FINTS_RETRIES, connect=FINTS_RETRIES, read=0, status=0,
+                          other=0, backoff_factor=0.5, allowed_methods=None)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FINTS_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount(url.scheme + '://', adapter)
+            _http_sessions[key] = session
+        return session
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Allows rate acquisitions per `per` seconds, bursts up to capacity.
+    """
+
+    def __init__(self, rate, per=1.0, capacity=None):
+
+        self.rate = rate / per  # tokens per second
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def acquire(self):
+        """
+        Takes a token, waits until one is available.
+        Returns the seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            sleep(delay)
+            waited += delay
+
+
 def http_error_code(server):
     """
     1    1xx Informational response
@@ -0,0 +1,129 @@
+"""
+Created on 18.10.2026
+__updated__ = "2026-10-18"
+@author: Wolfgang Kramer
+
+Benchmarks of the statement parsing of banking/dialog.py
+
+Run from the project directory:  python -m benchmarks.dialog_parsing
+"""
+
+import re
+import tracemalloc
+import xmltodict
+
+from operator import itemgetter
+from random import Random
+from time import perf_counter
+
+from banking.declarations import IDENTIFIER
+from banking.dialog import camt052_elements, find_identifiers
+
+
+def find_identifiers_per_key(purpose, identifier_delimiter):
+    """
+    Reference implementation: one pattern compiled and searched per IDENTIFIER key
+    """
+    identifiers = []
+    for identifier in IDENTIFIER.keys():
+        m = re.compile(re.escape(identifier + identifier_delimiter)).search(purpose)
+        if m is not None:
+            identifiers.append((identifier, m.start(), m.end()))
+    return sorted(identifiers, key=itemgetter(1))
+
+
+def benchmark_find_identifiers(statements=10000, identifier_delimiter=':', seed=0):
+    """
+    Micro-benchmark of find_identifiers against the per key implementation
+    on a synthetic purpose corpus of >statements< entries.
+
+    Returns {'statements': .., 'per_key': seconds, 'single_scan': seconds, 'speedup': ..}
+    """
+    random = Random(seed)
+    keys = list(IDENTIFIER.keys())
+    corpus = []
+    for _ in range(statements):
+        purpose = []
+        for identifier in random.sample(keys, random.randint(0, 5)):
+            purpose.append(identifier + identifier_delimiter)
+            purpose.append(''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789/-.', k=random.randint(5, 40))))
+        corpus.append(''.join(purpose))
+    started = perf_counter()
+    expected = [find_identifiers_per_key(purpose, identifier_delimiter) for purpose in corpus]
+    per_key = perf_counter() - started
+    started = perf_counter()
+    result = [find_identifiers(purpose, identifier_delimiter) for purpose in corpus]
+    single_scan = perf_counter() - started
+    if result != expected:
+        raise AssertionError('find_identifiers differs from per key implementation')
+    return {'statements': statements, 'per_key': per_key, 'single_scan': single_scan,
+            'speedup': per_key / single_scan if single_scan else None}
+
+
+def camt052_document(entries, seed=0):
+    """
+    Returns a synthetic camt.052 document (bytes) with >entries< Ntry elements
+    """
+    random = Random(seed)
+    xml = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.052.001.08"><BkToCstmrAcctRpt><Rpt>',
+           '<Id>1</Id><Acct><Id><IBAN>DE02120300000000202051</IBAN></Id></Acct>',
+           '<Bal><Tp><CdOrPrtry><Cd>OPBD</Cd></CdOrPrtry></Tp><Amt Ccy="EUR">1000.00</Amt>',
+           '<CdtDbtInd>CRDT</CdtDbtInd><Dt><Dt>2025-01-01</Dt></Dt></Bal>']
+    for idx in range(entries):
+        status = random.choice(('CRDT', 'DBIT'))
+        party = 'Dbtr' if status == 'CRDT' else 'Cdtr'
+        xml.append(''.join([
+            '<Ntry><Amt Ccy="EUR">', str(random.randint(1, 99999) / 100), '</Amt>',
+            '<CdtDbtInd>', status, '</CdtDbtInd><Sts><Cd>BOOK</Cd></Sts>',
+            '<BookgDt><Dt>2025-01-02</Dt></BookgDt><ValDt><Dt>2025-01-02</Dt></ValDt>',
+            '<AcctSvcrRef>', str(idx), '</AcctSvcrRef>',
+            '<BkTxCd><Prtry><Cd>NTRF+116+9002</Cd><Issr>DK</Issr></Prtry></BkTxCd>',
+            '<NtryDtls><TxDtls><Refs><EndToEndId>E2E', str(idx), '</EndToEndId></Refs>',
+            '<RltdPties><', party, '><Pty><Nm>Name ', str(idx), '</Nm></Pty></', party, '>',
+            '<', party, 'Acct><Id><IBAN>DE02120300000000202051</IBAN></Id></', party, 'Acct></RltdPties>',
+            '<RmtInf><Ustrd>EREF+E2E', str(idx), ' SVWZ+Invoice ', str(idx), '</Ustrd></RmtInf>',
+            '</TxDtls></NtryDtls><AddtlNtryInf>Transfer</AddtlNtryInf></Ntry>']))
+    xml.append('</Rpt></BkToCstmrAcctRpt></Document>')
+    return ''.join(xml).encode('utf-8')
+
+
+def benchmark_camt052_elements(entries=50000):
+    """
+    Benchmark of camt052_elements against xmltodict.parse of the whole document
+    on a synthetic camt.052 document with >entries< Ntry elements.
+
+    Returns {'entries': .., 'xmltodict': {'seconds', 'entries_per_second', 'peak_memory'},
+             'iterparse': {...}}; peak_memory in bytes (tracemalloc)
+    """
+    xml_string = camt052_document(entries)
+
+    def xmltodict_entries():
+        rpt = xmltodict.parse(xml_string)['Document']['BkToCstmrAcctRpt']['Rpt']
+        for entry in rpt['Ntry']:
+            yield entry
+
+    def iterparse_entries():
+        for name, entry in camt052_elements(xml_string):
+            if name == 'Ntry':
+                yield entry
+
+    result = {'entries': entries}
+    for name, reader in (('xmltodict', xmltodict_entries), ('iterparse', iterparse_entries)):
+        tracemalloc.start()
+        started = perf_counter()
+        count = sum(1 for _ in reader())
+        seconds = perf_counter() - started
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if count != entries:
+            raise AssertionError(' '.join([name, 'returned', str(count), 'entries']))
+        result[name] = {'seconds': seconds, 'entries_per_second': count / seconds if seconds else None,
+                        'peak_memory': peak_memory}
+    return result
+
+
+if __name__ == '__main__':
+
+    print('find_identifiers', benchmark_find_identifiers())
+    print('camt052_elements', benchmark_camt052_elements())
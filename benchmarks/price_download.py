@@ -0,0 +1,128 @@
+"""
+Created on 18.10.2026
+__updated__ = "2026-10-18"
+@author: Wolfgang Kramer
+
+End-to-end run of PriceDownloader (banking/forms.py) without network and database:
+Alpha Vantage requests go to a local stub server replaying a recorded response,
+the Yahoo! download is injected and returns a recorded frame,
+the writer thread stores into a recording stand-in of MariaDB.
+
+Run from the project directory:  python -m benchmarks.price_download
+"""
+
+import threading
+
+from contextlib import contextmanager
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from pandas import concat, read_csv
+
+from banking.declarations import ALPHA_VANTAGE, YAHOO
+from banking.declarations_mariadb import (
+    DB_alpha_vantage, DB_alpha_vantage_price_period, DB_close, DB_origin, PRICES)
+from banking.forms import PriceDownloader, PriceJob
+from banking.utils import application_store
+
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+ALPHA_VANTAGE_RESPONSE = (FIXTURES / 'alpha_vantage_time_series_daily.json').read_bytes()
+YAHOO_FRAME = read_csv(FIXTURES / 'yahoo_download.csv', index_col='Date', parse_dates=True)
+
+
+class AlphaVantageStub(BaseHTTPRequestHandler):
+    """
+    Replays the recorded Alpha Vantage response, records the query parameters
+    """
+    queries = []
+
+    def do_GET(self):
+
+        self.queries.append(parse_qs(urlsplit(self.path).query))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(ALPHA_VANTAGE_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(ALPHA_VANTAGE_RESPONSE)
+
+    def log_message(self, format, *args):
+
+        pass
+
+
+class RecordingMariaDB:
+    """
+    Stand-in of MariaDB recording the deletes and imports of the writer thread
+    """
+
+    def __init__(self):
+
+        self.deleted = []
+        self.imported = {}
+
+    @contextmanager
+    def worker_connection(self):
+
+        yield
+
+    def execute_delete(self, table, symbol=None, period=None):
+
+        self.deleted.append((table, symbol, period))
+
+    def import_prices(self, title, dataframe):
+
+        self.imported[dataframe[DB_origin].iloc[0]] = dataframe
+        return True
+
+
+def yahoo_download(symbols, start, end):
+    """
+    Injected Yahoo! batch download: the recorded frame for each symbol
+    """
+    return concat({symbol: YAHOO_FRAME for symbol in symbols}, axis=1)
+
+
+def run_price_download():
+    """
+    Drives PriceDownloader.run with one Alpha Vantage and one Yahoo! job
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AlphaVantageStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    application_store.load_data({DB_alpha_vantage_price_period: 'TIME_SERIES_DAILY', DB_alpha_vantage: 'demo'})
+    mariadb = RecordingMariaDB()
+    jobs = [
+        PriceJob('International Business Machines', 'US4592001014', 'IBM', ALPHA_VANTAGE,
+                 date(2000, 1, 1), date(2024, 1, 5), True),
+        PriceJob('IBM Frankfurt', 'US4592001014', 'IBM.F', YAHOO,
+                 date(2024, 1, 3), date(2024, 1, 5), False),
+        ]
+    try:
+        messages = PriceDownloader(
+            'Prices', mariadb,
+            alpha_vantage_url=f'http://127.0.0.1:{server.server_port}/query',
+            yahoo_download=yahoo_download).run(jobs)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(AlphaVantageStub.queries) == 1
+    query = AlphaVantageStub.queries[0]
+    assert query['symbol'] == ['IBM'] and query['outputsize'] == ['full'] and query['apikey'] == ['demo']
+    alpha_vantage = mariadb.imported[ALPHA_VANTAGE]
+    assert len(alpha_vantage) == 4
+    assert alpha_vantage[DB_close].astype(float).tolist() == [161.5, 160.1, 160.86, 161.1]
+    yahoo = mariadb.imported[YAHOO]
+    # rows before from_date of the job are dropped
+    assert len(yahoo) == 3
+    assert yahoo[DB_close].tolist() == YAHOO_FRAME['Close'].iloc[1:].tolist()
+    assert sorted((table, symbol) for table, symbol, _ in mariadb.deleted) == [(PRICES, 'IBM'), (PRICES, 'IBM.F')]
+    assert len(messages) == 2
+    return messages
+
+
+if __name__ == '__main__':
+
+    print('\n\n'.join(run_price_download()))